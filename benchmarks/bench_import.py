@@ -0,0 +1,101 @@
+"""
+Benchmark of `import pyobsplot` time.
+
+Each run imports pyobsplot in a fresh Python interpreter, so that measured times
+correspond to a cold start of a script or a worker process.
+
+Usage:
+
+    uv run python benchmarks/bench_import.py --runs 20
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import subprocess
+import sys
+
+logger = logging.getLogger("bench-import")
+logging.basicConfig(stream=sys.stdout, level=logging.INFO, format="%(message)s")
+
+# Modules which should not be imported by `import pyobsplot`
+HEAVY_MODULES = [
+    "anywidget",
+    "IPython",
+    "ipywidgets",
+    "numpy",
+    "pandas",
+    "polars",
+    "pyarrow",
+    "requests",
+    "traitlets",
+    "typst",
+]
+
+IMPORT_SCRIPT = f"""
+import json, sys, time
+start = time.perf_counter()
+import pyobsplot
+elapsed = time.perf_counter() - start
+heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]
+print(json.dumps({{"time": elapsed, "heavy_modules": heavy}}))
+"""
+
+
+def run_import() -> dict:
+    """
+    Import pyobsplot in a new interpreter and return import time and loaded
+    heavy modules.
+    """
+    out = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout)
+
+
+def bench_import(runs: int) -> dict:
+    """
+    Run the import benchmark.
+
+    Parameters
+    ----------
+    runs : int
+        number of fresh interpreters to start.
+
+    Returns
+    -------
+    dict
+        benchmark results, times are in seconds.
+    """
+    results = [run_import() for _ in range(runs)]
+    times = sorted(r["time"] for r in results)
+    return {
+        "runs": runs,
+        "min": times[0],
+        "median": statistics.median(times),
+        "max": times[-1],
+        "heavy_modules": results[0]["heavy_modules"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark `import pyobsplot` time.")
+    parser.add_argument("--runs", type=int, default=10, help="number of runs")
+    parser.add_argument("--json", help="save results to this JSON file")
+    args = parser.parse_args()
+
+    res = bench_import(args.runs)
+    logger.info(
+        f"import pyobsplot: median {res['median'] * 1000:.1f}ms "
+        f"(min {res['min'] * 1000:.1f}ms, max {res['max'] * 1000:.1f}ms, "
+        f"{res['runs']} runs)"
+    )
+    if res["heavy_modules"]:
+        logger.info(f"Heavy modules imported: {', '.join(res['heavy_modules'])}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(res, f, indent=2)
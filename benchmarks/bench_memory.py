@@ -0,0 +1,330 @@
+"""
+Memory profiling of DataFrame serialization for the jsdom renderer.
+
+Serialization of a DataFrame goes through several intermediate copies. This
+script runs each of them separately and reports, for each stage:
+
+- `time`: stage duration
+- `output`: size in bytes of the stage output
+- `traced`: peak memory allocated during the stage, as traced by tracemalloc
+  (Python objects and numpy arrays)
+- `rss`: peak increase of the process resident memory during the stage, which
+  also accounts for polars and pyarrow native allocations (Linux only)
+
+Stages are:
+
+- `prepare`: date and datetime columns conversion
+- `to_pandas`: polars to pandas conversion (polars only)
+- `feather`: Arrow IPC writing to a BytesIO buffer
+- `getvalue`: buffer copy to bytes
+- `base64`: base64 encoding
+- `json`: JSON encoding of the jsdom server request
+
+The staged pipeline reproduces `pyobsplot.data.serialize` and checks that its
+result is identical. The whole pipeline, as run by pyobsplot, is also profiled
+to get the overall peak memory, which accounts for intermediate copies alive at
+the same time.
+
+Usage:
+
+    uv run python benchmarks/bench_memory.py --rows 100000 --rows 1000000
+    uv run python benchmarks/bench_memory.py --frame polars --json memory.json
+"""
+
+import argparse
+import base64
+import gc
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import polars as pl
+
+from pyobsplot.data import ARROW_COMPRESSION, serialize
+
+logger = logging.getLogger("bench-memory")
+logging.basicConfig(stream=sys.stdout, level=logging.INFO, format="%(message)s")
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss() -> int | None:
+    """
+    Current resident memory size of the process in bytes, or None if not
+    available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        return None
+
+
+class RSSSampler:
+    def __init__(self, interval: float = 0.001) -> None:
+        """
+        Record the peak resident memory size of the process in a background
+        thread, as a context manager.
+        """
+        self.interval = interval
+        self.start = None
+        self.peak = None
+        self._stop = threading.Event()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss())  # type: ignore
+
+    def __enter__(self):
+        self.start = rss()
+        self.peak = self.start
+        if self.start is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        if self.start is not None:
+            self._stop.set()
+            self._thread.join()
+            self.peak = max(self.peak, rss())  # type: ignore
+
+    @property
+    def increase(self) -> int | None:
+        return None if self.start is None else self.peak - self.start  # type: ignore
+
+
+def synthetic_frame(
+    rows: int, frame: str, seed: int = 0
+) -> pl.DataFrame | pd.DataFrame:
+    """
+    Generate a DataFrame with numeric, string, date and datetime columns.
+    """
+    rng = np.random.default_rng(seed)
+    df = pl.DataFrame(
+        {
+            "x": rng.normal(size=rows),
+            "y": rng.integers(0, 1000, size=rows),
+            "group": rng.choice(["alpha", "beta", "gamma", "delta"], size=rows),
+            "day": pl.date_range(
+                date(2000, 1, 1), date(2020, 12, 31), eager=True
+            ).sample(rows, with_replacement=True, seed=seed),
+            "time": pl.Series(rng.integers(0, 10**12, size=rows)).cast(
+                pl.Datetime("us")
+            ),
+        }
+    )
+    return df if frame == "polars" else df.to_pandas()
+
+
+def raw_size(df: pl.DataFrame | pd.DataFrame) -> int:
+    """
+    In memory size in bytes of a DataFrame.
+    """
+    if isinstance(df, pl.DataFrame):
+        return int(df.estimated_size())
+    return int(df.memory_usage(deep=True).sum())
+
+
+def pd_prepare(df: pd.DataFrame) -> pd.DataFrame:
+    # Same conversions as pyobsplot.data.pd_to_arrow
+    for colname in df.columns:
+        col = df[colname].dropna()
+        if col is not None and isinstance(col[0], date):
+            try:
+                df[colname] = pd.to_datetime(df[colname])
+            except ValueError:
+                pass
+    datetime_columns = df.select_dtypes(include=["datetime64"]).columns
+    df[datetime_columns] = df[datetime_columns].astype("datetime64[ms]")
+    return df
+
+
+def pl_prepare(df: pl.DataFrame) -> pl.DataFrame:
+    # Same conversions as pyobsplot.data.pl_to_arrow
+    df = df.with_columns(pl.col(pl.Datetime).cast(pl.Datetime("ms")))
+    return df.with_columns(pl.col(pl.Date).cast(pl.Datetime("ms")))
+
+
+def feather(df: pd.DataFrame) -> io.BytesIO:
+    f = io.BytesIO()
+    df.to_feather(f, compression=ARROW_COMPRESSION)
+    return f
+
+
+def stages(df: pl.DataFrame | pd.DataFrame) -> list:
+    """
+    Serialization stages of a DataFrame, as a list of (name, function) tuples.
+    Each function takes the previous stage output as argument.
+    """
+    if isinstance(df, pl.DataFrame):
+        res = [("prepare", pl_prepare), ("to_pandas", lambda d: d.to_pandas())]
+    else:
+        res = [("prepare", lambda d: pd_prepare(d.copy()))]
+    return [
+        *res,
+        ("feather", feather),
+        ("getvalue", lambda f: f.getvalue()),
+        ("base64", lambda b: base64.standard_b64encode(b).decode("ascii")),
+        (
+            "json",
+            lambda v: json.dumps(
+                {"data": [{"pyobsplot-type": "DataFrame", "value": v}]}
+            ),
+        ),
+    ]
+
+
+def output_size(obj) -> int:
+    if isinstance(obj, pl.DataFrame):
+        return int(obj.estimated_size())
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, io.BytesIO):
+        return obj.getbuffer().nbytes
+    return len(obj)
+
+
+def profile(df: pl.DataFrame | pd.DataFrame) -> dict:
+    """
+    Profile the memory usage of each serialization stage of a DataFrame.
+
+    Returns
+    -------
+    dict
+        dict with "raw" (DataFrame size in bytes), "stages" (results of each
+        stage) and "pipeline" (results of the whole serialization) keys.
+    """
+    results = {}
+    value = df
+    tracemalloc.start()
+    try:
+        for name, fun in stages(df):
+            gc.collect()
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            with RSSSampler() as sampler:
+                start = time.perf_counter()
+                value = fun(value)
+                elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            results[name] = {
+                "time": elapsed,
+                "output": output_size(value),
+                "traced": peak - before,
+                "rss": sampler.increase,
+            }
+    finally:
+        tracemalloc.stop()
+
+    # Check that stages are in sync with pyobsplot.data
+    expected = serialize(
+        df.copy() if isinstance(df, pd.DataFrame) else df, renderer="jsdom"
+    )["value"]
+    if json.loads(value)["data"][0]["value"] != expected:
+        msg = "Serialization stages are not in sync with pyobsplot.data.serialize"
+        raise RuntimeError(msg)
+
+    return {
+        "raw": raw_size(df),
+        "stages": results,
+        "pipeline": profile_pipeline(df),
+    }
+
+
+def serialize_request(df: pl.DataFrame | pd.DataFrame) -> str:
+    """
+    Serialize a DataFrame and encode it in a jsdom server request, as done by
+    pyobsplot.
+    """
+    return json.dumps({"spec": {"data": [serialize(df, renderer="jsdom")]}})
+
+
+def profile_pipeline(df: pl.DataFrame | pd.DataFrame) -> dict:
+    """
+    Profile the memory usage of the whole serialization of a DataFrame.
+    """
+    if isinstance(df, pd.DataFrame):
+        # pd_to_arrow modifies its argument
+        df = df.copy()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        with RSSSampler() as sampler:
+            start = time.perf_counter()
+            out = serialize_request(df)
+            elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "time": elapsed,
+        "output": len(out),
+        "traced": peak,
+        "rss": sampler.increase,
+    }
+
+
+def log_profile(name: str, res: dict) -> None:
+    """
+    Log the results of a profile.
+    """
+    mb = 1e6
+    logger.info(f"{name}: raw size {res['raw'] / mb:.1f}MB")
+    logger.info(
+        f"  {'stage':<10} {'time':>8} {'output':>10} {'traced':>10} {'rss':>10}"
+    )
+    for stage, r in res["stages"].items():
+        rss_inc = "-" if r["rss"] is None else f"{r['rss'] / mb:.1f}MB"
+        logger.info(
+            f"  {stage:<10} {r['time'] * 1000:>6.0f}ms {r['output'] / mb:>8.1f}MB "
+            f"{r['traced'] / mb:>8.1f}MB {rss_inc:>10}"
+        )
+    p = res["pipeline"]
+    rss_inc = "-" if p["rss"] is None else f"{p['rss'] / mb:.1f}MB"
+    logger.info(
+        f"  {'pipeline':<10} {p['time'] * 1000:>6.0f}ms {p['output'] / mb:>8.1f}MB "
+        f"{p['traced'] / mb:>8.1f}MB {rss_inc:>10}"
+    )
+    logger.info(
+        f"  pipeline peak traced memory: {p['traced'] / res['raw']:.1f}x raw size"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Memory profiling of DataFrame serialization."
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        action="append",
+        help="number of rows, can be repeated (default: 1000000)",
+    )
+    parser.add_argument(
+        "--frame",
+        choices=["polars", "pandas"],
+        action="append",
+        help="DataFrame type, can be repeated (default: both)",
+    )
+    parser.add_argument("--json", help="save results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    for frame in args.frame or ["polars", "pandas"]:
+        for rows in args.rows or [1_000_000]:
+            name = f"{frame}_{rows}"
+            results[name] = profile(synthetic_frame(rows, frame))
+            log_profile(name, results[name])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,456 @@
+"""
+End-to-end benchmark of plot rendering with the jsdom renderer.
+
+Plot specifications are the jsdom reference specs in `tests/jsdom_reference`,
+optionally completed by synthetic specifications with a given number of rows.
+Each rendering is split into stages which are timed separately:
+
+- `parse`: specification parsing by SpecParser
+- `serialize`: data serialization to Arrow IPC and base64
+- `encode`: JSON encoding of the jsdom server request
+- `http`: request round trip, without the node rendering time
+- `node`: node rendering time, as reported by the jsdom server
+- `png`, `pdf`, `svg`: typst conversion of the HTML output
+
+If the jsdom server doesn't report its rendering time, `node` is the whole
+request round trip and `http` is not reported.
+
+Results can be saved as a JSON baseline with `--save`, and compared to a
+previous baseline with `--baseline`: the script exits with a non-zero status if
+a stage median time is more than `--threshold` slower than in the baseline.
+
+Usage:
+
+    uv run python benchmarks/bench_render.py --repeat 5 --save baseline.json
+    uv run python benchmarks/bench_render.py --repeat 5 --baseline baseline.json
+    uv run python benchmarks/bench_render.py --no-reference --rows 10000 --rows 1000000
+
+With `--dump`, the jsdom server requests are written to a directory instead, to
+be used by the JavaScript benchmark in `packages/pyobsplot-js/bench`.
+"""
+
+import argparse
+import json
+import logging
+import platform
+import re
+import sys
+import time
+from importlib.metadata import version
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+import requests
+
+from pyobsplot import Plot
+from pyobsplot.cli import load_manifest
+from pyobsplot.loadtest import summarize
+from pyobsplot.obsplot import HAS_TYPST, ObsplotJsdomCreator
+from pyobsplot.parsing import SpecParser
+from pyobsplot.utils import DEFAULT_THEME
+
+logger = logging.getLogger("bench-render")
+logging.basicConfig(stream=sys.stdout, level=logging.INFO, format="%(message)s")
+
+REFERENCE_DIR = Path(__file__).parent.parent / "tests" / "jsdom_reference"
+STAGES = ["parse", "serialize", "encode", "http", "node", "png", "pdf", "svg"]
+TYPST_FORMATS = ["png", "pdf", "svg"]
+SERVER_TIMING_RE = re.compile(r"render;dur=([\d.]+)")
+
+
+def synthetic_specs(rows: int, seed: int = 0) -> dict:
+    """
+    Generate synthetic plot specifications with `rows` rows of data.
+
+    Dot and line plots of millions of rows can't be rendered in a reasonable
+    time by node: for big datasets, use `--stages parse,serialize,encode` to only
+    run the Python stages.
+
+    Parameters
+    ----------
+    rows : int
+        number of data rows.
+    seed : int, optional
+        random generator seed, by default 0
+
+    Returns
+    -------
+    dict
+        dict of plot specifications.
+    """
+    rng = np.random.default_rng(seed)
+    df = pl.DataFrame(
+        {
+            "t": np.arange(rows),
+            "x": rng.normal(size=rows),
+            "y": rng.normal(size=rows).cumsum(),
+            "group": rng.choice(["a", "b", "c", "d", "e"], size=rows),
+        }
+    )
+    return {
+        f"synthetic_dot_{rows}": Plot.dot(
+            df, {"x": "x", "y": "y", "fill": "group", "r": 1}
+        ),
+        f"synthetic_line_{rows}": Plot.lineY(
+            df, {"x": "t", "y": "y", "stroke": "group"}
+        ),
+        f"synthetic_bin_{rows}": Plot.rectY(
+            df, Plot.binX({"y": "count"}, {"x": "x", "fill": "group"})
+        ),
+    }
+
+
+def render_once(
+    creator: ObsplotJsdomCreator | None,
+    spec: dict,
+    *,
+    theme: str,
+    default: dict,
+    stages: list[str],
+) -> tuple[dict, dict]:
+    """
+    Render a plot specification once and time each stage.
+
+    Returns
+    -------
+    tuple[dict, dict]
+        stage times in seconds, and sizes in bytes of data, request and outputs.
+    """
+    times = {}
+    sizes = {}
+    # Stages needed by the requested ones are also run
+    last = max(STAGES.index(stage) for stage in stages)
+
+    start = time.perf_counter()
+    parser = SpecParser(renderer="jsdom", default=default)
+    parser.set_spec(dict(spec), force_figure="figure" not in spec)
+    code = parser.parse_spec()
+    times["parse"] = time.perf_counter() - start
+
+    if last < STAGES.index("serialize"):
+        return filter_times(times, stages), sizes
+    start = time.perf_counter()
+    data = parser.serialize_data()
+    times["serialize"] = time.perf_counter() - start
+    sizes["data"] = sum(
+        len(d["value"]) for d in data if isinstance(d, dict) and "value" in d
+    )
+
+    if last < STAGES.index("encode"):
+        return filter_times(times, stages), sizes
+    start = time.perf_counter()
+    body = encode_request(code, data, theme)
+    times["encode"] = time.perf_counter() - start
+    sizes["request"] = len(body)
+
+    if creator is None or last < STAGES.index("http"):
+        return filter_times(times, stages), sizes
+    start = time.perf_counter()
+    r = requests.post(f"{creator.url}/plot", data=body, timeout=600)
+    elapsed = time.perf_counter() - start
+    if r.status_code != 200:  # noqa: PLR2004
+        raise RuntimeError(r.content.decode())
+    out = r.content.decode()
+    if out.startswith("<pre"):
+        raise RuntimeError(out)
+    timing = SERVER_TIMING_RE.search(r.headers.get("Server-Timing", ""))
+    if timing is not None:
+        times["node"] = float(timing.group(1)) / 1000
+        times["http"] = max(elapsed - times["node"], 0.0)
+    else:
+        times["node"] = elapsed
+    sizes["html"] = len(r.content)
+
+    # typst conversion needs a figure and can't use the 'current' theme
+    if not HAS_TYPST or not out.startswith("<figure") or theme == "current":
+        return filter_times(times, stages), sizes
+    for fmt in TYPST_FORMATS:
+        if fmt not in stages:
+            continue
+        start = time.perf_counter()
+        res = creator.typst_compile(out, fmt, {})
+        times[fmt] = time.perf_counter() - start
+        sizes[fmt] = len(res)
+
+    return filter_times(times, stages), sizes
+
+
+def filter_times(times: dict, stages: list[str]) -> dict:
+    """
+    Only keep the times of the requested stages.
+    """
+    return {stage: t for stage, t in times.items() if stage in stages}
+
+
+def encode_request(code: dict, data: list, theme: str) -> bytes:
+    """
+    Encode a jsdom server request body.
+    """
+    return json.dumps(
+        {"spec": {"data": data, "code": code, "debug": False}, "theme": theme}
+    ).encode()
+
+
+def dump_requests(specs: dict, *, themes: dict, defaults: dict, path: Path) -> None:
+    """
+    Write the jsdom server request body of each specification to a JSON file.
+
+    These files are used by the JavaScript benchmark in
+    `packages/pyobsplot-js/bench`.
+    """
+    path.mkdir(parents=True, exist_ok=True)
+    for name, spec in specs.items():
+        parser = SpecParser(renderer="jsdom", default=defaults.get(name, {}))
+        parser.set_spec(dict(spec), force_figure="figure" not in spec)
+        code = parser.parse_spec()
+        body = encode_request(
+            code, parser.serialize_data(), themes.get(name, DEFAULT_THEME)
+        )
+        (path / f"{name}.json").write_bytes(body)
+    logger.info(f"{len(specs)} requests written to {path}")
+
+
+def bench_render(
+    specs: dict,
+    *,
+    themes: dict,
+    defaults: dict,
+    repeat: int,
+    warmup: int,
+    stages: list[str],
+) -> dict:
+    """
+    Run the rendering benchmark.
+
+    Parameters
+    ----------
+    specs : dict
+        plot specifications to render.
+    themes : dict
+        themes of some of the specifications.
+    defaults : dict
+        default spec values of some of the specifications.
+    repeat : int
+        number of timed renderings of each specification.
+    warmup : int
+        number of untimed renderings of each specification.
+    stages : list[str]
+        stages to run.
+
+    Returns
+    -------
+    dict
+        dict of results by spec name, with "stages" summaries (in seconds) and
+        "bytes" sizes.
+    """
+    creator = None
+    if {"http", "node", *TYPST_FORMATS} & set(stages):
+        creator = ObsplotJsdomCreator()
+        creator.start_server()
+    results = {}
+    try:
+        for name, spec in specs.items():
+            theme = themes.get(name, DEFAULT_THEME)
+            default = defaults.get(name, {})
+            runs = []
+            try:
+                for _ in range(warmup):
+                    render_once(
+                        creator, spec, theme=theme, default=default, stages=stages
+                    )
+                for _ in range(repeat):
+                    runs.append(
+                        render_once(
+                            creator, spec, theme=theme, default=default, stages=stages
+                        )
+                    )
+            except Exception as e:
+                logger.error(f"{name}: {str(e).strip()}")
+                continue
+            results[name] = {
+                "stages": {
+                    stage: summarize([times[stage] for times, _ in runs])
+                    for stage in STAGES
+                    if stage in runs[0][0]
+                },
+                "bytes": runs[-1][1],
+            }
+            log_result(name, results[name])
+    finally:
+        if creator is not None:
+            creator.close()
+    return results
+
+
+def log_result(name: str, result: dict) -> None:
+    """
+    Log the results of one specification.
+    """
+    stages = "  ".join(
+        f"{stage} {res['p50'] * 1000:.1f}ms (p90 {res['p90'] * 1000:.1f})"
+        for stage, res in result["stages"].items()
+    )
+    sizes = "  ".join(f"{k} {v}" for k, v in result["bytes"].items())
+    logger.info(f"{name}: {stages}")
+    if sizes:
+        logger.info(f"{' ' * len(name)}  bytes: {sizes}")
+
+
+def compare(
+    baseline: dict, results: dict, *, threshold: float, min_time: float
+) -> list[str]:
+    """
+    Compare results to a baseline.
+
+    Parameters
+    ----------
+    baseline : dict
+        baseline results, as saved with `--save`.
+    results : dict
+        current results.
+    threshold : float
+        maximum relative slowdown of a stage median time.
+    min_time : float
+        stages whose baseline median time is below this value, in seconds, are
+        not compared, as they are too noisy.
+
+    Returns
+    -------
+    list[str]
+        list of regression messages.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for stage, res in result["stages"].items():
+            base = baseline[name]["stages"].get(stage)
+            if base is None or base["p50"] < min_time:
+                continue
+            ratio = res["p50"] / base["p50"]
+            if ratio > 1 + threshold:
+                regressions.append(
+                    f"{name} {stage}: {res['p50'] * 1000:.1f}ms vs "
+                    f"{base['p50'] * 1000:.1f}ms ({(ratio - 1) * 100:+.0f}%)"
+                )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="End-to-end benchmark of jsdom plot rendering."
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="number of timed runs of each spec"
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=1, help="number of untimed runs of each spec"
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        action="append",
+        default=[],
+        help="add synthetic specs with this number of rows",
+    )
+    parser.add_argument(
+        "--no-reference",
+        action="store_true",
+        help="don't run the jsdom reference specs",
+    )
+    parser.add_argument(
+        "--only", action="append", help="only run this spec, can be repeated"
+    )
+    parser.add_argument(
+        "--stages",
+        default=",".join(STAGES),
+        help=(
+            "comma separated list of stages to report, the stages they depend on "
+            f"are also run (default: {','.join(STAGES)})"
+        ),
+    )
+    parser.add_argument("--save", help="save results to this JSON file")
+    parser.add_argument(
+        "--dump",
+        help=(
+            "write jsdom server requests to this directory instead of running "
+            "the benchmark"
+        ),
+    )
+    parser.add_argument("--baseline", help="compare results to this JSON file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="maximum relative slowdown (default: 0.2)",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.005,
+        help=(
+            "don't compare stages faster than this time in seconds in the baseline "
+            "(default: 0.005)"
+        ),
+    )
+    args = parser.parse_args()
+
+    stages = args.stages.split(",")
+    if unknown := set(stages) - set(STAGES):
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    specs = {}
+    themes = {}
+    defaults = {}
+    if not args.no_reference:
+        manifest = load_manifest(REFERENCE_DIR)
+        specs, themes, defaults = (
+            manifest["specs"],
+            manifest["themes"],
+            manifest["defaults"],
+        )
+    for rows in args.rows:
+        specs.update(synthetic_specs(rows))
+    if args.only:
+        specs = {name: spec for name, spec in specs.items() if name in args.only}
+
+    if args.dump:
+        dump_requests(specs, themes=themes, defaults=defaults, path=Path(args.dump))
+        sys.exit(0)
+
+    results = bench_render(
+        specs,
+        themes=themes,
+        defaults=defaults,
+        repeat=args.repeat,
+        warmup=args.warmup,
+        stages=stages,
+    )
+
+    if args.save:
+        out = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "pyobsplot": version("pyobsplot"),
+                "repeat": args.repeat,
+            },
+            "results": results,
+        }
+        with open(args.save, "w") as f:
+            json.dump(out, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(
+            baseline, results, threshold=args.threshold, min_time=args.min_time
+        )
+        for msg in regressions:
+            logger.error(f"Regression: {msg}")
+        if regressions:
+            sys.exit(1)
+        logger.info(
+            f"No regression above {args.threshold:.0%} compared to {args.baseline}."
+        )
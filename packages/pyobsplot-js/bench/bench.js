@@ -0,0 +1,227 @@
+/* jsdom rendering micro-benchmarks */
+
+// Usage:
+//
+//   uv run python benchmarks/bench_render.py --dump packages/pyobsplot-js/bench/specs
+//   npm run bench -- --repeat 20 --json results.json
+//   npm run bench -- --repeat 20 --baseline results.json
+//
+// Each JSON file in the specs directory is a jsdom server request body, as
+// dumped by `benchmarks/bench_render.py`. Rendering is split into stages which
+// are timed separately:
+//
+// - json: request body parsing
+// - unserialize: data unserialization (base64 decoding, LZ4 decompression and
+//   Arrow IPC reading)
+// - parse: specification parsing
+// - plot: Plot.plot() call
+// - theme: theming of the generated element
+// - serialize: outerHTML serialization
+
+import * as Plot from "@observablehq/plot"
+import * as d3 from "d3"
+
+import * as fs from "node:fs"
+import * as path from "node:path"
+import { createRequire } from "node:module"
+import { performance } from "node:perf_hooks"
+import { fileURLToPath } from "node:url"
+import { parseArgs } from "node:util"
+import { JSDOM } from "jsdom"
+import { parse_spec, unserialize_data } from "../parsing.js"
+import { plot_spec } from "../plot.js"
+import { apply_theme } from "../theme.js"
+
+// Create and initialize jsdom, as in main.js
+const jsdom = new JSDOM("")
+global.window = jsdom.window
+global.document = jsdom.window.document
+global.Event = jsdom.window.Event
+global.Node = jsdom.window.Node
+global.NodeList = jsdom.window.NodeList
+global.HTMLCollection = jsdom.window.HTMLCollection
+global.d3 = d3
+global.Plot = Plot
+
+const STAGES = ["json", "unserialize", "parse", "plot", "theme", "serialize"]
+
+// Render a request body once and time each stage, in milliseconds
+function render_once(body) {
+    const times = {}
+    let start = performance.now()
+    const request = JSON.parse(body)
+    const spec = request["spec"]
+    times["json"] = performance.now() - start
+
+    start = performance.now()
+    const data = unserialize_data(spec["data"], "jsdom")
+    times["unserialize"] = performance.now() - start
+
+    start = performance.now()
+    const out = parse_spec(spec["code"], data)
+    times["parse"] = performance.now() - start
+
+    start = performance.now()
+    const el = plot_spec(out, spec, "jsdom")
+    times["plot"] = performance.now() - start
+
+    start = performance.now()
+    apply_theme(el, request["theme"])
+    times["theme"] = performance.now() - start
+
+    start = performance.now()
+    const html = el.outerHTML
+    times["serialize"] = performance.now() - start
+
+    return { times: times, bytes: { request: body.length, html: html.length } }
+}
+
+// Percentile of an array of values, with linear interpolation
+function percentile(values, q) {
+    const sorted = [...values].sort((a, b) => a - b)
+    const pos = ((sorted.length - 1) * q) / 100
+    const low = Math.floor(pos)
+    const high = Math.min(low + 1, sorted.length - 1)
+    return sorted[low] + (sorted[high] - sorted[low]) * (pos - low)
+}
+
+// Summary statistics of an array of times
+function summarize(times) {
+    return {
+        min: Math.min(...times),
+        p50: percentile(times, 50),
+        p90: percentile(times, 90),
+        p99: percentile(times, 99),
+        max: Math.max(...times),
+        runs: times.length,
+    }
+}
+
+// Run the benchmark on all the request files of a directory
+function bench(dir, { repeat, warmup, only }) {
+    const results = {}
+    const files = fs
+        .readdirSync(dir)
+        .filter((f) => f.endsWith(".json"))
+        .sort()
+    for (const file of files) {
+        const name = path.basename(file, ".json")
+        if (only && !only.includes(name)) {
+            continue
+        }
+        const body = fs.readFileSync(path.join(dir, file), "utf8")
+        const runs = []
+        try {
+            for (let i = 0; i < warmup; i++) {
+                render_once(body)
+            }
+            for (let i = 0; i < repeat; i++) {
+                runs.push(render_once(body))
+            }
+        } catch (error) {
+            console.error(`${name}: ${error}`)
+            continue
+        }
+        const stages = {}
+        for (const stage of STAGES) {
+            stages[stage] = summarize(runs.map((r) => r.times[stage]))
+        }
+        results[name] = { stages: stages, bytes: runs[runs.length - 1].bytes }
+        const summary = STAGES.map(
+            (s) => `${s} ${stages[s].p50.toFixed(1)}ms (p90 ${stages[s].p90.toFixed(1)})`
+        ).join("  ")
+        console.log(`${name}: ${summary}`)
+    }
+    return results
+}
+
+// Compare results to a baseline, returns a list of regression messages
+function compare(baseline, results, { threshold, min_time }) {
+    const regressions = []
+    for (const [name, result] of Object.entries(results)) {
+        if (!(name in baseline)) {
+            continue
+        }
+        for (const [stage, res] of Object.entries(result.stages)) {
+            const base = baseline[name].stages[stage]
+            if (base === undefined || base.p50 < min_time) {
+                continue
+            }
+            const ratio = res.p50 / base.p50
+            if (ratio > 1 + threshold) {
+                const pct = ((ratio - 1) * 100).toFixed(0)
+                regressions.push(
+                    `${name} ${stage}: ${res.p50.toFixed(1)}ms vs ${base.p50.toFixed(1)}ms (+${pct}%)`
+                )
+            }
+        }
+    }
+    return regressions
+}
+
+// Version of an installed package, if available
+function package_version(name) {
+    const require = createRequire(import.meta.url)
+    try {
+        const main = require.resolve(name)
+        let dir = path.dirname(main)
+        while (!fs.existsSync(path.join(dir, "package.json"))) {
+            dir = path.dirname(dir)
+        }
+        return JSON.parse(fs.readFileSync(path.join(dir, "package.json"), "utf8")).version
+    } catch {
+        return null
+    }
+}
+
+const bench_dir = path.dirname(fileURLToPath(import.meta.url))
+const { values: args } = parseArgs({
+    options: {
+        specs: { type: "string", default: path.join(bench_dir, "specs") },
+        repeat: { type: "string", default: "10" },
+        warmup: { type: "string", default: "2" },
+        only: { type: "string", multiple: true },
+        json: { type: "string" },
+        baseline: { type: "string" },
+        threshold: { type: "string", default: "0.2" },
+        "min-time": { type: "string", default: "1" },
+    },
+})
+
+if (!fs.existsSync(args.specs)) {
+    console.error(
+        `No specs directory found at ${args.specs}. Generate it with:\n` +
+            `uv run python benchmarks/bench_render.py --dump ${args.specs}`
+    )
+    process.exit(1)
+}
+
+const results = bench(args.specs, {
+    repeat: parseInt(args.repeat),
+    warmup: parseInt(args.warmup),
+    only: args.only,
+})
+
+if (args.json) {
+    const meta = { node: process.version, repeat: parseInt(args.repeat) }
+    for (const name of ["@observablehq/plot", "d3", "apache-arrow", "jsdom", "lz4js"]) {
+        meta[name] = package_version(name)
+    }
+    fs.writeFileSync(args.json, JSON.stringify({ meta: meta, results: results }, null, 2))
+}
+
+if (args.baseline) {
+    const baseline = JSON.parse(fs.readFileSync(args.baseline, "utf8")).results
+    const threshold = parseFloat(args.threshold)
+    const regressions = compare(baseline, results, {
+        threshold: threshold,
+        min_time: parseFloat(args["min-time"]),
+    })
+    for (const msg of regressions) {
+        console.error(`Regression: ${msg}`)
+    }
+    if (regressions.length > 0) {
+        process.exit(1)
+    }
+    console.log(`No regression above ${threshold * 100}% compared to ${args.baseline}.`)
+}
@@ -8,6 +8,7 @@ import * as d3 from "d3"
 import * as http from "node:http"
 import { JSDOM } from "jsdom"
 import { generate_plot } from "./plot.js"
+import { apply_theme } from "./theme.js"
 
 // Create and initialize jsdom
 const jsdom = new JSDOM("")
@@ -25,67 +26,7 @@ global.Plot = Plot
 function jsdom_plot(request) {
     request = JSON.parse(request)
     let el = generate_plot(request["spec"], "jsdom")
-
-    // foreground color
-    const bg = { light: "#FFFFFF", dark: "#000000", current: "transparent" }
-    // background color
-    const fg = { light: "#000000", dark: "#FFFFFF", current: "currentColor" }
-    // caption color
-    const caption = {
-        light: "#777777",
-        dark: "#888888",
-        current: "currentColor",
-    }
-    const theme = request["theme"]
-
-    for (const svg of el.tagName.toLowerCase() === "svg"
-        ? [el]
-        : el.querySelectorAll("svg")) {
-        svg.setAttributeNS(
-            "http://www.w3.org/2000/xmlns/",
-            "xmlns",
-            "http://www.w3.org/2000/svg"
-        )
-        svg.setAttributeNS(
-            "http://www.w3.org/2000/xmlns/",
-            "xmlns:xlink",
-            "http://www.w3.org/1999/xlink"
-        )
-        // theming
-        svg.style.color ||= fg[theme]
-        svg.style.backgroundColor ||= bg[theme]
-    }
-    for (const figure of el.tagName.toLowerCase() === "figure"
-        ? [el]
-        : el.querySelectorAll("figure")) {
-        figure.style.padding ||= "0px 5px 5px 5px"
-        // theming
-        figure.style.color ||= fg[theme]
-        figure.style.backgroundColor ||= bg[theme]
-        // pass colors to typst via attributes
-        figure.setAttribute("typstbg", bg[theme])
-        figure.setAttribute("typstfg", fg[theme])
-        figure.setAttribute("typstcaption", caption[theme])
-        for (const h2 of figure.querySelectorAll("h2")) {
-            h2.style.lineHeight = "28px"
-            h2.style.fontSize = "20px"
-            h2.style.fontWeight = "600"
-            h2.style.margin = "0"
-        }
-        for (const h3 of figure.querySelectorAll("h3")) {
-            h3.style.lineHeight = "24px"
-            h3.style.fontSize = "16px"
-            h3.style.fontWeight = "400"
-            h3.style.margin = "0"
-        }
-        for (const figcaption of figure.querySelectorAll("figcaption")) {
-            figcaption.style.lineHeight = "20px"
-            figcaption.style.fontSize = "12px"
-            figcaption.style.fontWeight = "500"
-            figcaption.style.color = caption[theme]
-        }
-    }
-
+    apply_theme(el, request["theme"])
     return el.outerHTML
 }
 
@@ -102,6 +43,7 @@ const requestListener = function (req, res) {
             })
             req.on("end", () => {
                 let output
+                const start = performance.now()
                 try {
                     output = jsdom_plot(body)
                 } catch (error) {
@@ -109,6 +51,9 @@ const requestListener = function (req, res) {
                     res.end(`Server error: ${error.message}.`)
                     return
                 }
+                // Report rendering time, used by benchmarks
+                const duration = performance.now() - start
+                res.setHeader("Server-Timing", `render;dur=${duration.toFixed(3)}`)
                 res.writeHead(200)
                 res.end(output)
             })
@@ -11,16 +11,7 @@ export function generate_plot(spec, renderer) {
         // Parse specification
         spec["data"] = unserialize_data(spec["data"], renderer)
         out = parse_spec(spec["code"], spec["data"])
-        if (spec["code"]["pyobsplot-type"] == "function") {
-            // If spec root is a JS function, call plot() on it.
-            // This is to handle the specifications with mark function call.
-            out = out.plot()
-        } else {
-            if (spec["debug"]) {
-                debug_output(out, renderer)
-            }
-            out = Plot.plot(out)
-        }
+        out = plot_spec(out, spec, renderer)
     } catch (error) {
         if (renderer == "widget") {
             console.error(error)
@@ -34,6 +25,19 @@ export function generate_plot(spec, renderer) {
     return out
 }
 
+// Generate plot from a parsed specification
+export function plot_spec(parsed, spec, renderer) {
+    if (spec["code"]["pyobsplot-type"] == "function") {
+        // If spec root is a JS function, call plot() on it.
+        // This is to handle the specifications with mark function call.
+        return parsed.plot()
+    }
+    if (spec["debug"]) {
+        debug_output(parsed, renderer)
+    }
+    return Plot.plot(parsed)
+}
+
 // Output plot specification if debug is true
 function debug_output(out, renderer) {
     if (renderer == "widget") {
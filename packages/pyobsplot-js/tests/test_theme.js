@@ -0,0 +1,37 @@
+/* Tests theming */
+
+import * as assert from "assert"
+
+import { apply_theme } from "../theme.js"
+
+describe("apply_theme", function () {
+    it("should set svg colors and namespaces", function () {
+        const svg = document.createElementNS("http://www.w3.org/2000/svg", "svg")
+        apply_theme(svg, "dark")
+        assert.equal(svg.getAttribute("xmlns"), "http://www.w3.org/2000/svg")
+        assert.notEqual(svg.style.color, "")
+        assert.notEqual(svg.style.backgroundColor, "")
+    })
+    it("should set figure colors and typst attributes", function () {
+        const figure = document.createElement("figure")
+        figure.appendChild(document.createElement("h2"))
+        figure.appendChild(
+            document.createElementNS("http://www.w3.org/2000/svg", "svg")
+        )
+        apply_theme(figure, "light")
+        assert.equal(figure.getAttribute("typstbg"), "#FFFFFF")
+        assert.equal(figure.getAttribute("typstfg"), "#000000")
+        assert.equal(figure.getAttribute("typstcaption"), "#777777")
+        assert.equal(figure.querySelector("h2").style.fontSize, "20px")
+        assert.equal(
+            figure.querySelector("svg").getAttribute("xmlns"),
+            "http://www.w3.org/2000/svg"
+        )
+    })
+    it("should not override existing colors", function () {
+        const svg = document.createElementNS("http://www.w3.org/2000/svg", "svg")
+        svg.style.color = "red"
+        apply_theme(svg, "dark")
+        assert.equal(svg.style.color, "red")
+    })
+})
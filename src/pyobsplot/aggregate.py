@@ -0,0 +1,552 @@
+"""
+Python-side aggregation of bin, group, hexbin and density transforms.
+
+Marks such as `Plot.rectY(df, Plot.binX({"y": "count"}, {"x": "value"}))` are
+rewritten so that the DataFrame is aggregated with polars, and only one row per
+bin or group is sent to Plot. The rewritten mark still applies the same transform,
+with explicit thresholds for bins, so that its outputs (bin bounds, insets,
+sorting...) are the same as with the raw data.
+
+Hexbin transforms and density marks are computed by Plot in screen coordinates,
+which are not known in Python. Their points are snapped to a fine grid in data
+coordinates, and only one row per grid point is sent to Plot, with the number of
+points as weight. This is only done when their x and y scales are linear.
+"""
+
+from __future__ import annotations
+
+import math
+from itertools import pairwise
+from typing import TYPE_CHECKING, Any
+
+from pyobsplot.data import is_instance
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    import polars as pl
+
+# Transforms that can be computed in Python, with their binned or grouped channels
+AGGREGATE_TRANSFORMS = {
+    "binX": ("x",),
+    "binY": ("y",),
+    "bin": ("x", "y"),
+    "groupX": ("x",),
+    "groupY": ("y",),
+    "group": ("x", "y"),
+}
+AGGREGATE_REDUCERS = ["count", "sum", "mean", "min", "max", "median"]
+# Reducers applied by Plot to the aggregated data, which has one row per bin or group
+REAGGREGATE_REDUCERS = {
+    "count": "sum",
+    "sum": "sum",
+    "mean": "mean",
+    "min": "min",
+    "max": "max",
+    "median": "median",
+}
+# Channels whose first column defines subgroups inside bins or groups
+SUBGROUP_CHANNELS = ("z", "fill", "stroke")
+FACET_CHANNELS = ("fx", "fy")
+# Options changing how bins or groups are computed
+UNSUPPORTED_OPTIONS = {"interval", "domain", "cumulative", "filter", "reduce"}
+UNSUPPORTED_OUTPUTS = {"data", "filter", "sort", "reverse", "interval"}
+# Maximum number of bins computed by Plot "auto" thresholds
+MAX_AUTO_THRESHOLDS = 200
+# Number of grid points along each axis used to aggregate density and hexbin
+# marks data. Hexagons and density bandwidth are 20 pixels wide by default.
+GRID_SIZE = 1000
+# Scale types for which screen coordinates are linear in data coordinates
+LINEAR_SCALE_TYPES = {None, "linear", "time", "utc"}
+
+
+def tick_increment(start: float, stop: float, count: float) -> float:
+    """
+    Step between nice ticks, as d3.tickIncrement. A negative value -k means a
+    step of 1/k.
+    """
+    step = (stop - start) / max(0, count)
+    power = math.floor(math.log10(step))
+    error = step / 10**power
+    if error >= math.sqrt(50):
+        factor = 10
+    elif error >= math.sqrt(10):
+        factor = 5
+    elif error >= math.sqrt(2):
+        factor = 2
+    else:
+        factor = 1
+    if power < 0:
+        return -(10**-power) / factor
+    return factor * 10**power
+
+
+def js_round(x: float) -> int:
+    """
+    Round half up, as JavaScript Math.round.
+    """
+    return math.floor(x + 0.5)
+
+
+def nice_thresholds(vmin: float, vmax: float, count: int) -> list[float] | None:
+    """
+    Bin thresholds computed by Plot from a number of bins, with a last threshold
+    strictly greater than the maximum value. Returns None if values are constant.
+    """
+    if vmin == vmax:
+        return None
+    step = tick_increment(vmin, vmax, count)
+    if step > 0:
+        r0, r1 = js_round(vmin / step), js_round(vmax / step)
+        if not r0 * step <= vmin:
+            r0 -= 1
+        if not r1 * step > vmax:
+            r1 += 1
+        return [(r0 + i) * step for i in range(r1 - r0 + 1)]
+    step = -step
+    r0, r1 = js_round(vmin * step), js_round(vmax * step)
+    if not r0 / step <= vmin:
+        r0 -= 1
+    if not r1 / step > vmax:
+        r1 += 1
+    return [(r0 + i) / step for i in range(r1 - r0 + 1)]
+
+
+def bin_thresholds(values: pl.Series, thresholds: Any) -> list[float] | None:
+    """
+    Compute bin thresholds as Plot does for a `thresholds` option value. Returns
+    None if thresholds can't be computed in Python, or if values are not all
+    finite.
+
+    Parameters
+    ----------
+    values : pl.Series
+        binned values, without null or NaN values.
+    thresholds : Any
+        `thresholds` bin option: None, "auto", "scott", "sturges", a number of bins
+        or a list of thresholds.
+
+    Returns
+    -------
+    list[float] | None
+        bin thresholds.
+    """
+    n = len(values)
+    if n == 0:
+        return None
+    vmin, vmax = float(values.min()), float(values.max())  # type: ignore
+    # Infinite values are left to Plot
+    if not math.isfinite(vmin) or not math.isfinite(vmax):
+        return None
+    if isinstance(thresholds, list | tuple):
+        return sorted(thresholds) if len(thresholds) > 1 else None
+    if thresholds is None or thresholds in ("auto", "scott"):
+        deviation = values.std(ddof=1) if n > 1 else None
+        if deviation:
+            count = math.ceil((vmax - vmin) * n ** (1 / 3) / (3.49 * deviation))  # type: ignore
+        else:
+            count = 1
+        if thresholds != "scott":
+            count = min(MAX_AUTO_THRESHOLDS, count)
+    elif thresholds == "sturges":
+        count = max(1, math.ceil(math.log2(n)) + 1)
+    elif isinstance(thresholds, int | float) and not isinstance(thresholds, bool):
+        count = thresholds
+    else:
+        return None
+    return nice_thresholds(vmin, vmax, count)
+
+
+def column(df: pl.DataFrame, value: Any) -> str | None:
+    """
+    Returns value if it is the name of a DataFrame column, None otherwise.
+    """
+    if isinstance(value, str) and value in df.columns:
+        return value
+    return None
+
+
+def is_linear_scale(scales: dict | None, name: str) -> bool:
+    """
+    Returns True if the type of the scale name, given by top-level scale options,
+    is linear or not specified.
+    """
+    options = (scales or {}).get(name)
+    if not isinstance(options, dict):
+        return True
+    scale_type = options.get("type")
+    if isinstance(scale_type, str):
+        scale_type = scale_type.lower()
+    return isinstance(scale_type, str | None) and scale_type in LINEAR_SCALE_TYPES
+
+
+def is_transform(spec: Any, methods: Iterable[str]) -> bool:
+    return (
+        isinstance(spec, dict)
+        and spec.get("pyobsplot-type") == "function"
+        and spec.get("module") == "Plot"
+        and spec.get("method") in methods
+    )
+
+
+def drop_missing(df: pl.DataFrame, columns: list[str]) -> pl.DataFrame:
+    """
+    Remove rows with null or NaN values in some columns.
+    """
+    import polars as pl  # noqa: PLC0415
+
+    for col in columns:
+        df = df.filter(pl.col(col).is_not_null())
+        if df.schema[col].is_float():
+            df = df.filter(pl.col(col).is_not_nan())
+    return df
+
+
+def grouping_channels(
+    df: pl.DataFrame, options: dict, *, outputs: dict, used: set
+) -> tuple[dict, dict] | None:
+    """
+    Subgroup (z, fill or stroke) and facet (fx and fy) column channels of a mark, as
+    dicts of channel names and column names.
+
+    Returns None if subgroup channels have different columns, or if the mark
+    options have other column channels than the subgroup, facet and `used` ones.
+    """
+    subgroups = {
+        name: column(df, options.get(name))
+        for name in SUBGROUP_CHANNELS
+        if name not in outputs and column(df, options.get(name)) is not None
+    }
+    if len(set(subgroups.values())) > 1:
+        return None
+    facets = {
+        name: column(df, options[name])
+        for name in FACET_CHANNELS
+        if column(df, options.get(name))
+    }
+    if not set(facets).isdisjoint(outputs):
+        return None
+    # Any other column channel is not supported
+    used = {*used, *subgroups, *facets}
+    if any(
+        column(df, value) is not None
+        for name, value in options.items()
+        if name not in used
+    ):
+        return None
+    return subgroups, facets
+
+
+def grouping_exprs(subgroups: dict, facets: dict, options: dict) -> list[pl.Expr]:
+    """
+    Group by expressions of subgroup and facet channels. Channel options are
+    updated to point to the aggregated DataFrame columns.
+    """
+    import polars as pl  # noqa: PLC0415
+
+    exprs = []
+    # Subgroup channels all have the same column, which is only kept once
+    if subgroups:
+        first, col = next(iter(subgroups.items()))
+        exprs.append(pl.col(col).alias(first))
+        options.update(dict.fromkeys(subgroups, first))
+    for name, col in facets.items():
+        exprs.append(pl.col(col).alias(name))
+        options[name] = name
+    return exprs
+
+
+def grid_exprs(
+    df: pl.DataFrame, columns: dict[str, str]
+) -> tuple[list[pl.Expr], list[pl.Expr]] | None:
+    """
+    Expressions snapping the values of numeric columns to a regular grid of
+    GRID_SIZE points between their minimum and maximum, so that the extent of the
+    snapped values is the same as the original one.
+
+    Parameters
+    ----------
+    df : pl.DataFrame
+        data, without missing values in columns.
+    columns : dict[str, str]
+        names of the snapped columns by channel name.
+
+    Returns
+    -------
+    tuple[list[pl.Expr], list[pl.Expr]] | None
+        grid index expressions, to group by, and expressions computing the
+        snapped values from the grid indices after grouping. None if some columns
+        are not numeric or have infinite values, or if data is empty.
+    """
+    import polars as pl  # noqa: PLC0415
+
+    if df.height == 0:
+        return None
+    index_exprs = []
+    value_exprs = []
+    for name, col in columns.items():
+        if not df.schema[col].is_numeric():
+            return None
+        vmin, vmax = df.get_column(col).min(), df.get_column(col).max()
+        if not math.isfinite(vmin) or not math.isfinite(vmax):  # type: ignore
+            return None
+        step = (vmax - vmin) / (GRID_SIZE - 1) or 1  # type: ignore
+        index_exprs.append(
+            ((pl.col(col) - vmin) / step).round().cast(pl.Int64).alias(name)
+        )
+        value_exprs.append((vmin + pl.col(name) * step).alias(name))  # type: ignore
+    return index_exprs, value_exprs
+
+
+def mark_data(spec: dict) -> tuple[pl.DataFrame, Any] | None:
+    """
+    Returns the data, as a polars DataFrame, and the options of a mark with two
+    arguments whose first one is a DataFrame.
+    """
+    import polars as pl  # noqa: PLC0415
+
+    args = spec.get("args", ())
+    if len(args) != 2:  # noqa: PLR2004
+        return None
+    df, options = args
+    if is_instance(df, "pandas", "DataFrame"):
+        return pl.from_pandas(df), options
+    if is_instance(df, "polars", "DataFrame"):
+        return df, options
+    return None
+
+
+def transform_args(transform: dict) -> tuple[dict, dict] | None:
+    """
+    Returns the outputs and options arguments of a transform.
+    """
+    targs = transform.get("args", ())
+    if not 1 <= len(targs) <= 2 or not all(isinstance(a, dict) for a in targs):  # noqa: PLR2004
+        return None
+    return targs[0], dict(targs[1]) if len(targs) == 2 else {}  # noqa: PLR2004
+
+
+def aggregate_mark(spec: dict, scales: dict | None = None) -> dict | None:
+    """
+    Compute the transform of a mark in Python.
+
+    The mark must be a Plot mark function called with a DataFrame and plain column
+    channels, and either:
+
+    - a bin or group transform (binX, binY, bin, groupX, groupY or group) using
+      count, sum, mean, min, max or median reducers. The DataFrame is aggregated
+      by bin or group.
+    - a hexbin transform using count or sum reducers, or a density mark. As they
+      are computed by Plot in screen coordinates, points are snapped to a fine
+      grid and aggregated by grid point, and Plot computes the hexbin or density
+      with the number of points by grid point as weight.
+
+    Parameters
+    ----------
+    spec : dict
+        mark specification, such as `Plot.rectY(df, Plot.binX(...))`.
+    scales : dict, optional
+        top-level scale options of the plot, by scale name. Hexbin and density
+        marks are not aggregated if their x or y scale is not linear, by default
+        None
+
+    Returns
+    -------
+    dict | None
+        mark specification on the aggregated DataFrame, or None if the mark
+        transform can't be computed in Python.
+    """
+    data = mark_data(spec)
+    if data is None:
+        return None
+    df, options = data
+    linear = is_linear_scale(scales, "x") and is_linear_scale(scales, "y")
+    if spec.get("method") == "density" and isinstance(options, dict):
+        return aggregate_density(spec, df, dict(options)) if linear else None
+    if is_transform(options, ["hexbin"]):
+        return aggregate_hexbin(spec, df, options) if linear else None
+    if is_transform(options, AGGREGATE_TRANSFORMS):
+        return aggregate_bin_group(spec, df, options)
+    return None
+
+
+def aggregate_density(spec: dict, df: pl.DataFrame, options: dict) -> dict | None:
+    """
+    Snap the points of a density mark to a grid, with the number of points (or
+    the sum of their weights) by grid point as weight.
+    """
+    import polars as pl  # noqa: PLC0415
+
+    xy = {key: column(df, options.get(key)) for key in ("x", "y")}
+    if any(col is None for col in xy.values()):
+        return None
+    weight = column(df, options.get("weight"))
+    if "weight" in options and weight is None:
+        return None
+    channels = grouping_channels(df, options, outputs={}, used={"x", "y", "weight"})
+    if channels is None:
+        return None
+    df = drop_missing(df, list(xy.values()))
+    grid = grid_exprs(df, xy)
+    if grid is None:
+        return None
+    index_exprs, value_exprs = grid
+    new_options = {k: v for k, v in options.items() if k not in {"x", "y", "weight"}}
+    group_by = [*index_exprs, *grouping_exprs(*channels, new_options)]
+    agg = pl.col(weight).sum() if weight is not None else pl.len()
+    res = df.group_by(group_by, maintain_order=True).agg(agg.alias("weight"))
+    if res.height >= df.height:
+        return None
+    res = res.with_columns(value_exprs)
+    new_options.update({"x": "x", "y": "y", "weight": "weight"})
+    return {**spec, "args": [res, new_options]}
+
+
+def aggregate_hexbin(spec: dict, df: pl.DataFrame, transform: dict) -> dict | None:
+    """
+    Snap the points of a hexbin transform to a grid, with count or sum outputs
+    computed by grid point, and summed by Plot by hexagon.
+    """
+    import polars as pl  # noqa: PLC0415
+
+    targs = transform_args(transform)
+    if targs is None:
+        return None
+    outputs, options = targs
+    if (
+        not outputs
+        or any(name in ("x", "y") for name in outputs)
+        or any(reducer not in ("count", "sum") for reducer in outputs.values())
+    ):
+        return None
+    xy = {key: column(df, options.get(key)) for key in ("x", "y")}
+    if any(col is None for col in xy.values()):
+        return None
+    aggs = []
+    for name, reducer in outputs.items():
+        if reducer == "count":
+            aggs.append(pl.len().alias(name))
+        elif column(df, options.get(name)) is not None:
+            aggs.append(pl.col(options[name]).sum().alias(name))
+        else:
+            return None
+    channels = grouping_channels(
+        df, options, outputs=outputs, used={"x", "y", *outputs}
+    )
+    if channels is None:
+        return None
+    df = drop_missing(df, list(xy.values()))
+    grid = grid_exprs(df, xy)
+    if grid is None:
+        return None
+    index_exprs, value_exprs = grid
+    new_options = {k: v for k, v in options.items() if k not in {"x", "y", *outputs}}
+    group_by = [*index_exprs, *grouping_exprs(*channels, new_options)]
+    res = df.group_by(group_by, maintain_order=True).agg(aggs)
+    if res.height >= df.height:
+        return None
+    res = res.with_columns(value_exprs)
+    new_options.update({"x": "x", "y": "y", **{name: name for name in outputs}})
+    new_outputs = dict.fromkeys(outputs, "sum")
+    return {**spec, "args": [res, {**transform, "args": [new_outputs, new_options]}]}
+
+
+def aggregate_bin_group(spec: dict, df: pl.DataFrame, transform: dict) -> dict | None:
+    """
+    Compute a bin or group transform by bin or group, with re-aggregating
+    reducers computed by Plot on the aggregated data.
+    """
+    import polars as pl  # noqa: PLC0415
+
+    targs = transform_args(transform)
+    if targs is None:
+        return None
+    outputs, options = targs
+    method = transform["method"]
+    keys = AGGREGATE_TRANSFORMS[method]
+    is_bin = method.startswith("bin")
+
+    # Check outputs
+    if (
+        not outputs
+        or not UNSUPPORTED_OUTPUTS.isdisjoint(outputs)
+        or any(name in keys for name in outputs)
+        or any(reducer not in AGGREGATE_REDUCERS for reducer in outputs.values())
+    ):
+        return None
+    if not UNSUPPORTED_OPTIONS.isdisjoint(options):
+        return None
+
+    # Binned or grouped channels
+    key_columns = {key: column(df, options.get(key)) for key in keys}
+    if any(col is None for col in key_columns.values()):
+        return None
+    # Reduced channels
+    inputs = {}
+    for name, reducer in outputs.items():
+        if reducer != "count":
+            inputs[name] = column(df, options.get(name))
+            if inputs[name] is None:
+                return None
+    channels = grouping_channels(df, options, outputs=outputs, used={*keys, *inputs})
+    if channels is None:
+        return None
+    subgroups, facets = channels
+    used = {*keys, *inputs, *subgroups, *facets}
+
+    # Group by bins or grouped channels, subgroups and facets
+    new_options = {
+        k: v for k, v in options.items() if k not in used and k != "thresholds"
+    }
+    group_by = []
+    mids = {}
+    for key, col in key_columns.items():
+        if not is_bin:
+            group_by.append(pl.col(col).alias(key))
+            new_options[key] = key
+            continue
+        if not df.schema[col].is_numeric():
+            return None
+        df = drop_missing(df, [col])
+        thresholds = bin_thresholds(df.get_column(col), options.get("thresholds"))
+        if thresholds is None:
+            return None
+        # As in Plot, bins are [t(i), t(i+1)[ and values outside thresholds are ignored
+        index = (
+            pl.Series(thresholds)
+            .search_sorted(df.get_column(col), side="right")
+            .cast(pl.Int64)
+            - 1
+        )
+        df = df.with_columns(index.alias(f"__bin_{key}")).filter(
+            pl.col(f"__bin_{key}").is_between(0, len(thresholds) - 2)
+        )
+        group_by.append(pl.col(f"__bin_{key}").alias(key))
+        mids[key] = pl.Series([(t0 + t1) / 2 for t0, t1 in pairwise(thresholds)])
+        # Bin thresholds are given explicitly, each aggregated row is in its own bin
+        new_options[key] = {"value": key, "thresholds": thresholds}
+    group_by.extend(grouping_exprs(subgroups, facets, new_options))
+
+    # Compute reducers
+    aggs = []
+    new_outputs = {}
+    for name, reducer in outputs.items():
+        if reducer == "count":
+            aggs.append(pl.len().alias(name))
+        else:
+            aggs.append(getattr(pl.col(inputs[name]), reducer)().alias(name))
+        new_outputs[name] = REAGGREGATE_REDUCERS[reducer]
+        new_options[name] = name
+    res = df.group_by(group_by, maintain_order=True).agg(aggs)
+    # Replace bin indices by bin middles
+    res = res.with_columns(
+        mids[key].gather(res.get_column(key)).alias(key) for key in mids
+    )
+
+    return {
+        **spec,
+        "args": [
+            res,
+            {**transform, "args": [new_outputs, new_options]},
+        ],
+    }
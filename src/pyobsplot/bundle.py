@@ -0,0 +1,182 @@
+"""
+Portable plot bundles, to render parsed plot specifications later or elsewhere.
+
+A bundle is a zip file containing a `bundle.json` file, with the parsed plot
+specification, theme, default spec values, format and format options, and one
+Arrow IPC file per DataFrame in a `data` directory. Other data objects, such as
+GeoJSON, are stored in `bundle.json`.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import zipfile
+from pathlib import Path
+from typing import IO, Any
+
+from pyobsplot.parsing import SpecParser
+from pyobsplot.utils import DEFAULT_THEME, MIN_NPM_VERSION
+
+BUNDLE_VERSION = 1
+BUNDLE_EXTENSION = ".pyobsplot"
+BUNDLE_SPEC_FILE = "bundle.json"
+
+
+def write_bundle(
+    path: str | Path | IO[bytes],
+    spec: Any,
+    *,
+    format: str | None = None,  # noqa: A002
+    theme: str = DEFAULT_THEME,
+    default: dict | None = None,
+    format_options: dict | None = None,
+    debug: bool = False,
+    aggregate: bool = False,
+    max_points: int | None = None,
+    domains: bool = False,
+) -> None:
+    """
+    Parse a plot specification and write it with its data as a bundle file.
+
+    Parameters
+    ----------
+    path : str | Path | IO[bytes]
+        path or binary file object to write the bundle to.
+    spec : Any
+        plot specification.
+    format : {'html', 'svg', 'png', 'pdf'}, optional
+        default output format of the bundle, by default None
+    theme : {'light', 'dark', 'current'}, optional
+        color theme to use, by default 'light'
+    default : dict, optional
+        dict of default spec values, by default None
+    format_options : dict, optional
+        output format options for typst formatter, by default None
+    debug : bool, optional
+        activate debug mode, by default False
+    aggregate : bool, optional
+        if True, compute bin and group transforms in Python when possible, by
+        default False
+    max_points : int, optional
+        if given, line, area and dot marks DataFrames with more rows are
+        downsampled in Python, by default None
+    domains : bool, optional
+        if True, compute scale domains in Python when possible, by default False
+    """
+    # Widget serialization keeps Arrow IPC as raw bytes instead of base64 strings
+    parser = SpecParser(
+        renderer="widget",
+        default=default,
+        aggregate=aggregate,
+        max_points=max_points,
+        domains=domains,
+    )
+    parser.set_spec(spec)
+    code = parser.parse_spec()
+    data = []
+    files = {}
+    for i, d in enumerate(parser.serialize_data()):
+        if isinstance(d, dict) and d.get("pyobsplot-type") == "DataFrame":
+            name = f"data/{i}.arrow"
+            files[name] = d["value"]
+            data.append({"pyobsplot-type": "DataFrame", "file": name})
+        else:
+            data.append(d)
+    bundle = {
+        "pyobsplot-bundle": BUNDLE_VERSION,
+        "npm_version": MIN_NPM_VERSION,
+        "code": code,
+        "data": data,
+        "format": format,
+        "theme": theme,
+        "default": default or {},
+        "format_options": format_options or {},
+        "debug": debug,
+    }
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr(
+            BUNDLE_SPEC_FILE, json.dumps(bundle), compress_type=zipfile.ZIP_DEFLATED
+        )
+        # Arrow IPC data is already compressed
+        for name, value in files.items():
+            zf.writestr(name, value, compress_type=zipfile.ZIP_STORED)
+
+
+def read_bundle(path: str | Path | IO[bytes]) -> dict:
+    """
+    Read a bundle file.
+
+    Parameters
+    ----------
+    path : str | Path | IO[bytes]
+        path or binary file object of the bundle.
+
+    Returns
+    -------
+    dict
+        dict with "code", "data", "format", "theme", "default", "format_options"
+        and "debug" keys. Data is serialized for the jsdom renderer, so the result
+        is also a valid render service request (see `pyobsplot.server`).
+
+    Raises
+    ------
+    ValueError
+        if the file is not a valid bundle.
+    """
+    try:
+        with zipfile.ZipFile(path) as zf:
+            bundle = json.loads(zf.read(BUNDLE_SPEC_FILE))
+            if (
+                not isinstance(bundle, dict)
+                or not {"pyobsplot-bundle", "code"} <= bundle.keys()
+            ):
+                msg = f"Invalid bundle {path}."
+                raise ValueError(msg)
+            if bundle["pyobsplot-bundle"] > BUNDLE_VERSION:
+                msg = (
+                    f"Bundle {path} has version {bundle['pyobsplot-bundle']}, which "
+                    "is not supported by this pyobsplot version."
+                )
+                raise ValueError(msg)
+            data = []
+            for d in bundle.get("data", []):
+                if isinstance(d, dict) and d.get("pyobsplot-type") == "DataFrame":
+                    value = base64.standard_b64encode(zf.read(d["file"])).decode(
+                        "ascii"
+                    )
+                    data.append({"pyobsplot-type": "DataFrame", "value": value})
+                else:
+                    data.append(d)
+    except (zipfile.BadZipFile, KeyError, json.JSONDecodeError) as e:
+        msg = f"Invalid bundle {path}: {e}"
+        raise ValueError(msg) from e
+    return {
+        "code": bundle["code"],
+        "data": data,
+        "format": bundle.get("format"),
+        "theme": bundle.get("theme", DEFAULT_THEME),
+        "default": bundle.get("default") or {},
+        "format_options": bundle.get("format_options") or {},
+        "debug": bundle.get("debug", False),
+    }
+
+
+def is_bundle(content: bytes) -> bool:
+    """
+    Check if some content is a bundle, from its zip file signature.
+    """
+    return content[:4] == b"PK\x03\x04"
+
+
+def bundle_files(paths: list[str | Path]) -> list[Path]:
+    """
+    List bundle files. Directories are replaced by the bundle files they contain.
+    """
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(path.glob(f"*{BUNDLE_EXTENSION}")))
+        else:
+            files.append(path)
+    return files
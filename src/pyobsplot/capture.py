@@ -0,0 +1,135 @@
+"""
+Capture of jsdom renderings, to replay them offline.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from pyobsplot.utils import MIN_NPM_VERSION
+
+# Environment variables used as default capture settings
+CAPTURE_DIR_ENV = "PYOBSPLOT_CAPTURE_DIR"
+CAPTURE_MIN_TIME_ENV = "PYOBSPLOT_CAPTURE_MIN_TIME"
+
+
+def write_capture(
+    capture_dir: str | Path,
+    *,
+    code: dict,
+    data: list,
+    format: str,  # noqa: A002
+    theme: str,
+    format_options: dict,
+    debug: bool,
+    timings: dict,
+    size: int,
+) -> Path:
+    """
+    Write a rendering capture as a JSON file.
+
+    Captures are valid render service requests (see `pyobsplot.server`), with
+    additional "timings", "size", "time" and "npm_version" keys.
+
+    Parameters
+    ----------
+    capture_dir : str | Path
+        directory to write the capture to, created if needed.
+    code : dict
+        parsed plot specification.
+    data : list
+        serialized data.
+    format : str
+        output format.
+    theme : str
+        color theme.
+    format_options : dict
+        output format options.
+    debug : bool
+        debug mode.
+    timings : dict
+        rendering stage timings in seconds.
+    size : int
+        output size in bytes.
+
+    Returns
+    -------
+    Path
+        path of the capture file.
+    """
+    capture_dir = Path(capture_dir)
+    capture_dir.mkdir(parents=True, exist_ok=True)
+    now = datetime.now(tz=timezone.utc)
+    capture = {
+        "code": code,
+        "data": data,
+        "format": format,
+        "theme": theme,
+        "format_options": format_options,
+        "debug": debug,
+        "timings": timings,
+        "size": size,
+        "time": now.isoformat(),
+        "npm_version": MIN_NPM_VERSION,
+    }
+    # Unique and chronologically sorted file names
+    path = capture_dir / f"{now:%Y%m%d-%H%M%S-%f}-{uuid.uuid4().hex[:8]}.json"
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(capture, f)
+    os.replace(tmp, path)
+    return path
+
+
+def read_capture(path: str | Path) -> dict:
+    """
+    Read a rendering capture.
+
+    Parameters
+    ----------
+    path : str | Path
+        path of the capture file.
+
+    Returns
+    -------
+    dict
+        capture content.
+
+    Raises
+    ------
+    ValueError
+        if the file is not a valid capture.
+    """
+    try:
+        with open(path) as f:
+            capture = json.load(f)
+    except json.JSONDecodeError as e:
+        msg = f"Invalid capture file {path}: {e}"
+        raise ValueError(msg) from e
+    if (
+        not isinstance(capture, dict)
+        or not {"code", "data", "format", "theme"} <= capture.keys()
+    ):
+        msg = f"Invalid capture file {path}."
+        raise ValueError(msg)
+    capture.setdefault("format_options", {})
+    capture.setdefault("debug", False)
+    capture.setdefault("timings", {})
+    return capture
+
+
+def capture_files(paths: list[str | Path]) -> list[Path]:
+    """
+    List capture files. Directories are replaced by the JSON files they contain.
+    """
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(path.glob("*.json")))
+        else:
+            files.append(path)
+    return files
@@ -0,0 +1,746 @@
+"""
+Command line interface.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import logging
+import pickle
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from pyobsplot.obsplot import AVAILABLE_EXTENSIONS, ObsplotJsdomPool
+from pyobsplot.utils import AVAILABLE_THEMES, DEFAULT_THEME
+
+logger = logging.getLogger("pyobsplot")
+
+
+def load_manifest(path: str | Path) -> dict:
+    """
+    Load a manifest of plot specifications.
+
+    A manifest can be either:
+
+    - a Python module defining a `specs` dict of plot specifications, and
+      optionally `themes` and `defaults` dicts giving the theme and default spec
+      values of some of these plots, and a `skip` dict giving the formats not to
+      render for some of them (see `tests/generate_jsdom_reference.py`).
+    - a directory containing the same dicts as pickle files (`specs.pkl`,
+      `themes.pkl`, `defaults.pkl` and `skip.pkl`).
+
+    Parameters
+    ----------
+    path : str | Path
+        path to the manifest.
+
+    Returns
+    -------
+    dict
+        dict with "specs", "themes", "defaults", "skip" and "mtime" keys. "mtime"
+        is the last modification time of the manifest.
+    """
+    path = Path(path)
+    manifest = {}
+    if path.is_dir():
+        files = [path / f"{key}.pkl" for key in ("specs", "themes", "defaults", "skip")]
+        if not files[0].exists():
+            msg = f"No specs.pkl file found in {path}."
+            raise ValueError(msg)
+        for file in files:
+            if file.exists():
+                with open(file, "rb") as f:
+                    manifest[file.stem] = pickle.load(f)
+        mtime = max(f.stat().st_mtime for f in files if f.exists())
+    elif path.suffix == ".py":
+        module_spec = importlib.util.spec_from_file_location(
+            f"_pyobsplot_manifest_{path.stem}", path
+        )
+        if module_spec is None or module_spec.loader is None:
+            msg = f"Can't load manifest module {path}."
+            raise ValueError(msg)
+        module = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+        if not hasattr(module, "specs"):
+            msg = f"Manifest module {path} doesn't define a `specs` dict."
+            raise ValueError(msg)
+        for key in ("specs", "themes", "defaults", "skip"):
+            manifest[key] = getattr(module, key, {})
+        mtime = path.stat().st_mtime
+    else:
+        msg = f"Invalid manifest {path}: should be a Python module or a directory."
+        raise ValueError(msg)
+    for key in ("themes", "defaults", "skip"):
+        manifest.setdefault(key, {})
+    manifest["mtime"] = mtime
+    return manifest
+
+
+def render_job(
+    pool: ObsplotJsdomPool,
+    manifest: dict,
+    name: str,
+    *,
+    fmt: str,
+    path: Path,
+    theme: str,
+) -> dict:
+    """
+    Render one plot of a manifest to a file.
+
+    Returns
+    -------
+    dict
+        job result with "name", "format", "path", "status", "time", "size" and
+        "error" keys.
+    """
+    result = {
+        "name": name,
+        "format": fmt,
+        "path": path,
+        "time": 0.0,
+        "size": 0,
+        "error": None,
+    }
+    start = time.perf_counter()
+    try:
+        data, _ = pool.render_bytes(
+            manifest["specs"][name],
+            format=fmt,
+            theme=manifest["themes"].get(name, theme),
+            default=manifest["defaults"].get(name, {}),
+        )
+        path.write_bytes(data)
+        result["status"] = "rendered"
+        result["size"] = len(data)
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = str(e).strip()
+    result["time"] = time.perf_counter() - start
+    return result
+
+
+def render(args: argparse.Namespace) -> int:
+    """
+    `render` command: render all the plots of a manifest to files.
+    """
+    manifest = load_manifest(args.manifest)
+    formats = args.format or ["html"]
+    output_dir = Path(args.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    names = list(manifest["specs"])
+    if args.only:
+        names = [name for name in names if name in args.only]
+
+    jobs = []
+    results = []
+    for name in names:
+        for fmt in formats:
+            if fmt in manifest["skip"].get(name, []):
+                continue
+            path = output_dir / f"{name}.{fmt}"
+            if (
+                not args.force
+                and path.exists()
+                and path.stat().st_mtime >= manifest["mtime"]
+            ):
+                size = path.stat().st_size
+                results.append(
+                    {
+                        "name": name,
+                        "format": fmt,
+                        "path": path,
+                        "status": "skipped",
+                        "time": 0.0,
+                        "size": size,
+                    }
+                )
+                continue
+            jobs.append((name, fmt, path))
+
+    start = time.perf_counter()
+    with (
+        ObsplotJsdomPool(size=args.jobs) as pool,
+        ThreadPoolExecutor(max_workers=args.jobs) as executor,
+    ):
+        futures = [
+            executor.submit(
+                render_job, pool, manifest, name, fmt=fmt, path=path, theme=args.theme
+            )
+            for name, fmt, path in jobs
+        ]
+        for future in futures:
+            res = future.result()
+            if res["status"] == "error":
+                logger.error(f"Error rendering {res['path']}: {res['error']}")
+            results.append(res)
+    elapsed = time.perf_counter() - start
+
+    log_summary(results, elapsed)
+    return 1 if any(r["status"] == "error" for r in results) else 0
+
+
+def render_bundle_job(
+    pool: ObsplotJsdomPool, bundle: Path, *, fmt: str | None, output_dir: Path
+) -> dict:
+    """
+    Render a bundle file.
+
+    Returns
+    -------
+    dict
+        job result with "name", "format", "path", "status", "time", "size" and
+        "error" keys.
+    """
+    from pyobsplot.bundle import read_bundle  # noqa: PLC0415
+
+    result = {
+        "name": bundle.stem,
+        "format": fmt,
+        "path": bundle,
+        "time": 0.0,
+        "size": 0,
+        "error": None,
+    }
+    start = time.perf_counter()
+    try:
+        content = read_bundle(bundle)
+        fmt = fmt or content["format"] or "html"
+        result["format"] = fmt
+        result["path"] = output_dir / f"{bundle.stem}.{fmt}"
+        data, _ = pool.render_bytes(
+            content["code"],
+            data=content["data"],
+            format=fmt,
+            theme=content["theme"],
+            default=content["default"],
+            format_options=content["format_options"],
+            debug=content["debug"],
+        )
+        result["path"].write_bytes(data)
+        result["status"] = "rendered"
+        result["size"] = len(data)
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = str(e).strip()
+    result["time"] = time.perf_counter() - start
+    return result
+
+
+def render_bundle(args: argparse.Namespace) -> int:
+    """
+    `render-bundle` command: render bundle files.
+    """
+    from pyobsplot.bundle import bundle_files  # noqa: PLC0415
+
+    files = bundle_files(args.bundles)
+    output_dir = Path(args.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    results = []
+    with (
+        ObsplotJsdomPool(size=args.jobs) as pool,
+        ThreadPoolExecutor(max_workers=args.jobs) as executor,
+    ):
+        futures = [
+            executor.submit(
+                render_bundle_job, pool, path, fmt=args.format, output_dir=output_dir
+            )
+            for path in files
+        ]
+        for future in futures:
+            res = future.result()
+            if res["status"] == "error":
+                logger.error(f"Error rendering {res['path']}: {res['error']}")
+            results.append(res)
+    elapsed = time.perf_counter() - start
+
+    log_summary(results, elapsed)
+    return 1 if any(r["status"] == "error" for r in results) else 0
+
+
+def log_summary(results: list[dict], elapsed: float) -> None:
+    """
+    Log a timing summary of rendering jobs.
+    """
+    if not results:
+        logger.info("Nothing to render.")
+        return
+    width = max(len(str(r["path"])) for r in results)
+    logger.info(f"{'file':<{width}}  {'status':<8}  {'time':>8}  {'size':>10}")
+    for r in sorted(results, key=lambda r: str(r["path"])):
+        logger.info(
+            f"{r['path']!s:<{width}}  {r['status']:<8}  {r['time']:>7.2f}s  "
+            f"{r['size']:>10}"
+        )
+    counts = {
+        status: sum(r["status"] == status for r in results)
+        for status in ("rendered", "skipped", "error")
+    }
+    logger.info(
+        f"{counts['rendered']} rendered, {counts['skipped']} skipped, "
+        f"{counts['error']} errors in {elapsed:.2f}s"
+    )
+
+
+def serve(args: argparse.Namespace) -> int:
+    """
+    `serve` command: run an HTTP render service.
+    """
+    from pyobsplot.server import RenderServer  # noqa: PLC0415
+
+    with RenderServer(
+        args.host,
+        args.port,
+        workers=args.workers,
+        queue_size=args.queue_size,
+        timeout=args.timeout,
+        cache_size=args.cache_size,
+    ) as server:
+        logger.info(f"pyobsplot render service listening on {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+def loadtest(args: argparse.Namespace) -> int:
+    """
+    `loadtest` command: send the plots of a manifest to a render service and report
+    throughput, latencies, errors and memory usage.
+    """
+    from pyobsplot.loadtest import LoadTest  # noqa: PLC0415
+    from pyobsplot.server import RenderServer, serialize_request  # noqa: PLC0415
+
+    manifest = load_manifest(args.manifest)
+    bodies = {
+        name: serialize_request(
+            spec,
+            format=args.format,
+            theme=manifest["themes"].get(name, DEFAULT_THEME),
+            default=manifest["defaults"].get(name, {}),
+        )
+        for name, spec in manifest["specs"].items()
+        if args.format not in manifest["skip"].get(name, [])
+    }
+
+    server = None
+    url = args.url
+    if url is None:
+        # Local service without cache, so that every request is rendered
+        logging.getLogger("pyobsplot.server").setLevel(logging.WARNING)
+        server = RenderServer(
+            workers=args.workers, queue_size=args.queue_size, cache_size=0
+        )
+        logger.info(f"Starting {args.workers} jsdom servers")
+        server.pool.start()
+        server.start()
+        url = server.url
+    try:
+        test = LoadTest(
+            url,
+            bodies,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            duration=args.duration,
+            interval=args.interval,
+        )
+        mode = (
+            f"{args.rate} requests/s"
+            if args.rate
+            else f"{args.concurrency} concurrent clients"
+        )
+        logger.info(
+            f"Sending {len(bodies)} plots to {url} for {args.duration}s with {mode}"
+        )
+        logger.info(
+            f"{'time':>6}  {'req/s':>7}  {'errors':>6}  {'pending':>7}  {'rss':>10}"
+        )
+        results = test.run(on_sample=log_sample)
+    finally:
+        if server is not None:
+            server.close()
+
+    log_loadtest(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+def log_sample(sample: dict) -> None:
+    """
+    Log a load test status sample.
+    """
+    pending = "-" if sample["pending"] is None else sample["pending"]
+    rss = "-" if sample["rss"] is None else f"{sample['rss'] / 1e6:.1f}MB"
+    logger.info(
+        f"{sample['time']:>5.1f}s  {sample['throughput']:>7.1f}  "
+        f"{sample['errors']:>6}  {pending:>7}  {rss:>10}"
+    )
+
+
+def log_loadtest(results: dict) -> None:
+    """
+    Log a load test summary.
+    """
+    logger.info(
+        f"{results['requests']} requests in {results['duration']:.1f}s, "
+        f"{results['throughput']:.1f} successful requests/s, "
+        f"error rate {results['error_rate']:.1%}"
+    )
+    status = ", ".join(f"{k}: {v}" for k, v in sorted(results["status"].items()))
+    logger.info(f"Response status: {status}")
+    if results["latency"] is not None:
+        lat = results["latency"]
+        logger.info(
+            f"Latency: p50 {lat['p50'] * 1000:.0f}ms, p90 {lat['p90'] * 1000:.0f}ms, "
+            f"p99 {lat['p99'] * 1000:.0f}ms, max {lat['max'] * 1000:.0f}ms"
+        )
+    rss = [s["rss"] for s in results["samples"] if s["rss"] is not None]
+    if rss:
+        logger.info(
+            f"jsdom servers memory: {rss[0] / 1e6:.1f}MB at start, "
+            f"{rss[-1] / 1e6:.1f}MB at end"
+        )
+
+
+def replay(args: argparse.Namespace) -> int:
+    """
+    `replay` command: render captured plots again with a new jsdom server.
+    """
+    from pyobsplot.capture import capture_files, read_capture  # noqa: PLC0415
+    from pyobsplot.obsplot import ObsplotJsdomCreator  # noqa: PLC0415
+
+    files = capture_files(args.captures)
+    if not files:
+        logger.info("No capture to replay.")
+        return 0
+    if args.output is not None:
+        Path(args.output).mkdir(parents=True, exist_ok=True)
+
+    creator = ObsplotJsdomCreator()
+    # Don't capture replayed renderings
+    creator.capture_dir = None
+    profiler = None
+    if args.profile:
+        import cProfile  # noqa: PLC0415
+
+        profiler = cProfile.Profile()
+    errors = 0
+    try:
+        for path in files:
+            try:
+                capture = read_capture(path)
+                timings = []
+                for _ in range(args.repeat):
+                    if profiler is not None:
+                        profiler.enable()
+                    try:
+                        data, _ = creator.render_bytes(
+                            capture["code"],
+                            data=capture["data"],
+                            format=capture["format"],
+                            theme=capture["theme"],
+                            format_options=capture["format_options"],
+                            debug=capture["debug"],
+                        )
+                    finally:
+                        if profiler is not None:
+                            profiler.disable()
+                    timings.append(creator.timings)
+            except Exception as e:
+                errors += 1
+                logger.error(f"Error replaying {path}: {str(e).strip()}")
+                continue
+            if args.output is not None:
+                (Path(args.output) / f"{path.stem}.{capture['format']}").write_bytes(
+                    data
+                )
+            log_replay(path, capture, timings)
+    finally:
+        creator.close()
+
+    if profiler is not None:
+        profiler.dump_stats(args.profile)
+        logger.info(
+            f"Profile written to {args.profile}, view it with "
+            f"`python -m pstats {args.profile}`"
+        )
+    return 1 if errors else 0
+
+
+def log_replay(path: Path, capture: dict, timings: list[dict]) -> None:
+    """
+    Log captured and replayed timings of a capture. Replayed renderings use the
+    captured serialized data, so they have no "serialize" stage.
+    """
+
+    def ms(t: float | None) -> str:
+        return "-" if t is None else f"{t * 1000:.0f}ms"
+
+    replayed = {
+        stage: statistics.median(t[stage] for t in timings) for stage in timings[0]
+    }
+    captured = capture["timings"]
+    logger.info(
+        f"{path.name}: {capture['format']}, captured {ms(captured.get('total'))}, "
+        f"replayed {ms(replayed['total'])}"
+    )
+    stages = [
+        stage for stage in dict.fromkeys([*captured, *replayed]) if stage != "total"
+    ]
+    details = "  ".join(
+        f"{stage} {ms(captured.get(stage))}/{ms(replayed.get(stage))}"
+        for stage in stages
+    )
+    logger.info(f"  captured/replayed: {details}")
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m pyobsplot", description="pyobsplot command line interface."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    render_parser = subparsers.add_parser(
+        "render",
+        help="render the plots of a manifest to files",
+        description=(
+            "Render the plots of a manifest to files. The manifest is either a "
+            "Python module defining a `specs` dict, or a directory of pickled specs."
+        ),
+    )
+    render_parser.add_argument(
+        "manifest", help="Python module or directory of plot specifications"
+    )
+    render_parser.add_argument(
+        "-o",
+        "--output",
+        default=".",
+        help="output directory (default: current directory)",
+    )
+    render_parser.add_argument(
+        "-f",
+        "--format",
+        action="append",
+        choices=AVAILABLE_EXTENSIONS,
+        help="output format, can be repeated (default: html)",
+    )
+    render_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of plots rendered in parallel (default: 1)",
+    )
+    render_parser.add_argument(
+        "--theme",
+        choices=AVAILABLE_THEMES,
+        default=DEFAULT_THEME,
+        help=f"theme of plots without a manifest theme (default: {DEFAULT_THEME})",
+    )
+    render_parser.add_argument(
+        "--only", action="append", help="only render this plot, can be repeated"
+    )
+    render_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="render plots even if output files are up to date",
+    )
+    render_parser.set_defaults(func=render)
+
+    bundle_parser = subparsers.add_parser(
+        "render-bundle",
+        help="render bundle files",
+        description=(
+            "Render bundle files saved with Obsplot.save_bundle or "
+            "pyobsplot.bundle.write_bundle. Each bundle is rendered to a file with the "
+            "same name in the output directory."
+        ),
+    )
+    bundle_parser.add_argument("bundles", nargs="+", help="bundle files or directories")
+    bundle_parser.add_argument(
+        "-o",
+        "--output",
+        default=".",
+        help="output directory (default: current directory)",
+    )
+    bundle_parser.add_argument(
+        "-f",
+        "--format",
+        choices=AVAILABLE_EXTENSIONS,
+        help="output format (default: bundle format, or html)",
+    )
+    bundle_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of plots rendered in parallel (default: 1)",
+    )
+    bundle_parser.set_defaults(func=render_bundle)
+
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="run an HTTP render service",
+        description=(
+            "Run an HTTP render service. Serialized specifications are POSTed to "
+            "/render. As specifications can contain JavaScript code, only expose the "
+            "service to trusted clients."
+        ),
+    )
+    serve_parser.add_argument(
+        "--host", default="localhost", help="host to listen on (default: localhost)"
+    )
+    serve_parser.add_argument(
+        "--port", type=int, default=8000, help="port to listen on (default: 8000)"
+    )
+    serve_parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="number of jsdom rendering servers (default: 1)",
+    )
+    serve_parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=8,
+        help=(
+            "maximum number of requests waiting for a worker before returning 503 "
+            "(default: 8)"
+        ),
+    )
+    serve_parser.add_argument(
+        "--timeout",
+        type=float,
+        default=60,
+        help="maximum rendering time in seconds (default: 60)",
+    )
+    serve_parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=128,
+        help="number of rendered plots kept in cache (default: 128)",
+    )
+    serve_parser.set_defaults(func=serve)
+
+    loadtest_parser = subparsers.add_parser(
+        "loadtest",
+        help="load test a render service",
+        description=(
+            "Send the plots of a manifest to a render service and report throughput, "
+            "latency percentiles, error rate and jsdom servers memory over time. If "
+            "no service url is given, a local service without cache is started."
+        ),
+    )
+    loadtest_parser.add_argument(
+        "manifest", help="Python module or directory of plot specifications"
+    )
+    loadtest_parser.add_argument(
+        "--url", help="url of the render service (default: start a local service)"
+    )
+    loadtest_parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="number of jsdom servers of the local service (default: 1)",
+    )
+    loadtest_parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=8,
+        help="queue size of the local service (default: 8)",
+    )
+    loadtest_parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        default=1,
+        help=(
+            "number of concurrent clients, or maximum requests in flight with --rate "
+            "(default: 1)"
+        ),
+    )
+    loadtest_parser.add_argument(
+        "--rate",
+        type=float,
+        help="send requests at this rate per second instead of in a loop",
+    )
+    loadtest_parser.add_argument(
+        "-d",
+        "--duration",
+        type=float,
+        default=30,
+        help="test duration in seconds (default: 30)",
+    )
+    loadtest_parser.add_argument(
+        "--interval",
+        type=float,
+        default=1,
+        help="status sampling interval in seconds (default: 1)",
+    )
+    loadtest_parser.add_argument(
+        "-f",
+        "--format",
+        choices=AVAILABLE_EXTENSIONS,
+        default="svg",
+        help="output format (default: svg)",
+    )
+    loadtest_parser.add_argument("--json", help="save results to this JSON file")
+    loadtest_parser.set_defaults(func=loadtest)
+
+    replay_parser = subparsers.add_parser(
+        "replay",
+        help="render captured plots again",
+        description=(
+            "Render again plots captured with the PYOBSPLOT_CAPTURE_DIR environment "
+            "variable or the capture_dir argument of ObsplotJsdomCreator, and compare "
+            "captured and replayed timings."
+        ),
+    )
+    replay_parser.add_argument(
+        "captures", nargs="+", help="capture files or directories"
+    )
+    replay_parser.add_argument(
+        "-n",
+        "--repeat",
+        type=int,
+        default=1,
+        help="number of renderings of each capture (default: 1)",
+    )
+    replay_parser.add_argument(
+        "-o", "--output", help="write rendered plots to this directory"
+    )
+    replay_parser.add_argument(
+        "--profile", help="write cProfile statistics of the renderings to this file"
+    )
+    replay_parser.set_defaults(func=replay)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Command line entry point.
+    """
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO, format="%(message)s")
+    args = get_parser().parse_args(argv)
+    counts = ("jobs", "workers", "concurrency", "repeat")
+    if any(getattr(args, count, 1) < 1 for count in counts):
+        msg = (
+            "Number of jobs, workers, concurrent clients or repetitions must be "
+            "at least 1"
+        )
+        raise SystemExit(msg)
+    return args.func(args)
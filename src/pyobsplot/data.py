@@ -2,13 +2,48 @@
 Functions for DataFrame objects conversion to Arrow IPC bytes.
 """
 
+from __future__ import annotations
+
 import base64
+import hashlib
 import io
+import json
+import sys
+import uuid
 from datetime import date
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import polars as pl
+
+# Arrow IPC compression, supported by the JavaScript side codecs
+ARROW_COMPRESSION = "lz4"
+
+
+def is_instance(obj: Any, module: str, name: str) -> bool:
+    """
+    Check if an object is an instance of a class without importing its module.
+
+    If the module has not been imported yet, the object can't be an instance
+    of one of its classes.
 
-import pandas as pd
-import polars as pl
+    Parameters
+    ----------
+    obj : Any
+        object to check.
+    module : str
+        name of the module defining the class, such as "pandas".
+    name : str
+        name of the class, such as "DataFrame".
+
+    Returns
+    -------
+    bool
+        True if obj is an instance of module.name.
+    """
+    mod = sys.modules.get(module)
+    return mod is not None and isinstance(obj, getattr(mod, name))
 
 
 def serialize(data: Any, renderer: str) -> Any:
@@ -29,13 +64,13 @@ def serialize(data: Any, renderer: str) -> Any:
     """
 
     # If polars DataFrame, serialize to Arrow IPC
-    if isinstance(data, pl.DataFrame):
+    if is_instance(data, "polars", "DataFrame"):
         value = pl_to_arrow(data)
         if renderer == "jsdom":
             value = base64.standard_b64encode(value).decode("ascii")
         return {"pyobsplot-type": "DataFrame", "value": value}
     # If pandas DataFrame, serialize to Arrow IPC
-    elif isinstance(data, pd.DataFrame):
+    elif is_instance(data, "pandas", "DataFrame"):
         value = pd_to_arrow(data)
         if renderer == "jsdom":
             value = base64.standard_b64encode(value).decode("ascii")
@@ -45,6 +80,50 @@ def serialize(data: Any, renderer: str) -> Any:
         return data
 
 
+def data_key(data: Any) -> str:
+    """
+    Compute a content hash of a data object.
+
+    DataFrames are hashed from their schema and row hashes, which is much faster
+    than serializing them. Other objects are hashed from their JSON representation,
+    or get a random key if they don't have one.
+
+    Parameters
+    ----------
+    data : Any
+        data object to hash.
+
+    Returns
+    -------
+    str
+        hexadecimal content hash.
+    """
+    h = hashlib.sha256()
+    if is_instance(data, "polars", "DataFrame"):
+        h.update(f"polars:{data.shape}:{data.schema}".encode())
+        if data.width > 0:
+            h.update(data.hash_rows(seed=0).to_numpy().tobytes())
+        return h.hexdigest()
+    if is_instance(data, "pandas", "DataFrame"):
+        import pandas as pd  # noqa: PLC0415
+
+        h.update(
+            f"pandas:{data.shape}:{list(data.columns)}:{list(data.dtypes)}".encode()
+        )
+        try:
+            h.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+        except TypeError:
+            # Unhashable values such as lists, hash the serialized bytes instead
+            h.update(pd_to_arrow(data))
+        return h.hexdigest()
+    try:
+        h.update(json.dumps(data, sort_keys=True).encode())
+    except (TypeError, ValueError):
+        # Object can't be hashed, use a random key so that it is always sent
+        return uuid.uuid4().hex
+    return h.hexdigest()
+
+
 def pd_to_arrow(df: pd.DataFrame) -> bytes:
     """
     Convert a pandas DataFrame to Arrow IPC bytes.
@@ -59,10 +138,12 @@ def pd_to_arrow(df: pd.DataFrame) -> bytes:
     bytes
         Arrow IPC bytes.
     """
+    import pandas as pd  # noqa: PLC0415
+
     # Convert dates to timestamps
     for colname in df.columns:
         col = df[colname].dropna()
-        if col is not None and isinstance(col[0], date):
+        if not col.empty and isinstance(col.iloc[0], date):
             try:
                 df[colname] = pd.to_datetime(df[colname])
             except ValueError:
@@ -73,7 +154,7 @@ def pd_to_arrow(df: pd.DataFrame) -> bytes:
     df[datetime_columns] = df[datetime_columns].astype("datetime64[ms]")
 
     f = io.BytesIO()
-    df.to_feather(f, compression="lz4")
+    df.to_feather(f, compression=ARROW_COMPRESSION)
     return f.getvalue()
 
 
@@ -91,6 +172,7 @@ def pl_to_arrow(df: pl.DataFrame) -> bytes:
     bytes
         Arrow IPC bytes.
     """
+    import polars as pl  # noqa: PLC0415
 
     # Convert dates and datetimes to millisecond units so that
     # Plot will detect them as datetimes
@@ -99,5 +181,5 @@ def pl_to_arrow(df: pl.DataFrame) -> bytes:
 
     f = io.BytesIO()
     df_pd = df.to_pandas()
-    df_pd.to_feather(f, compression="lz4")
+    df_pd.to_feather(f, compression=ARROW_COMPRESSION)
     return f.getvalue()
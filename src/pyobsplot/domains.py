@@ -0,0 +1,415 @@
+"""
+Python-side computation of scale domains.
+
+When all the marks using a scale get their values from DataFrame columns, the
+domain Plot would infer for this scale can be computed with polars: the extent of
+the values for quantitative scales, and their sorted distinct values for ordinal
+ones. It is then given as an explicit `domain` scale option, so that Plot doesn't
+have to scan every channel value, and domains are the same across facets and
+renders.
+
+Domains are only computed when they are certain to be the same as the ones Plot
+would infer: a scale is left unchanged if a mark using it is not supported, if one
+of its channels is not a column name, or if scale options change how its domain is
+computed.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import math
+from typing import TYPE_CHECKING, Any
+
+from pyobsplot.aggregate import column
+from pyobsplot.data import is_instance
+
+if TYPE_CHECKING:
+    import polars as pl
+
+# Scales whose domain can be computed, with the channels bound to them
+SCALE_CHANNELS = {
+    "x": ("x", "x1", "x2"),
+    "y": ("y", "y1", "y2"),
+    "color": ("fill", "stroke"),
+    "fx": ("fx",),
+    "fy": ("fy",),
+}
+CHANNEL_SCALES = {
+    channel: scale for scale, channels in SCALE_CHANNELS.items() for channel in channels
+}
+# Supported marks, with their position channels and whether they are band
+# (ordinal) channels. Color and facet channels are supported for all of them.
+DOMAIN_MARKS = {
+    "dot": {"x": False, "y": False},
+    "circle": {"x": False, "y": False},
+    "hexagon": {"x": False, "y": False},
+    "line": {"x": False, "y": False},
+    "text": {"x": False, "y": False},
+    "cell": {"x": True, "y": True},
+    "dotX": {"x": False, "y": False},
+    "dotY": {"x": False, "y": False},
+    "lineX": {"x": False, "y": False},
+    "lineY": {"x": False, "y": False},
+    "tickX": {"x": False, "y": True},
+    "tickY": {"x": True, "y": False},
+    "ruleX": {"x": False, "y1": False, "y2": False},
+    "ruleY": {"y": False, "x1": False, "x2": False},
+}
+# Marks whose x and y channels default to the elements of data when both are missing
+TUPLE_MARKS = {"dot", "circle", "hexagon", "line", "text", "cell"}
+# Channels defaulting to the data values, or to their index
+IDENTITY_CHANNELS = {
+    "dotX": "x",
+    "dotY": "y",
+    "lineX": "x",
+    "lineY": "y",
+    "tickX": "x",
+    "tickY": "y",
+    "ruleX": "x",
+    "ruleY": "y",
+}
+INDEX_CHANNELS = {"lineX": "y", "lineY": "x"}
+# Marks which don't add values to scales
+DECORATION_MARKS = {
+    "frame",
+    "axisX",
+    "axisY",
+    "axisFx",
+    "axisFy",
+    "gridX",
+    "gridY",
+    "gridFx",
+    "gridFy",
+}
+# Mark options changing the mark data or the order of ordinal domains
+UNSUPPORTED_MARK_OPTIONS = {"filter", "sort", "transform", "initializer"}
+# Scale options changing how the domain is computed or interpreted
+UNSUPPORTED_SCALE_OPTIONS = {
+    "domain",
+    "type",
+    "interval",
+    "transform",
+    "percent",
+    "pivot",
+    "symmetric",
+}
+# Maximum number of values of a computed ordinal domain
+MAX_ORDINAL_DOMAIN = 1000
+# CSS named colors. Plot uses an identity color scale if all the values of a color
+# channel are colors.
+CSS_COLORS = frozenset(
+    """
+    aliceblue antiquewhite aqua aquamarine azure beige bisque black blanchedalmond blue
+    blueviolet brown burlywood cadetblue chartreuse chocolate coral cornflowerblue
+    cornsilk crimson cyan darkblue darkcyan darkgoldenrod darkgray darkgreen darkgrey
+    darkkhaki darkmagenta darkolivegreen darkorange darkorchid darkred darksalmon
+    darkseagreen darkslateblue darkslategray darkslategrey darkturquoise darkviolet
+    deeppink deepskyblue dimgray dimgrey dodgerblue firebrick floralwhite forestgreen
+    fuchsia gainsboro ghostwhite gold goldenrod gray green greenyellow grey honeydew
+    hotpink indianred indigo ivory khaki lavender lavenderblush lawngreen lemonchiffon
+    lightblue lightcoral lightcyan lightgoldenrodyellow lightgray lightgreen lightgrey
+    lightpink lightsalmon lightseagreen lightskyblue lightslategray lightslategrey
+    lightsteelblue lightyellow lime limegreen linen magenta maroon mediumaquamarine
+    mediumblue mediumorchid mediumpurple mediumseagreen mediumslateblue
+    mediumspringgreen mediumturquoise mediumvioletred midnightblue mintcream mistyrose
+    moccasin navajowhite navy oldlace olive olivedrab orange orangered orchid
+    palegoldenrod palegreen paleturquoise palevioletred papayawhip peachpuff peru pink
+    plum powderblue purple rebeccapurple red rosybrown royalblue saddlebrown salmon
+    sandybrown seagreen seashell sienna silver skyblue slateblue slategray slategrey
+    snow springgreen steelblue tan teal thistle tomato turquoise violet wheat white
+    whitesmoke yellow yellowgreen transparent none currentcolor
+    """.split()
+)
+
+
+class UnsupportedMarkError(Exception):
+    """
+    Raised when the scale values of a mark can't be computed in Python.
+    """
+
+
+def value_base(dtype: Any) -> str | None:
+    """
+    Kind of the values of a polars data type: 'number', 'temporal', 'string' or
+    'boolean'. None for other types.
+    """
+    import polars as pl  # noqa: PLC0415
+
+    if dtype == pl.Boolean:
+        return "boolean"
+    if dtype.is_integer() or dtype.is_float():
+        return "number"
+    if dtype in (pl.Date, pl.Datetime):
+        return "temporal"
+    if dtype in (pl.String, pl.Categorical, pl.Enum):
+        return "string"
+    return None
+
+
+def is_color(value: Any) -> bool:
+    """
+    True if value may be parsed as a CSS color.
+    """
+    if not isinstance(value, str):
+        return False
+    value = value.strip().lower()
+    return value in CSS_COLORS or value.startswith(("#", "rgb", "hsl"))
+
+
+def utc(value: Any) -> Any:
+    """
+    Naive datetimes are serialized to Arrow as UTC timestamps, so they are made UTC
+    aware to be converted to the same JavaScript dates.
+    """
+    if isinstance(value, dt.datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=dt.timezone.utc)
+    return value
+
+
+def as_polars(data: Any, cache: dict) -> pl.DataFrame | pl.Series | None:
+    """
+    Returns mark data as a polars DataFrame, or as a Series for lists of numbers.
+    Converted data is cached by object id.
+    """
+    import polars as pl  # noqa: PLC0415
+
+    key = id(data)
+    if key in cache:
+        return cache[key][1]
+    res = None
+    if is_instance(data, "polars", "DataFrame"):
+        res = data
+    elif is_instance(data, "pandas", "DataFrame"):
+        res = pl.from_pandas(data)
+    elif isinstance(data, list | tuple | range) and all(
+        isinstance(v, int | float) and not isinstance(v, bool) for v in data
+    ):
+        res = pl.Series(list(data), dtype=pl.Float64)
+    # Keep a reference to data so that its id is not reused
+    cache[key] = (data, res)
+    return res
+
+
+def mark_values(mark: Any, cache: dict) -> tuple[list, set]:
+    """
+    Values of the scales of a mark.
+
+    Parameters
+    ----------
+    mark : Any
+        mark specification.
+    cache : dict
+        cache of converted mark data.
+
+    Returns
+    -------
+    tuple[list, set]
+        list of (scale name, values Series, band) tuples, and set of scale names
+        whose values can't be computed.
+
+    Raises
+    ------
+    UnsupportedMarkError
+        if the mark is not supported.
+    """
+    import polars as pl  # noqa: PLC0415
+
+    if (
+        not isinstance(mark, dict)
+        or mark.get("pyobsplot-type") != "function"
+        or mark.get("module") != "Plot"
+    ):
+        raise UnsupportedMarkError
+    method = mark.get("method")
+    if method in DECORATION_MARKS:
+        return [], set()
+    if method not in DOMAIN_MARKS:
+        raise UnsupportedMarkError
+    args = mark.get("args", ())
+    if not 1 <= len(args) <= 2:  # noqa: PLR2004
+        raise UnsupportedMarkError
+    options = args[1] if len(args) == 2 else {}  # noqa: PLR2004
+    if not isinstance(options, dict) or "pyobsplot-type" in options:
+        raise UnsupportedMarkError
+    if not UNSUPPORTED_MARK_OPTIONS.isdisjoint(options):
+        raise UnsupportedMarkError
+    data = as_polars(args[0], cache)
+    if data is None:
+        raise UnsupportedMarkError
+    options = {k: v for k, v in options.items() if v is not None}
+
+    values = []
+    unknown = set()
+    identity = IDENTITY_CHANNELS.get(method)
+    if isinstance(data, pl.Series):
+        # Lists of numbers are only supported as identity channel values, with
+        # constant colors
+        if identity is None or any(
+            name in CHANNEL_SCALES
+            and not (CHANNEL_SCALES[name] == "color" and is_color(value))
+            for name, value in options.items()
+        ):
+            raise UnsupportedMarkError
+        return [(CHANNEL_SCALES[identity], data, False)], set()
+
+    channels = DOMAIN_MARKS[method]
+    if method in TUPLE_MARKS and "x" not in options and "y" not in options:
+        raise UnsupportedMarkError
+    if identity is not None and identity not in options:
+        raise UnsupportedMarkError
+    index = INDEX_CHANNELS.get(method)
+    if index is not None and index not in options and data.height > 0:
+        values.append((CHANNEL_SCALES[index], pl.Series([0, data.height - 1]), False))
+    for name, value in options.items():
+        scale = CHANNEL_SCALES.get(name)
+        if scale is None:
+            continue
+        col = column(data, value)
+        if scale == "color":
+            if col is not None:
+                values.append((scale, data.get_column(col), False))
+            elif not is_color(value):
+                unknown.add(scale)
+        elif col is None or (scale in ("x", "y") and name not in channels):
+            unknown.add(scale)
+        else:
+            values.append(
+                (scale, data.get_column(col), scale in ("fx", "fy") or channels[name])
+            )
+    return values, unknown
+
+
+def compute_domain(
+    values: list[tuple[pl.Series, bool]], *, scale: str, options: dict
+) -> list | None:
+    """
+    Compute the domain of a scale from the values of its channels. Returns None if
+    the domain can't be computed.
+    """
+    import polars as pl  # noqa: PLC0415
+
+    bases = {value_base(v.dtype) for v, _ in values}
+    if len(bases) != 1 or None in bases:
+        return None
+    base = bases.pop()
+    bands = {band for _, band in values}
+    ordinal = base in ("string", "boolean") or bands == {True}
+    if not ordinal and True in bands:
+        return None
+    # Values of different types are cast to a common one
+    dtypes = {v.dtype for v, _ in values}
+    time_zones = {getattr(d, "time_zone", None) for d in dtypes}
+    if base == "string":
+        dtype = pl.String
+    elif len(dtypes) == 1:
+        dtype = dtypes.pop()
+    elif base == "number":
+        dtype = pl.Float64 if any(d.is_float() for d in dtypes) else pl.Int64
+    elif base == "temporal" and len(time_zones) == 1:
+        dtype = pl.Datetime("us", time_zones.pop())
+    else:
+        return None
+    series = pl.concat([v.cast(dtype) for v, _ in values], rechunk=False)
+
+    if ordinal:
+        if series.null_count() > 0 or (base == "number" and series.is_nan().any()):
+            return None
+        domain = series.unique()
+        if domain.len() > MAX_ORDINAL_DOMAIN:
+            return None
+        if scale == "color" and base == "string" and all(is_color(v) for v in domain):
+            return None
+        return [utc(v) for v in domain.sort().to_list()]
+
+    # Quantitative color domains depend on the color scheme, and ranges with more
+    # than two values make Plot use an ordinal scale when no domain is given
+    if (scale == "color" and "scheme" in options) or "range" in options:
+        return None
+    series = series.drop_nulls()
+    if base == "number":
+        series = series.drop_nans()
+    if series.len() == 0:
+        return None
+    vmin, vmax = series.min(), series.max()
+    if base == "number" and not (math.isfinite(vmin) and math.isfinite(vmax)):  # type: ignore
+        return None
+    return [utc(vmin), utc(vmax)]
+
+
+def scale_domains(spec: dict) -> dict[str, list]:
+    """
+    Compute the domains of the scales of a plot specification.
+
+    Parameters
+    ----------
+    spec : dict
+        plot specification, with a `marks` list.
+
+    Returns
+    -------
+    dict[str, list]
+        computed domains by scale name. Scales whose domain can't be computed
+        are not included.
+    """
+    marks = spec.get("marks")
+    marks = marks if isinstance(marks, list | tuple) else [marks]
+    cache = {}
+    values = {scale: [] for scale in SCALE_CHANNELS}
+    unknown = set()
+    try:
+        for mark in marks:
+            if mark is None:
+                continue
+            mark_vals, mark_unknown = mark_values(mark, cache)
+            for scale, v, band in mark_vals:
+                values[scale].append((v, band))
+            unknown |= mark_unknown
+    except UnsupportedMarkError:
+        return {}
+
+    # Top-level facets
+    facet = spec.get("facet")
+    if facet is not None:
+        data = as_polars(facet.get("data"), cache) if isinstance(facet, dict) else None
+        for name, scale in (("x", "fx"), ("y", "fy")):
+            value = facet.get(name) if isinstance(facet, dict) else True
+            if value is None:
+                continue
+            col = (
+                column(data, value)
+                if is_instance(data, "polars", "DataFrame")
+                else None
+            )
+            if col is None:
+                unknown.add(scale)
+            else:
+                values[scale].append((data.get_column(col), True))  # type: ignore
+    # Geographic projections replace x and y scales
+    if spec.get("projection") is not None:
+        unknown |= {"x", "y"}
+
+    domains = {}
+    for scale, scale_values in values.items():
+        options = spec.get(scale, {})
+        if scale in unknown or not scale_values or not isinstance(options, dict):
+            continue
+        if not UNSUPPORTED_SCALE_OPTIONS.isdisjoint(options):
+            continue
+        domain = compute_domain(scale_values, scale=scale, options=options)
+        if domain is not None:
+            domains[scale] = domain
+    return domains
+
+
+def add_domains(spec: dict) -> dict:
+    """
+    Returns a copy of a plot specification with computed scale domains added as
+    explicit `domain` scale options.
+    """
+    domains = scale_domains(spec)
+    if not domains:
+        return spec
+    spec = spec.copy()
+    for scale, domain in domains.items():
+        spec[scale] = {**spec.get(scale, {}), "domain": domain}
+    return spec
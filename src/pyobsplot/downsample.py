@@ -0,0 +1,274 @@
+"""
+Python-side downsampling of oversized line and dot marks.
+
+Marks whose DataFrame has more rows than a `max_points` limit are reduced with
+polars before serialization:
+
+- line and area marks keep, in each of a fixed number of buckets along their
+  position axis, the first, last, minimum and maximum points of each series (M4
+  reduction), so that the drawn path stays the same at the pixel level. This is
+  only done when their position scale is linear.
+- dot marks are sampled in strata defined by a coarse grid of their continuous x
+  and y values and by their categorical channels, so that every non-empty cell and
+  every category keeps at least one point, and outliers are not lost. About
+  `max_points` rows are kept.
+
+Selected rows are kept in their original order.
+"""
+
+from __future__ import annotations
+
+import math
+import warnings
+from typing import TYPE_CHECKING
+
+from pyobsplot.aggregate import column, is_linear_scale
+from pyobsplot.data import is_instance
+
+if TYPE_CHECKING:
+    import polars as pl
+
+# Line and area marks, with their position and value channels
+LINE_MARKS = {
+    "line": ("x", ("y",)),
+    "lineY": ("x", ("y",)),
+    "lineX": ("y", ("x",)),
+    "area": ("x", ("y1", "y2")),
+    "areaY": ("x", ("y", "y1", "y2")),
+    "areaX": ("y", ("x", "x1", "x2")),
+}
+# Position channels defaulting to the row index
+INDEX_MARKS = {"lineY", "lineX", "areaY", "areaX"}
+DOT_MARKS = {"dot", "dotX", "dotY", "circle", "hexagon"}
+# Channels whose categorical columns define line series or dot strata
+SERIES_CHANNELS = ("z", "fill", "stroke")
+STRATA_CHANNELS = ("z", "fill", "stroke", "symbol", "fx", "fy")
+# Maximum number of points kept in each line bucket
+POINTS_PER_BUCKET = 4
+# Name of the row index column added when a position channel is the row index
+INDEX_COLUMN = "pyobsplot-index"
+ROW_COLUMN = "pyobsplot-row"
+SAMPLE_SEED = 42
+HASH_BUCKETS = 1_000_000
+
+
+def is_continuous(df: pl.DataFrame, col: str) -> bool:
+    dtype = df.schema[col]
+    return dtype.is_numeric() or dtype.is_temporal()
+
+
+def position_expr(col: str) -> pl.Expr:
+    """
+    Numeric or temporal column values as floats.
+    """
+    import polars as pl  # noqa: PLC0415
+
+    return pl.col(col).to_physical().cast(pl.Float64)
+
+
+def downsample_mark(
+    spec: dict, max_points: int, scales: dict | None = None
+) -> tuple[dict, dict] | None:
+    """
+    Downsample the data of a mark if it has more than `max_points` rows.
+
+    The mark must be a line, area or dot mark called with a DataFrame and options
+    without transform, whose value channels are column names.
+
+    Parameters
+    ----------
+    spec : dict
+        Plot mark function specification.
+    max_points : int
+        maximum number of rows of the mark data.
+    scales : dict, optional
+        top-level scale options of the plot, by scale name. Line and area marks
+        are not downsampled if their position scale is not linear, by default None
+
+    Returns
+    -------
+    tuple[dict, dict] | None
+        downsampled mark specification and a report with the mark `method`,
+        the original and downsampled number of `rows` and the `reducer` used.
+        None if the mark is not supported or doesn't need to be downsampled.
+    """
+    import polars as pl  # noqa: PLC0415
+
+    method = spec.get("method")
+    if spec.get("module") != "Plot" or (
+        method not in LINE_MARKS and method not in DOT_MARKS
+    ):
+        return None
+    args = spec.get("args", ())
+    if len(args) != 2 or not isinstance(args[1], dict) or "pyobsplot-type" in args[1]:  # noqa: PLR2004
+        return None
+    data, options = args
+    if not (
+        is_instance(data, "pandas", "DataFrame")
+        or is_instance(data, "polars", "DataFrame")
+    ):
+        return None
+    # Check size before any conversion
+    if data.shape[0] <= max_points:
+        return None
+    df = pl.from_pandas(data) if is_instance(data, "pandas", "DataFrame") else data
+    options = dict(options)
+    if method in LINE_MARKS:
+        res = downsample_line(
+            df, options, method=method, max_points=max_points, scales=scales
+        )
+        reducer = "minmax"
+    else:
+        res = downsample_dot(df, options, max_points=max_points)
+        reducer = "stratified"
+    if res is None or res.height >= df.height:
+        return None
+    report = {"method": method, "rows": (df.height, res.height), "reducer": reducer}
+    return {**spec, "args": (res, options)}, report
+
+
+def downsample_line(
+    df: pl.DataFrame,
+    options: dict,
+    *,
+    method: str,
+    max_points: int,
+    scales: dict | None = None,
+) -> pl.DataFrame | None:
+    """
+    Keep the first, last, minimum and maximum points of each series in buckets
+    along the position axis. `options` is updated if a row index column is added.
+    """
+    import polars as pl  # noqa: PLC0415
+
+    position, value_channels = LINE_MARKS[method]
+    values = [column(df, options.get(name)) for name in value_channels]
+    values = [v for v in values if v is not None]
+    if not values or not all(is_continuous(df, v) for v in values):
+        return None
+    pos = column(df, options.get(position))
+    if pos is None:
+        if options.get(position) is not None or method not in INDEX_MARKS:
+            return None
+        # Position defaults to the row index, which must be kept explicitly
+        df = df.with_row_index(INDEX_COLUMN)
+        pos = INDEX_COLUMN
+        options[position] = {"value": INDEX_COLUMN, "label": None}
+    series = list(
+        dict.fromkeys(
+            col
+            for name in SERIES_CHANNELS
+            if (col := column(df, options.get(name))) is not None
+            and not df.schema[col].is_float()
+        )
+    )
+    n_series = df.select(series).n_unique() if series else 1
+    n_buckets = max_points // (POINTS_PER_BUCKET * n_series)
+    if n_buckets < 1:
+        return None
+
+    df = df.with_row_index(ROW_COLUMN)
+    keys = [*series, "bucket"] if series else ["bucket"]
+    if is_continuous(df, pos):
+        # Buckets are regular in data coordinates, which doesn't match pixels on
+        # non-linear scales
+        if not is_linear_scale(scales, position):
+            return None
+        # Buckets of equal width between the series minimum and maximum positions
+        p = position_expr(pos)
+        pmin, pmax = p.min(), p.max()
+        if series:
+            pmin, pmax = pmin.over(series), pmax.over(series)
+        bucket = ((p - pmin) / (pmax - pmin) * n_buckets).floor().clip(0, n_buckets - 1)
+        bucket = bucket.fill_nan(0)
+    else:
+        # Buckets of equal number of rows
+        index, count = pl.int_range(pl.len()), pl.len()
+        if series:
+            index, count = index.over(series), count.over(series)
+        bucket = index * n_buckets // count
+    missing = pl.any_horizontal([pl.col(c).is_null() for c in (pos, *values)])
+    valid = df.filter(~missing).with_columns(bucket.cast(pl.Int64).alias("bucket"))
+    row = pl.col(ROW_COLUMN)
+    kept = valid.group_by(keys).agg(
+        row.first().alias("first"),
+        row.last().alias("last"),
+        *(row.get(pl.col(v).arg_min()).alias(f"min_{i}") for i, v in enumerate(values)),
+        *(row.get(pl.col(v).arg_max()).alias(f"max_{i}") for i, v in enumerate(values)),
+    )
+    rows = kept.drop(keys).unpivot().get_column("value")
+    selected = pl.repeat(False, df.height, eager=True).scatter(rows, True)
+    # Missing values are kept, as they define gaps in lines
+    return df.filter(pl.lit(selected) | missing).drop(ROW_COLUMN)
+
+
+def downsample_dot(
+    df: pl.DataFrame, options: dict, *, max_points: int
+) -> pl.DataFrame | None:
+    """
+    Sample rows in strata defined by a grid of continuous x and y values and by
+    categorical channels, including categorical x and y, keeping at least one row
+    by stratum.
+    """
+    import polars as pl  # noqa: PLC0415
+
+    positions = [
+        col for name in ("x", "y") if (col := column(df, options.get(name))) is not None
+    ]
+    categories = dict.fromkeys(
+        [
+            *(
+                col
+                for name in STRATA_CHANNELS
+                if (col := column(df, options.get(name))) is not None
+                and not df.schema[col].is_float()
+            ),
+            *(col for col in positions if not is_continuous(df, col)),
+        ]
+    )
+    n_categories = df.select(list(categories)).n_unique() if categories else 1
+    # Grid size so that the number of cells is about max_points / 4
+    positions = [col for col in positions if is_continuous(df, col)]
+    cells = []
+    if positions:
+        size = math.floor(
+            (max_points / POINTS_PER_BUCKET / n_categories) ** (1 / len(positions))
+        )
+        if size > 1:
+            for i, col in enumerate(positions):
+                p = position_expr(col)
+                cell = (
+                    ((p - p.min()) / (p.max() - p.min()) * size)
+                    .floor()
+                    .clip(0, size - 1)
+                )
+                cells.append(cell.fill_nan(0).alias(f"pyobsplot-cell-{i}"))
+
+    df = df.with_row_index(ROW_COLUMN).with_columns(cells)
+    strata = [*categories, *(c.meta.output_name() for c in cells)]
+    n_strata = df.select(strata).n_unique() if strata else 1
+    if n_strata >= max_points:
+        return None
+    # Each stratum keeps its first row, and other rows are kept with a probability
+    # such that about max_points rows are kept. Random values are computed from a
+    # hash of the row index, so that the sample is reproducible.
+    fraction = (max_points - n_strata) / df.height
+    row = pl.col(ROW_COLUMN)
+    first = row.first().over(strata) if strata else row.first()
+    keep = (row.hash(SAMPLE_SEED) % HASH_BUCKETS < fraction * HASH_BUCKETS) | (
+        row == first
+    )
+    return df.filter(keep).drop(ROW_COLUMN, *strata[len(categories) :])
+
+
+def warn_downsampled(downsampled: list[dict]) -> None:
+    """
+    Report downsampled marks as warnings, in debug mode.
+    """
+    for report in downsampled:
+        before, after = report["rows"]
+        msg = (
+            f"pyobsplot: {report['method']} mark data downsampled from {before} to "
+            f"{after} rows ({report['reducer']})."
+        )
+        warnings.warn(msg, stacklevel=1)
@@ -2,16 +2,20 @@
 Obsplot jsdom handling.
 """
 
+from __future__ import annotations
+
 import json
+import time
 import warnings
-from typing import Any
-
-import requests
-from IPython.display import HTML, SVG
+from typing import TYPE_CHECKING, Any
 
+from pyobsplot.downsample import warn_downsampled
 from pyobsplot.parsing import SpecParser
 from pyobsplot.utils import DEFAULT_THEME
 
+if TYPE_CHECKING:
+    from IPython.display import HTML, SVG
+
 HTTP_SERVER_ERROR = 500
 
 
@@ -26,6 +30,10 @@ class ObsplotJsdom:
         default: dict | None = None,
         debug: bool = False,
         force_figure: bool = False,
+        data: list | None = None,
+        aggregate: bool = False,
+        max_points: int | None = None,
+        domains: bool = False,
     ) -> None:
         """
         Obsplot JSDom class. The class takes a plot specification as input and generates
@@ -45,35 +53,69 @@ class ObsplotJsdom:
             activate debug mode, by default False
         force_figure : bool, optional
             if True, set figure to true in plot specification, by default False
+        data : list, optional
+            already serialized data. If given, spec must be an already parsed
+            specification whose data references point to this list, by default None
+        aggregate : bool, optional
+            if True, compute bin and group transforms in Python when possible,
+            by default False
+        max_points : int, optional
+            if given, line, area and dot marks DataFrames with more rows are
+            downsampled in Python, by default None
+        domains : bool, optional
+            if True, compute scale domains in Python when possible, by default False
         """
 
+        # Stage timings in seconds
+        self.timings = {}
+        start = time.perf_counter()
         # Create parser
-        parser = SpecParser(renderer="jsdom", default=default)
+        parser = SpecParser(
+            renderer="jsdom",
+            default=default,
+            aggregate=aggregate,
+            max_points=max_points,
+            domains=domains,
+        )
         # Parse spec code
         parser.set_spec(spec, force_figure=force_figure)
         code = parser.parse_spec()
+        # Reports of downsampled marks
+        self.downsampled = parser.downsampled
+        if debug:
+            warn_downsampled(self.downsampled)
+        self.timings["parse"] = time.perf_counter() - start
+        if data is None:
+            start = time.perf_counter()
+            data = parser.serialize_data()
+            self.timings["serialize"] = time.perf_counter() - start
         # Create spec object
-        spec = {"data": parser.serialize_data(), "code": code, "debug": debug}
+        spec = {"data": data, "code": code, "debug": debug}
         self.spec = spec
         self.port = port
         self.theme = theme
 
-    def plot(self) -> SVG | HTML:
+    def generate(self) -> str:
         """
         Generates the plot by sending request to http node server.
 
         Returns
         -------
-        HTML | SVG
-            Either an HTML or SVG IPython.display object.
+        str
+            Raw SVG or HTML output of the server.
         """
+        import requests  # noqa: PLC0415
 
         # Make POST request with plot spec
         url = f"http://localhost:{self.port}/plot"
+        start = time.perf_counter()
+        body = json.dumps({"spec": self.spec, "theme": self.theme})
+        self.timings["encode"] = time.perf_counter() - start
+        start = time.perf_counter()
         try:
             r = requests.post(
                 url,
-                data=json.dumps({"spec": self.spec, "theme": self.theme}),
+                data=body,
                 timeout=600,
             )
         except ConnectionRefusedError:
@@ -82,10 +124,24 @@ class ObsplotJsdom:
                 f"Please recreate your generator object."
             )
             warnings.warn(msg, stacklevel=1)
+        self.timings["node"] = time.perf_counter() - start
         # Read back result
         if r.status_code == HTTP_SERVER_ERROR:  # type: ignore
             raise RuntimeError(r.content.decode())  # type: ignore
-        out = r.content.decode()  # type: ignore
+        return r.content.decode()  # type: ignore
+
+    def plot(self) -> SVG | HTML:
+        """
+        Generates the plot by sending request to http node server.
+
+        Returns
+        -------
+        HTML | SVG
+            Either an HTML or SVG IPython.display object.
+        """
+        from IPython.display import HTML, SVG  # noqa: PLC0415
+
+        out = self.generate()
 
         # If output is svg, returns IPython.display.SVG
         if out[0:4] == "<svg":
@@ -0,0 +1,266 @@
+"""
+Load testing of the HTTP render service.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+HTTP_OK = 200
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Percentile of a list of values, with linear interpolation.
+    """
+    values = sorted(values)
+    pos = (len(values) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+def summarize(times: list[float]) -> dict | None:
+    """
+    Summary statistics of a list of times, or None if it is empty. Also used by
+    the rendering benchmark.
+    """
+    if not times:
+        return None
+    return {
+        "min": min(times),
+        "p50": percentile(times, 50),
+        "p90": percentile(times, 90),
+        "p99": percentile(times, 99),
+        "max": max(times),
+        "runs": len(times),
+    }
+
+
+class LoadTest:
+    def __init__(
+        self,
+        url: str,
+        bodies: dict[str, bytes],
+        *,
+        concurrency: int = 1,
+        rate: float | None = None,
+        duration: float = 30,
+        interval: float = 1,
+        seed: int = 0,
+    ) -> None:
+        """
+        Load test of a render service. Requests randomly chosen among `bodies` are
+        sent to the service during `duration` seconds.
+
+        If `rate` is None, `concurrency` clients send requests in a loop, each one
+        waiting for its response before sending the next request. Otherwise,
+        requests are sent at a fixed rate, with at most `concurrency` requests in
+        flight, and latencies are measured from the time a request should have been
+        sent, so that a saturated service is not hidden by delayed requests.
+
+        Every `interval` seconds, the service status is sampled to record the
+        number of pending requests and the memory size of jsdom servers.
+
+        Parameters
+        ----------
+        url : str
+            base url of the render service.
+        bodies : dict[str, bytes]
+            request bodies by name, as generated by `serialize_request`.
+        concurrency : int, optional
+            number of concurrent clients, by default 1
+        rate : float, optional
+            number of requests per second, by default None
+        duration : float, optional
+            test duration in seconds, by default 30
+        interval : float, optional
+            status sampling interval in seconds, by default 1
+        seed : int, optional
+            random generator seed, by default 0
+        """
+        if not bodies:
+            msg = "At least one request body is needed."
+            raise ValueError(msg)
+        if concurrency < 1:
+            msg = "concurrency must be at least 1."
+            raise ValueError(msg)
+        if rate is not None and rate <= 0:
+            msg = "rate must be positive."
+            raise ValueError(msg)
+        self.url = url.rstrip("/")
+        self.bodies = bodies
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.interval = interval
+        self.seed = seed
+        self.records = []
+        self.samples = []
+        self._start = 0.0
+        self._elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def send(self, name: str, scheduled: float) -> None:
+        """
+        Send a request and record its latency and status. A status of 0 means that
+        the request failed without response.
+        """
+        import requests  # noqa: PLC0415
+
+        try:
+            r = requests.post(self.url + "/render", data=self.bodies[name], timeout=600)
+            status = r.status_code
+        except requests.RequestException:
+            status = 0
+        end = time.perf_counter()
+        with self._lock:
+            self.records.append(
+                {
+                    "name": name,
+                    "time": end - self._start,
+                    "latency": end - scheduled,
+                    "status": status,
+                }
+            )
+
+    def _closed_loop(self, i: int, deadline: float) -> None:
+        rng = random.Random(self.seed + i)  # noqa: S311
+        names = list(self.bodies)
+        while time.perf_counter() < deadline:
+            self.send(rng.choice(names), time.perf_counter())
+
+    def _open_loop(self, deadline: float) -> None:
+        rng = random.Random(self.seed)  # noqa: S311
+        names = list(self.bodies)
+        # A slot is taken by each request until its response is received, so that
+        # when `concurrency` requests are in flight, the next one waits instead of
+        # being queued. Its latency still counts from its scheduled time.
+        slots = threading.BoundedSemaphore(self.concurrency)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            k = 0
+            while True:
+                scheduled = self._start + k / self.rate  # type: ignore
+                if scheduled >= deadline:
+                    break
+                time.sleep(max(scheduled - time.perf_counter(), 0))
+                if not slots.acquire(timeout=max(deadline - time.perf_counter(), 0)):
+                    break
+                future = executor.submit(self.send, rng.choice(names), scheduled)
+                future.add_done_callback(lambda _: slots.release())
+                k += 1
+
+    def sample(self) -> dict:
+        """
+        Sample the service status.
+        """
+        import requests  # noqa: PLC0415
+
+        now = time.perf_counter() - self._start
+        with self._lock:
+            done = [r for r in self.records if r["time"] > now - self.interval]
+        sample = {
+            "time": now,
+            "throughput": sum(r["status"] == HTTP_OK for r in done) / self.interval,
+            "errors": sum(r["status"] != HTTP_OK for r in done),
+            "pending": None,
+            "rss": None,
+        }
+        try:
+            status = requests.get(self.url + "/status", timeout=self.interval).json()
+            sample["pending"] = status["pending"]
+            rss = [v for v in status.get("rss", []) if v is not None]
+            sample["rss"] = sum(rss) if rss else None
+        except (requests.RequestException, ValueError, KeyError):
+            pass
+        return sample
+
+    def _sample_loop(
+        self, stop: threading.Event, on_sample: Callable[[dict], None] | None
+    ) -> None:
+        while not stop.wait(self.interval):
+            sample = self.sample()
+            self.samples.append(sample)
+            if on_sample is not None:
+                on_sample(sample)
+
+    def run(self, on_sample: Callable[[dict], None] | None = None) -> dict:
+        """
+        Run the load test.
+
+        Parameters
+        ----------
+        on_sample : Callable[[dict], None], optional
+            function called with each status sample, by default None
+
+        Returns
+        -------
+        dict
+            load test results (see `LoadTest.results`).
+        """
+        self.records = []
+        self.samples = []
+        self._start = time.perf_counter()
+        deadline = self._start + self.duration
+        if self.rate is None:
+            clients = [
+                threading.Thread(target=self._closed_loop, args=(i, deadline))
+                for i in range(self.concurrency)
+            ]
+        else:
+            clients = [threading.Thread(target=self._open_loop, args=(deadline,))]
+        stop = threading.Event()
+        sampler = threading.Thread(target=self._sample_loop, args=(stop, on_sample))
+        sampler.start()
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        stop.set()
+        sampler.join()
+        self._elapsed = time.perf_counter() - self._start
+        return self.results()
+
+    def results(self) -> dict:
+        """
+        Returns the load test results.
+
+        Returns
+        -------
+        dict
+            dict with "requests", "duration", "throughput" (successful requests
+            per second), "errors", "error_rate", "status" (count of each response
+            status), "latency" (latency summary of successful requests in seconds),
+            "specs" (latency summary by request name) and "samples" (status samples
+            with time, throughput, errors, pending requests and total memory size
+            of jsdom servers) keys.
+        """
+        ok = [r for r in self.records if r["status"] == HTTP_OK]
+        # No elapsed time if the load test has not been run
+        throughput = len(ok) / self._elapsed if self._elapsed > 0 else 0.0
+        n = len(self.records)
+        errors = n - len(ok)
+        status = {}
+        for r in self.records:
+            status[r["status"]] = status.get(r["status"], 0) + 1
+        return {
+            "requests": n,
+            "duration": self._elapsed,
+            "throughput": throughput,
+            "errors": errors,
+            "error_rate": errors / n if n else 0.0,
+            "status": status,
+            "latency": summarize([r["latency"] for r in ok]),
+            "specs": {
+                name: summarize([r["latency"] for r in ok if r["name"] == name])
+                for name in self.bodies
+            },
+            "samples": self.samples,
+        }
@@ -4,26 +4,23 @@ Obsplot main class.
 
 from __future__ import annotations
 
+import importlib.util
 import io
 import os
+import queue
+import re
 import shutil
 import signal
 import tempfile
+import threading
+import time
 import warnings
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
-from subprocess import PIPE, Popen, SubprocessError
-from typing import Literal
-
-try:
-    import typst  # type: ignore
-
-    HAS_TYPST = True
-except ImportError:
-    HAS_TYPST = False
-
-from IPython.display import HTML, SVG, Image, display
-from ipywidgets.embed import embed_minimal_html
+from subprocess import PIPE, Popen, SubprocessError, TimeoutExpired
+from typing import IO, TYPE_CHECKING, Literal
 
+from pyobsplot.capture import CAPTURE_DIR_ENV, CAPTURE_MIN_TIME_ENV, write_capture
 from pyobsplot.jsdom import ObsplotJsdom
 from pyobsplot.utils import (
     ALLOWED_DEFAULTS,
@@ -33,11 +30,84 @@ from pyobsplot.utils import (
     MIN_NPM_VERSION,
     bundler_output_dir,
 )
-from pyobsplot.widget import ObsplotWidget
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from IPython.display import HTML, SVG, Image
+
+    from pyobsplot.widget import ObsplotWidget
+
+# typst is an optional dependency, only imported when needed
+HAS_TYPST = importlib.util.find_spec("typst") is not None
 
 AVAILABLE_FORMATS = ["widget", "html", "svg", "png"]
 AVAILABLE_EXTENSIONS = ["html", "svg", "png", "pdf"]
 
+# Content types of static output formats
+CONTENT_TYPES = {
+    "html": "text/html; charset=utf-8",
+    "svg": "image/svg+xml",
+    "png": "image/png",
+    "pdf": "application/pdf",
+}
+
+# Regular expressions used to locate SVG elements in jsdom HTML output
+TAG_RE = re.compile(r"<(/?)([A-Za-z][^\s/>]*)[^>]*?(/?)>")
+SVG_TAG_RE = re.compile(r"<(/?)svg[\s/>]")
+
+
+def __getattr__(name: str):
+    # ObsplotWidget is imported lazily to avoid loading Jupyter widgets machinery
+    # when only static formats are used
+    if name == "ObsplotWidget":
+        from pyobsplot.widget import ObsplotWidget  # noqa: PLC0415
+
+        return ObsplotWidget
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
+
+
+def process_group_rss(pgid: int) -> int | None:
+    """
+    Returns the resident memory size of all the processes of a process group.
+
+    Parameters
+    ----------
+    pgid : int
+        process group id.
+
+    Returns
+    -------
+    int | None
+        resident memory size in bytes, or None if it can't be read (only Linux
+        `/proc` filesystem is supported).
+    """
+    proc = Path("/proc")
+    if not proc.is_dir():
+        return None
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    rss = 0
+    for path in proc.iterdir():
+        if not path.name.isdigit():
+            continue
+        try:
+            stat = (path / "stat").read_text()
+            # Process name can contain spaces, fields are read after it
+            fields = stat[stat.rindex(")") + 2 :].split()
+            if int(fields[2]) == pgid:
+                rss += int((path / "statm").read_text().split()[1]) * page_size
+        except (OSError, ValueError, IndexError):
+            # Process has ended or can't be read
+            continue
+    return rss
+
+
+def check_max_points(max_points: int | None) -> None:
+    if max_points is not None and (not isinstance(max_points, int) or max_points < 1):
+        msg = f"max_points must be a positive integer, got {max_points!r}."
+        raise ValueError(msg)
+
 
 def check_format_value(format: str | None) -> None:  # noqa: A002
     if format is not None and format not in AVAILABLE_FORMATS:
@@ -58,6 +128,9 @@ class Obsplot:
         default: dict | None = None,
         format_options: dict | None = None,
         debug: bool = False,
+        aggregate: bool = False,
+        max_points: int | None = None,
+        domains: bool = False,
         renderer: str | None = None,
     ) -> None:
         """
@@ -78,6 +151,23 @@ class Obsplot:
             (padding around the legend).
         debug : bool, optional
             activate debug mode, by default False
+        aggregate : bool, optional
+            if True, bin and group transforms (binX, binY, bin, groupX, groupY and
+            group) of marks on DataFrames with count, sum, mean, min, max or median
+            reducers are computed in Python, and density marks and hexbin transforms
+            data are pre-aggregated on a fine grid, so that only aggregated data is
+            sent to Plot, by default False
+        max_points : int, optional
+            if given, line and area marks DataFrames with more rows are reduced by
+            keeping the first, last, minimum and maximum points of `max_points / 4`
+            buckets along the x or y axis, and dot marks DataFrames are reduced by
+            stratified sampling, before serialization. Reductions are reported in
+            debug mode, by default None
+        domains : bool, optional
+            if True, the domains of x, y, color, fx and fy scales are computed in
+            Python and added to the specification when all the marks using them
+            get their values from DataFrame columns, so that Plot doesn't have to
+            compute them, by default False
         renderer : str, optional
             DEPRECATED, use `format` instead.
         """
@@ -120,6 +210,8 @@ class Obsplot:
                 msg = f"{k} is not allowed in default.\nAllowed values: {ALLOWED_DEFAULTS}."
                 raise ValueError(msg)
 
+        check_max_points(max_points)
+
         # Check format options
         format_options = format_options or {}
         for k in format_options:
@@ -132,6 +224,9 @@ class Obsplot:
         self.format = format
         self.format_options = format_options
         self.debug = debug
+        self.aggregate = aggregate
+        self.max_points = max_points
+        self.domains = domains
 
         self.widget_creator = None
         self.jsdom_creator = None
@@ -144,6 +239,9 @@ class Obsplot:
             f"default: {self.default!r}\n"
             f"format_options: {self.format_options!r}\n"
             f"debug: {self.debug!r}\n"
+            f"aggregate: {self.aggregate!r}\n"
+            f"max_points: {self.max_points!r}\n"
+            f"domains: {self.domains!r}\n"
         )
 
     def __call__(
@@ -155,6 +253,7 @@ class Obsplot:
         format_options: dict | None = None,
         *,
         debug: bool = False,
+        max_points: int | None = None,
     ) -> ObsplotWidget | None:
         """
         Method called when an Obsplot instance is called directly.
@@ -177,6 +276,9 @@ class Obsplot:
             (padding around the legend).
         debug : bool, optional
             activate debug mode, by default False
+        max_points : int, optional
+            maximum number of rows of line, area and dot marks DataFrames, by
+            default the Obsplot object `max_points`
         """
 
         format_value = format or self.format
@@ -184,6 +286,8 @@ class Obsplot:
         theme = theme or self.theme  # type: ignore
         debug = debug or self.debug
         default = self.default
+        check_max_points(max_points)
+        max_points = max_points or self.max_points
 
         # Default to widget format
         if format_value is None and path is None:
@@ -228,11 +332,18 @@ class Obsplot:
 
         # Render widget
         if format_value == "widget":
+            from ipywidgets.embed import embed_minimal_html  # noqa: PLC0415
+
+            from pyobsplot.widget import ObsplotWidget  # noqa: PLC0415
+
             res = ObsplotWidget(
                 spec=spec,
                 theme=theme,
                 default=default,
                 debug=debug,  # type: ignore
+                aggregate=self.aggregate,
+                max_points=max_points,
+                domains=self.domains,
             )  # type: ignore
             if path is not None:
                 embed_minimal_html(path, views=[res], drop_defaults=False)
@@ -250,7 +361,263 @@ class Obsplot:
                 default=default,
                 debug=debug,
                 path=path,
+                aggregate=self.aggregate,
+                max_points=max_points,
+                domains=self.domains,
+            )
+
+    def render_bytes(
+        self,
+        spec: dict,
+        format: Literal["html", "svg", "png", "pdf"] | None = None,  # noqa: A002
+        theme: Literal["light", "dark", "current"] | None = None,
+        format_options: dict | None = None,
+        *,
+        debug: bool = False,
+    ) -> tuple[bytes, str]:
+        """
+        Render a plot without displaying it, and return the raw result.
+
+        This method doesn't rely on IPython or Jupyter widgets, so it can be used
+        in scripts or web services.
+
+        Parameters
+        ----------
+        spec : dict
+            plot specification
+        format : {'html', 'svg', 'png', 'pdf'}, optional
+            output format, by default the Obsplot object format
+        theme : {'light', 'dark', 'current'}, optional
+            color theme to use, by default the Obsplot object theme
+        format_options : dict, optional
+            output format options for typst formatter, by default the Obsplot object
+            format options.
+        debug : bool, optional
+            activate debug mode, by default False
+
+        Returns
+        -------
+        tuple[bytes, str]
+            Rendered plot content and its content type.
+        """
+        format_value = format or self.format
+        if format_value not in AVAILABLE_EXTENSIONS:
+            msg = (
+                f"Incorrect format value '{format_value}'. Available formats are "
+                f"{AVAILABLE_EXTENSIONS}."
+            )
+            raise ValueError(msg)
+        if not isinstance(spec, dict):
+            msg = "Plot specification should be given as a dictionary."
+            raise ValueError(msg)
+        self._jsdom_start()
+        return self.jsdom_creator.render_bytes(  # type: ignore
+            spec=spec,
+            format=format_value,  # type: ignore
+            format_options=format_options or self.format_options,
+            theme=theme or self.theme,  # type: ignore
+            default=self.default,
+            debug=debug or self.debug,
+            aggregate=self.aggregate,
+            max_points=self.max_points,
+            domains=self.domains,
+        )
+
+    def render_to(
+        self,
+        fileobj: IO,
+        spec: dict,
+        format: Literal["html", "svg", "png", "pdf"] | None = None,  # noqa: A002
+        theme: Literal["light", "dark", "current"] | None = None,
+        format_options: dict | None = None,
+        *,
+        debug: bool = False,
+    ) -> str:
+        """
+        Render a plot without displaying it, and write the result to a file object.
+
+        Parameters
+        ----------
+        fileobj : IO
+            binary or text file object to write to. Text file objects are only
+            allowed for 'html' and 'svg' formats.
+        spec : dict
+            plot specification
+        format : {'html', 'svg', 'png', 'pdf'}, optional
+            output format, by default the Obsplot object format
+        theme : {'light', 'dark', 'current'}, optional
+            color theme to use, by default the Obsplot object theme
+        format_options : dict, optional
+            output format options for typst formatter, by default the Obsplot object
+            format options.
+        debug : bool, optional
+            activate debug mode, by default False
+
+        Returns
+        -------
+        str
+            Content type of the rendered plot.
+        """
+        data, content_type = self.render_bytes(
+            spec, format=format, theme=theme, format_options=format_options, debug=debug
+        )
+        ObsplotJsdomCreator.write_bytes(fileobj, data)
+        return content_type
+
+    def save_bundle(
+        self,
+        spec: dict,
+        path: str | Path | IO[bytes],
+        format: Literal["html", "svg", "png", "pdf"] | None = None,  # noqa: A002
+        theme: Literal["light", "dark", "current"] | None = None,
+        format_options: dict | None = None,
+        *,
+        debug: bool = False,
+    ) -> None:
+        """
+        Parse a plot specification and save it with its data as a bundle file, which
+        can be rendered later or on another machine with `render_bundle` or
+        `python -m pyobsplot render-bundle`, without the original DataFrames.
+
+        Parameters
+        ----------
+        spec : dict
+            plot specification
+        path : str | Path | IO[bytes]
+            path or binary file object to write the bundle to.
+        format : {'html', 'svg', 'png', 'pdf'}, optional
+            default output format of the bundle, by default the Obsplot object
+            format if it is a static one
+        theme : {'light', 'dark', 'current'}, optional
+            color theme to use, by default the Obsplot object theme
+        format_options : dict, optional
+            output format options for typst formatter, by default the Obsplot object
+            format options.
+        debug : bool, optional
+            activate debug mode, by default False
+        """
+        from pyobsplot.bundle import write_bundle  # noqa: PLC0415
+
+        if format is None and self.format in AVAILABLE_EXTENSIONS:
+            format = self.format  # type: ignore  # noqa: A001
+        if format is not None and format not in AVAILABLE_EXTENSIONS:
+            msg = (
+                f"Incorrect format value '{format}'. Available formats are "
+                f"{AVAILABLE_EXTENSIONS}."
             )
+            raise ValueError(msg)
+        if not isinstance(spec, dict):
+            msg = "Plot specification should be given as a dictionary."
+            raise ValueError(msg)
+        write_bundle(
+            path,
+            spec,
+            format=format,
+            theme=theme or self.theme,
+            default=self.default,
+            format_options=format_options or self.format_options,
+            debug=debug or self.debug,
+            aggregate=self.aggregate,
+            max_points=self.max_points,
+            domains=self.domains,
+        )
+
+    def save_report(
+        self,
+        specs: list | dict,
+        path: str | Path,
+        *,
+        title: str | None = None,
+        shared_assets: bool = False,
+        theme: Literal["light", "dark", "current"] | None = None,
+        debug: bool = False,
+    ) -> None:
+        """
+        Save several plots as a single HTML report displaying them as widgets,
+        which doesn't need a Jupyter kernel.
+
+        Data objects used by several plots are embedded and decoded only once.
+
+        Parameters
+        ----------
+        specs : list | dict
+            list of plot specifications, or dict of plot specifications indexed
+            by section titles.
+        path : str | Path
+            path of the HTML file to write.
+        title : str, optional
+            report title, by default None
+        shared_assets : bool, optional
+            if True, the widget JavaScript bundle and styles are written as
+            separate files in the directory of path, and shared by all the
+            reports saved in this directory, by default False
+        theme : {'light', 'dark', 'current'}, optional
+            color theme to use, by default the Obsplot object theme
+        debug : bool, optional
+            activate debug mode, by default False
+        """
+        from pyobsplot.report import write_report  # noqa: PLC0415
+
+        write_report(
+            path,
+            specs,
+            title=title,
+            shared_assets=shared_assets,
+            theme=theme or self.theme,
+            default=self.default,
+            debug=debug or self.debug,
+            aggregate=self.aggregate,
+            max_points=self.max_points,
+            domains=self.domains,
+        )
+
+    def render_bundle(
+        self,
+        bundle: str | Path | IO[bytes],
+        format: Literal["html", "svg", "png", "pdf"] | None = None,  # noqa: A002
+        theme: Literal["light", "dark", "current"] | None = None,
+        format_options: dict | None = None,
+    ) -> tuple[bytes, str]:
+        """
+        Render a bundle file saved by `save_bundle`, and return the raw result.
+
+        Parameters
+        ----------
+        bundle : str | Path | IO[bytes]
+            path or binary file object of the bundle.
+        format : {'html', 'svg', 'png', 'pdf'}, optional
+            output format, by default the bundle format, or the Obsplot object format
+        theme : {'light', 'dark', 'current'}, optional
+            color theme to use, by default the bundle theme
+        format_options : dict, optional
+            output format options for typst formatter, by default the bundle
+            format options.
+
+        Returns
+        -------
+        tuple[bytes, str]
+            Rendered plot content and its content type.
+        """
+        from pyobsplot.bundle import read_bundle  # noqa: PLC0415
+
+        content = read_bundle(bundle)
+        format_value = format or content["format"] or self.format
+        if format_value not in AVAILABLE_EXTENSIONS:
+            msg = (
+                f"Incorrect format value '{format_value}'. Available formats are "
+                f"{AVAILABLE_EXTENSIONS}."
+            )
+            raise ValueError(msg)
+        self._jsdom_start()
+        return self.jsdom_creator.render_bytes(  # type: ignore
+            content["code"],
+            data=content["data"],
+            format=format_value,  # type: ignore
+            format_options=format_options or content["format_options"],
+            theme=theme or content["theme"],  # type: ignore
+            default=content["default"],
+            debug=content["debug"],
+        )
 
     def _jsdom_start(self):
         """
@@ -270,8 +637,32 @@ class Obsplot:
 class ObsplotJsdomCreator:
     def __init__(
         self,
+        capture_dir: str | Path | None = None,
+        capture_min_time: float | None = None,
     ) -> None:
+        """
+        Jsdom plot generator, rendering plots with a node server.
+
+        Parameters
+        ----------
+        capture_dir : str | Path, optional
+            if given, each rendering (parsed specification, serialized data, theme,
+            format options and stage timings) is written as a JSON file to this
+            directory, so that it can be replayed with `python -m pyobsplot replay`.
+            By default, the value of the PYOBSPLOT_CAPTURE_DIR environment variable.
+        capture_min_time : float, optional
+            only capture renderings longer than this time in seconds. By default,
+            the value of the PYOBSPLOT_CAPTURE_MIN_TIME environment variable, or 0.
+        """
         self._proc = None
+        self.capture_dir = (
+            capture_dir if capture_dir is not None else os.environ.get(CAPTURE_DIR_ENV)
+        )
+        if capture_min_time is None:
+            capture_min_time = float(os.environ.get(CAPTURE_MIN_TIME_ENV, "0"))
+        self.capture_min_time = capture_min_time
+        # Stage timings in seconds of the last rendering
+        self.timings = {}
         self.start_server()
 
     def start_server(self):
@@ -319,8 +710,32 @@ class ObsplotJsdomCreator:
         """
         Stop http node plot generator server.
         """
-        if self._proc is not None:
+        if self._proc is not None and self._proc.poll() is None:
             os.killpg(os.getpgid(self._proc.pid), signal.SIGTERM)
+            # Wait for the server to end, so that it is restarted by the next
+            # rendering
+            try:
+                self._proc.wait(timeout=5)
+            except TimeoutExpired:
+                pass
+
+    @property
+    def url(self) -> str:
+        """
+        URL of the node plot generator server, started if needed.
+        """
+        self.start_server()
+        return f"http://localhost:{self._port}"
+
+    def rss(self) -> int | None:
+        """
+        Returns the resident memory size in bytes of the server processes, or None
+        if the server is not running or memory size is not available.
+        """
+        if self._proc is None or self._proc.poll() is not None:
+            return None
+        # Server is started in a new session, its process group id is its pid
+        return process_group_rss(self._proc.pid)
 
     def render(
         self,
@@ -332,6 +747,9 @@ class ObsplotJsdomCreator:
         format_options: dict | None = None,
         default: dict | None = None,
         debug: bool = False,
+        aggregate: bool = False,
+        max_points: int | None = None,
+        domains: bool = False,
     ) -> None:
         """
         Method called when an instance is called.
@@ -356,6 +774,220 @@ class ObsplotJsdomCreator:
             dict of default spec values, by default None
         debug : bool, optional
             activate debug mode, by default False
+        aggregate : bool, optional
+            if True, compute bin and group transforms in Python when possible,
+            by default False
+        max_points : int, optional
+            if given, line, area and dot marks DataFrames with more rows are
+            downsampled in Python, by default None
+        domains : bool, optional
+            if True, compute scale domains in Python when possible, by default False
+        """
+        from IPython.display import HTML, SVG, Image, display  # noqa: PLC0415
+
+        start = time.perf_counter()
+        jsdom = self._jsdom(
+            spec,
+            format=format,
+            theme=theme,
+            default=default,
+            debug=debug,
+            aggregate=aggregate,
+            max_points=max_points,
+            domains=domains,
+        )
+        out = jsdom.generate()
+
+        # Display error
+        if out[:4] == "<pre":
+            display(HTML(out))
+            msg = "Error during plot generation: "
+            raise ValueError(msg + out)
+
+        convert_start = time.perf_counter()
+        res = self._convert(
+            out, format=format, theme=theme, format_options=format_options
+        )
+        self._record(
+            jsdom,
+            res,
+            start=start,
+            convert_start=convert_start,
+            format=format,
+            format_options=format_options,
+        )
+        if format == "png":
+            res = Image(res)
+        elif isinstance(res, str):
+            res = SVG(res) if res[:4] == "<svg" else HTML(res)
+
+        # Save to file if path has been given
+        if path is None:
+            display(res)
+        else:
+            ObsplotJsdomCreator.save_to_file(path, res)  # type: ignore
+
+    def render_bytes(
+        self,
+        spec: dict,
+        *,
+        format: Literal["html", "svg", "png", "pdf"],  # noqa: A002
+        theme: Literal["light", "dark", "current"] = DEFAULT_THEME,
+        format_options: dict | None = None,
+        default: dict | None = None,
+        debug: bool = False,
+        data: list | None = None,
+        aggregate: bool = False,
+        max_points: int | None = None,
+        domains: bool = False,
+    ) -> tuple[bytes, str]:
+        """
+        Render a plot and return the raw result, without any IPython display object.
+
+        Parameters
+        ----------
+        spec : dict
+            plot specification
+        format : {'pdf', 'html', 'svg', 'png'}
+            output format
+        theme : {'light', 'dark', 'current'}, optional
+            color theme to use, by default 'light'
+        format_options : dict, optional
+            default output format options for typst formatter. Currently
+            possible keys are 'font' (name of font family), 'scale' (font scaling),
+            'margin' (margin around the plot, e.g. '1in' or '10pt') and 'legend-padding'
+            (padding around the legend).
+        default : dict, optional
+            dict of default spec values, by default None
+        debug : bool, optional
+            activate debug mode, by default False
+        data : list, optional
+            already serialized data. If given, spec must be an already parsed
+            specification, as generated by `SpecParser.parse_spec`, by default None
+        aggregate : bool, optional
+            if True, compute bin and group transforms in Python when possible,
+            by default False
+        max_points : int, optional
+            if given, line, area and dot marks DataFrames with more rows are
+            downsampled in Python, by default None
+        domains : bool, optional
+            if True, compute scale domains in Python when possible, by default False
+
+        Returns
+        -------
+        tuple[bytes, str]
+            Rendered plot content and its content type.
+        """
+        start = time.perf_counter()
+        jsdom = self._jsdom(
+            spec,
+            format=format,
+            theme=theme,
+            default=default,
+            debug=debug,
+            data=data,
+            aggregate=aggregate,
+            max_points=max_points,
+            domains=domains,
+        )
+        out = jsdom.generate()
+        if out[:4] == "<pre":
+            msg = "Error during plot generation: "
+            raise ValueError(msg + out)
+        convert_start = time.perf_counter()
+        res = self._convert(
+            out, format=format, theme=theme, format_options=format_options
+        )
+        self._record(
+            jsdom,
+            res,
+            start=start,
+            convert_start=convert_start,
+            format=format,
+            format_options=format_options,
+        )
+        if isinstance(res, str):
+            res = res.encode("utf-8")
+        return res, CONTENT_TYPES[format]
+
+    def render_to(
+        self,
+        fileobj: IO,
+        spec: dict,
+        *,
+        format: Literal["html", "svg", "png", "pdf"],  # noqa: A002
+        theme: Literal["light", "dark", "current"] = DEFAULT_THEME,
+        format_options: dict | None = None,
+        default: dict | None = None,
+        debug: bool = False,
+        aggregate: bool = False,
+        max_points: int | None = None,
+        domains: bool = False,
+    ) -> str:
+        """
+        Render a plot and write the raw result to a file object.
+
+        Parameters
+        ----------
+        fileobj : IO
+            binary or text file object to write to. Text file objects are only
+            allowed for 'html' and 'svg' formats.
+        spec : dict
+            plot specification
+        format : {'pdf', 'html', 'svg', 'png'}
+            output format
+        theme : {'light', 'dark', 'current'}, optional
+            color theme to use, by default 'light'
+        format_options : dict, optional
+            default output format options for typst formatter.
+        default : dict, optional
+            dict of default spec values, by default None
+        debug : bool, optional
+            activate debug mode, by default False
+        aggregate : bool, optional
+            if True, compute bin and group transforms in Python when possible,
+            by default False
+        max_points : int, optional
+            if given, line, area and dot marks DataFrames with more rows are
+            downsampled in Python, by default None
+        domains : bool, optional
+            if True, compute scale domains in Python when possible, by default False
+
+        Returns
+        -------
+        str
+            Content type of the rendered plot.
+        """
+        data, content_type = self.render_bytes(
+            spec,
+            format=format,
+            theme=theme,
+            format_options=format_options,
+            default=default,
+            debug=debug,
+            aggregate=aggregate,
+            max_points=max_points,
+            domains=domains,
+        )
+        ObsplotJsdomCreator.write_bytes(fileobj, data)
+        return content_type
+
+    def _jsdom(
+        self,
+        spec: dict,
+        *,
+        format: str,  # noqa: A002
+        theme: str,
+        default: dict | None,
+        debug: bool,
+        data: list | None = None,
+        aggregate: bool = False,
+        max_points: int | None = None,
+        domains: bool = False,
+    ) -> ObsplotJsdom:
+        """
+        Parse a plot specification and returns an ObsplotJsdom object, whose
+        `generate()` method returns the raw output of the jsdom server.
         """
         if self._proc is not None and self._proc.poll() is not None:
             msg = "Server has ended, please recreate your plot generator object."
@@ -368,25 +1000,72 @@ class ObsplotJsdomCreator:
         # Force output to HTML for formats that need it
         force_figure = "figure" not in spec and format in ["html", "png", "pdf"]
 
-        res = ObsplotJsdom(
+        return ObsplotJsdom(
             spec=spec,
             port=self._port,
             theme=theme,
             default=default,
             debug=debug,
             force_figure=force_figure,
-        ).plot()
+            data=data,
+            aggregate=aggregate,
+            max_points=max_points,
+            domains=domains,
+        )
 
-        # Display error
-        if res.data is not None and res.data[:4] == "<pre":
-            display(res)
-            msg = "Error during plot generation: "
-            raise ValueError(msg + str(res.data))
+    def _record(
+        self,
+        jsdom: ObsplotJsdom,
+        res: str | bytes,
+        *,
+        start: float,
+        convert_start: float,
+        format: str,  # noqa: A002
+        format_options: dict | None,
+    ) -> None:
+        """
+        Store the timings of a rendering, and capture it if needed.
+        """
+        end = time.perf_counter()
+        self.timings = {
+            **jsdom.timings,
+            "convert": end - convert_start,
+            "total": end - start,
+        }
+        if not self.capture_dir or self.timings["total"] < self.capture_min_time:
+            return
+        try:
+            write_capture(
+                self.capture_dir,
+                code=jsdom.spec["code"],
+                data=jsdom.spec["data"],
+                format=format,
+                theme=jsdom.theme,
+                format_options=format_options or {},
+                debug=jsdom.spec["debug"],
+                timings=self.timings,
+                size=len(res),
+            )
+        except (OSError, TypeError) as e:
+            warnings.warn(
+                f"Can't write rendering capture: {e}", RuntimeWarning, stacklevel=1
+            )
 
-        # Conversion via typst
+    def _convert(
+        self,
+        out: str,
+        *,
+        format: str,  # noqa: A002
+        theme: str,
+        format_options: dict | None,
+    ) -> str | bytes:
+        """
+        Convert a jsdom server output to the target format via typst if needed.
+        Returns a string for text formats and bytes for binary ones.
+        """
         if format in ["png", "pdf"]:
-            res = self.typst_render(res, format, format_options)  # type: ignore
-        if format == "svg" and isinstance(res, HTML):
+            return self.typst_compile(out, format, format_options)  # type: ignore
+        if format == "svg" and out[:4] != "<svg":
             warnings.warn(
                 "HTML figure converted to SVG via typst.",
                 RuntimeWarning,
@@ -395,13 +1074,8 @@ class ObsplotJsdomCreator:
             if theme == "current":
                 msg = "'current' theme is not available for 'svg' format with typst rendering"
                 raise ValueError(msg)
-            res = self.typst_render(res, format, format_options)  # type: ignore
-
-        # Save to file if path has been given
-        if path is None:
-            display(res)
-        else:
-            ObsplotJsdomCreator.save_to_file(path, res)  # type: ignore
+            return self.typst_compile(out, format, format_options).decode("utf-8")
+        return out
 
     def typst_render(
         self,
@@ -426,6 +1100,39 @@ class ObsplotJsdomCreator:
         SVG | Image | bytes
             Conversion result.
 
+        """
+        from IPython.display import SVG, Image  # noqa: PLC0415
+
+        res = self.typst_compile(str(figure.data), format, options)
+        if format == "png":
+            return Image(res)
+        if format == "svg":
+            return SVG(res.decode("utf-8"))
+        return res
+
+    def typst_compile(
+        self,
+        figure: str,
+        format: Literal["pdf", "svg", "png"],  # noqa: A002
+        options: dict | None = None,
+    ) -> bytes:
+        """
+        Compile an HTML jsdom output with typst to png, pdf or svg.
+
+        Parameters
+        ----------
+        figure : str
+            HTML output of jsdom renderer.
+        format : {'png', 'pdf', 'svg'}
+            format of output to generate.
+        options : dict, optional
+            dictionary of format options.
+
+        Returns
+        -------
+        bytes
+            Conversion result.
+
         """
         if not HAS_TYPST:
             msg = (
@@ -435,6 +1142,8 @@ class ObsplotJsdomCreator:
             )
             raise ImportError(msg)
 
+        import typst  # noqa: PLC0415  # type: ignore
+
         if options is None:
             options = {}
 
@@ -448,8 +1157,12 @@ class ObsplotJsdomCreator:
             input_file = tmpdir / "input.typ"
             output_file = tmpdir / f"out.{format}"
 
+            # Write plot SVGs to their own files so that typst can load them directly
+            html, svgs = ObsplotJsdomCreator.extract_figure_svgs(figure)
+            for i, svg in enumerate(svgs):
+                (tmpdir / f"plot-{i}.svg").write_text(svg, encoding="utf-8")
             # Write HTML jsdom output to file
-            jsdom_file.write_text(str(figure.data))
+            jsdom_file.write_text(html)
             # Copy typst template
             shutil.copy(bundler_output_dir / "template.typ", tmpdir / "template.typ")
             # Create the typst input file
@@ -473,17 +1186,81 @@ class ObsplotJsdomCreator:
             typst_content += ")"
             input_file.write_text(typst_content)
 
-            typst.compile(input=input_file, output=output_file, ppi=100, format=format)  # pyright: ignore[reportPossiblyUnboundVariable]
+            typst.compile(input=input_file, output=output_file, ppi=100, format=format)
 
-            mode = "rb" if format in ["png", "pdf"] else "r"
-            with open(output_file, mode) as f:
-                res = f.read()
-            if format == "png":
-                res = Image(res)
-            if format == "svg":
-                res = SVG(res)
+            return output_file.read_bytes()
 
-        return res
+    @staticmethod
+    def extract_figure_svgs(html: str) -> tuple[str, list[str]]:
+        """
+        Extract plot SVG elements from a jsdom HTML figure.
+
+        Each SVG element which is a direct child of the figure and is not a ramp
+        legend is replaced by an empty element with the same attributes and a
+        `typstsrc` attribute giving the name of the file it should be read from.
+        This allows the typst template to load big plots directly with `image()`
+        instead of parsing and re-encoding them.
+
+        Parameters
+        ----------
+        html : str
+            HTML figure generated by jsdom.
+
+        Returns
+        -------
+        tuple[str, list[str]]
+            HTML figure with SVG placeholders, and list of extracted SVG elements.
+            SVG of index `i` is referenced as `plot-{i}.svg`.
+        """
+        out = []
+        svgs = []
+        depth = 0
+        pos = 0
+        cursor = 0
+        while (tag := TAG_RE.search(html, pos)) is not None:
+            closing, name, self_closing = tag.groups()
+            pos = tag.end()
+            if closing:
+                depth -= 1
+                continue
+            if name.lower() != "svg":
+                if not self_closing:
+                    depth += 1
+                continue
+            if self_closing:
+                continue
+            # Jump to the matching closing tag without scanning SVG content
+            level = 1
+            while level > 0 and (svg_tag := SVG_TAG_RE.search(html, pos)) is not None:
+                level += -1 if svg_tag.group(1) else 1
+                pos = svg_tag.end()
+            pos = html.find(">", pos - 1) + 1
+            opening = tag.group(0)
+            if depth != 1 or "ramp" in opening:
+                continue
+            out.append(html[cursor : tag.start()])
+            out.append(f'{opening[:-1]} typstsrc="plot-{len(svgs)}.svg"></svg>')
+            svgs.append(html[tag.start() : pos])
+            cursor = pos
+        out.append(html[cursor:])
+        return "".join(out), svgs
+
+    @staticmethod
+    def write_bytes(fileobj: IO, data: bytes) -> None:
+        """
+        Write rendered plot content to a binary or text file object.
+
+        Parameters
+        ----------
+        fileobj : IO
+            file object to write to.
+        data : bytes
+            rendered plot content.
+        """
+        if isinstance(fileobj, io.TextIOBase):
+            fileobj.write(data.decode("utf-8"))
+        else:
+            fileobj.write(data)
 
     @staticmethod
     def save_to_file(path: str, res: SVG | HTML | Image) -> None:
@@ -497,6 +1274,8 @@ class ObsplotJsdomCreator:
         Raises:
             RuntimeWarning: if the file extension doesn't match the Obsplot type.
         """
+        from IPython.display import HTML, SVG, Image  # noqa: PLC0415
+
         if isinstance(path, io.StringIO):
             path.write(str(res.data))
             return
@@ -509,3 +1288,124 @@ class ObsplotJsdomCreator:
         if isinstance(res, HTML | SVG):
             with open(path, "w", encoding="utf-8") as f:
                 f.write(str(res.data))
+
+
+class ObsplotJsdomPool:
+    def __init__(self, size: int = 1) -> None:
+        """
+        Pool of jsdom plot generator servers, allowing to render several plots
+        concurrently. Servers are started on demand, up to `size` servers.
+
+        Parameters
+        ----------
+        size : int, optional
+            maximum number of servers, by default 1
+        """
+        if size < 1:
+            msg = "Pool size must be at least 1."
+            raise ValueError(msg)
+        self.size = size
+        self._creators = []
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> ObsplotJsdomPool:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @contextmanager
+    def acquire(self, timeout: float | None = None) -> Iterator[ObsplotJsdomCreator]:
+        """
+        Get a server from the pool, starting a new one if all servers are busy and
+        the pool is not full. The server is given back to the pool on exit.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            maximum time to wait for a server, by default wait indefinitely.
+
+        Raises
+        ------
+        TimeoutError
+            if no server has become available before timeout.
+        """
+        creator = self._get(timeout)
+        try:
+            yield creator
+        finally:
+            self._idle.put(creator)
+
+    def _get(self, timeout: float | None) -> ObsplotJsdomCreator:
+        try:
+            creator = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                start = len(self._creators) < self.size
+                if start:
+                    # Reserve the slot before starting the server outside of the lock
+                    self._creators.append(None)
+            if start:
+                try:
+                    creator = ObsplotJsdomCreator()
+                except Exception:
+                    with self._lock:
+                        self._creators.remove(None)
+                    raise
+                with self._lock:
+                    self._creators[self._creators.index(None)] = creator
+            else:
+                try:
+                    creator = self._idle.get(timeout=timeout)
+                except queue.Empty:
+                    msg = f"No plot generator server available after {timeout}s."
+                    raise TimeoutError(msg) from None
+        # Restart server if it has ended. If it can't be restarted, the creator is
+        # given back to the pool so that its slot is not lost, and restarting it
+        # is tried again by the next request.
+        try:
+            creator.start_server()
+        except BaseException:
+            self._idle.put(creator)
+            raise
+        return creator
+
+    def start(self) -> None:
+        """
+        Start all the servers of the pool, instead of starting them on demand.
+        """
+        with ExitStack() as stack:
+            for _ in range(self.size):
+                stack.enter_context(self.acquire())
+
+    def rss(self) -> list[int | None]:
+        """
+        Returns the resident memory size in bytes of each started server of the
+        pool (see `ObsplotJsdomCreator.rss`).
+        """
+        with self._lock:
+            creators = [c for c in self._creators if c is not None]
+        return [creator.rss() for creator in creators]
+
+    def render_bytes(self, spec: dict, **kwargs) -> tuple[bytes, str]:
+        """
+        Render a plot with the first available server of the pool. Arguments are the
+        ones of `ObsplotJsdomCreator.render_bytes`.
+
+        Returns
+        -------
+        tuple[bytes, str]
+            Rendered plot content and its content type.
+        """
+        with self.acquire() as creator:
+            return creator.render_bytes(spec, **kwargs)
+
+    def close(self) -> None:
+        """
+        Stop all the servers of the pool.
+        """
+        with self._lock:
+            creators = [c for c in self._creators if c is not None]
+        for creator in creators:
+            creator.close()
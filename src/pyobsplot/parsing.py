@@ -6,10 +6,10 @@ import datetime
 import json
 from typing import Any, Literal
 
-import pandas as pd
-import polars as pl
-
-from pyobsplot.data import serialize
+from pyobsplot.aggregate import aggregate_mark
+from pyobsplot.data import is_instance, serialize
+from pyobsplot.domains import add_domains
+from pyobsplot.downsample import downsample_mark
 
 
 class SpecParser:
@@ -17,6 +17,10 @@ class SpecParser:
         self,
         renderer: Literal["widget", "jsdom"] = "widget",
         default: dict | None = None,
+        *,
+        aggregate: bool = False,
+        max_points: int | None = None,
+        domains: bool = False,
     ) -> None:
         """
         Class implementing plot specification parsing.
@@ -27,10 +31,28 @@ class SpecParser:
             type of renderer.
         default : dict
             dict of default spec values.
+        aggregate : bool, optional
+            if True, compute bin, group, hexbin and density transforms of marks on
+            DataFrames in Python when possible, so that only aggregated data is
+            serialized (see `pyobsplot.aggregate`), by default False
+        max_points : int, optional
+            if given, line, area and dot marks DataFrames with more rows are
+            downsampled (see `pyobsplot.downsample`), by default None
+        domains : bool, optional
+            if True, compute the domains of x, y, color, fx and fy scales in Python
+            when possible, and add them to the specification as explicit `domain`
+            scale options (see `pyobsplot.domains`), by default False
         """
         self.renderer = renderer
+        self.aggregate = aggregate
+        self.max_points = max_points
+        self.domains = domains
+        # Reports of downsampled marks
+        self.downsampled = []
         self.data = []
         self._spec = {}
+        # Top-level x and y scale options, used by Python-side transforms
+        self._scales = {}
         if default is None:
             default = {}
         self._default = default
@@ -103,6 +125,11 @@ class SpecParser:
         # merge_default only affects top-level elements.
         spec = self.spec.copy()
         spec = self.merge_default(spec)
+        if self.domains and "marks" in spec:
+            spec = add_domains(spec)
+        self._scales = {
+            name: spec[name] for name in ("x", "y") if isinstance(spec.get(name), dict)
+        }
         return self.parse(spec)
 
     def parse(self, spec: Any) -> Any:
@@ -141,9 +168,20 @@ class SpecParser:
             return self.parse(list(spec))
         # If dict, parse recursively
         if isinstance(spec, dict):
+            # Compute mark transform in Python and downsample mark data if possible.
+            # Not done with top-level facets, as facet data must be the same object
+            # as mark data.
+            if spec.get("pyobsplot-type") == "function" and "facet" not in self.spec:
+                if self.aggregate:
+                    spec = aggregate_mark(spec, self._scales) or spec
+                if self.max_points is not None:
+                    res = downsample_mark(spec, self.max_points, self._scales)
+                    if res is not None:
+                        spec, report = res
+                        self.downsampled.append(report)
             return {k: self.parse(v) for k, v in spec.items()}
         # If pandas DataFrame, handle caching, add type and serialize to Arrow IPC
-        if isinstance(spec, pd.DataFrame):
+        if is_instance(spec, "pandas", "DataFrame"):
             index = self.cache_index(spec)
             if index is None:
                 self.data.append(spec)
@@ -154,7 +192,7 @@ class SpecParser:
             else:
                 return {"pyobsplot-type": "DataFrame-ref", "value": index}
         # If polars DataFrame, handle caching, add type and serialize to Arrow IPC
-        if isinstance(spec, pl.DataFrame):
+        if is_instance(spec, "polars", "DataFrame"):
             index = self.cache_index(spec)
             if index is None:
                 self.data.append(spec)
@@ -165,11 +203,11 @@ class SpecParser:
             else:
                 return {"pyobsplot-type": "DataFrame-ref", "value": index}
         # If pandas Series, convert to DataFrame and parse
-        if isinstance(spec, pd.Series):
-            return self.parse(pd.DataFrame(spec))
+        if is_instance(spec, "pandas", "Series"):
+            return self.parse(spec.to_frame())
         # If polars Series, convert to DataFrame and parse
-        if isinstance(spec, pl.Series):
-            return self.parse(pl.DataFrame(spec))
+        if is_instance(spec, "polars", "Series"):
+            return self.parse(spec.to_frame())
         # If date or datetime, add tupe and convert to isoformat.
         if isinstance(spec, datetime.date | datetime.datetime):
             return {"pyobsplot-type": "datetime", "value": spec.isoformat()}
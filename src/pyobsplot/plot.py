@@ -1,8 +1,12 @@
-from typing import Literal
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Literal
 
 from pyobsplot.obsplot import Obsplot
 from pyobsplot.utils import DEFAULT_THEME
-from pyobsplot.widget import ObsplotWidget
+
+if TYPE_CHECKING:
+    from pyobsplot.widget import ObsplotWidget
 
 # Default format for Plot.plot() calls.
 # Not documented, only internal use for documentation generation
@@ -47,7 +51,16 @@ class PlotClass:
     """
 
     def __init__(self):
-        self.op = Obsplot()
+        self._op = None
+
+    @property
+    def op(self) -> Obsplot:
+        """
+        Plot generator used by Plot.plot(), created on first use.
+        """
+        if self._op is None:
+            self._op = Obsplot()
+        return self._op
 
     def plot(
         self,
@@ -56,6 +69,8 @@ class PlotClass:
         format_options: dict | None = None,
         theme: Literal["light", "dark", "current"] = DEFAULT_THEME,
         path: str | None = None,
+        *,
+        max_points: int | None = None,
     ) -> ObsplotWidget | None:
         """
         Plot.plot static method. If called directly, create an ObsplotWidget
@@ -74,6 +89,9 @@ class PlotClass:
             default output format options for typst formatter. Currently
             possible keys are 'font' (name of font family), 'scale' (font scaling)
             and 'margin' (margin around the plot, e.g. '1in' or '10pt')
+        max_points : int, optional
+            if given, line, area and dot marks DataFrames with more rows are
+            downsampled before serialization, by default None
         """
         format_value = format or _plot_format
         return self.op(
@@ -82,6 +100,7 @@ class PlotClass:
             format=format_value,
             format_options=format_options,
             theme=theme,
+            max_points=max_points,
         )
 
     # ⚠️ WARNING ⚠️
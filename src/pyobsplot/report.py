@@ -0,0 +1,260 @@
+"""
+Static HTML reports of several widget plots.
+
+A report is a single HTML document displaying a list of plots with the widget
+JavaScript bundle, without a Jupyter kernel. Data objects are embedded only
+once, indexed by content hash, even if they are used by several plots, and
+DataFrames are embedded as compressed Arrow IPC. Their base64 encoding is also
+decoded only once in the browser, and plots are generated when they become
+visible.
+
+The widget bundle and styles are either inlined in the document, or written
+as shared asset files next to it, so that several reports saved in the same
+directory only reference them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import html
+import json
+from pathlib import Path
+from typing import Any
+
+from pyobsplot.data import data_key, serialize
+from pyobsplot.downsample import warn_downsampled
+from pyobsplot.parsing import SpecParser
+from pyobsplot.utils import DEFAULT_THEME, bundler_output_dir
+
+REPORT_STYLES = """
+body {
+    font-family: system-ui, sans-serif;
+    margin: 2em auto;
+    max-width: 1000px;
+    padding: 0 1em;
+}
+.pyobsplot-report-item { margin: 2em 0; }
+.pyobsplot-report-plot:empty { min-height: 400px; }
+"""
+
+# Page script, generating plots with the widget bundle. Each plot gets a minimal
+# widget model holding its specification. Data objects are shared by all the
+# plots, so that each one is base64 decoded only once.
+REPORT_SCRIPT = """
+const source = globalThis.pyobsplot_widget_source
+const url = URL.createObjectURL(new Blob([source], { type: "text/javascript" }))
+const widget = (await import(url)).default
+const data = JSON.parse(document.getElementById("pyobsplot-report-data").textContent)
+const plots = JSON.parse(document.getElementById("pyobsplot-report-plots").textContent)
+
+const values = new Map()
+function get_value(key) {
+    let value = values.get(key)
+    if (value === undefined) {
+        value = data[key]
+        if (value["pyobsplot-type"] == "DataFrame") {
+            let bytes = Uint8Array.from(atob(value["value"]), (c) => c.charCodeAt(0))
+            value = { ...value, value: bytes }
+        }
+        values.set(key, value)
+    }
+    return value
+}
+
+function render_plot(el) {
+    let plot = plots[el.dataset.index]
+    let spec = { ...plot, data: plot["data"].map(get_value) }
+    let model = { get: (name) => (name == "spec" ? spec : undefined), on: () => {} }
+    widget.render({ model, el })
+}
+
+// Generate plots when they are about to become visible
+const observer = new IntersectionObserver(
+    (entries) => {
+        for (let entry of entries) {
+            if (entry.isIntersecting) {
+                observer.unobserve(entry.target)
+                render_plot(entry.target)
+            }
+        }
+    },
+    { rootMargin: "200px" }
+)
+for (let el of document.querySelectorAll(".pyobsplot-report-plot")) {
+    observer.observe(el)
+}
+"""
+
+
+def script_json(value: Any) -> str:
+    """
+    Serialize a value to JSON which can be embedded in an HTML script element.
+    """
+    return json.dumps(value).replace("</", "<\\/")
+
+
+def widget_asset() -> str:
+    """
+    Widget bundle as a classic script, defining its source as a global
+    variable. Classic scripts, unlike modules, can be loaded from local files.
+    The source is escaped so that the script can also be inlined.
+    """
+    source = (bundler_output_dir / "static-widget.js").read_text(encoding="utf-8")
+    return f"globalThis.pyobsplot_widget_source = {script_json(source)};\n"
+
+
+def write_asset(directory: Path, content: str, suffix: str) -> str:
+    """
+    Write a shared asset file named after its content hash, if it doesn't
+    already exist, and return its name.
+    """
+    digest = hashlib.sha256(content.encode()).hexdigest()[:16]
+    name = f"pyobsplot-{digest}{suffix}"
+    asset = directory / name
+    if not asset.exists():
+        asset.write_text(content, encoding="utf-8")
+    return name
+
+
+def write_report(
+    path: str | Path,
+    specs: list | dict,
+    *,
+    title: str | None = None,
+    shared_assets: bool = False,
+    theme: str = DEFAULT_THEME,
+    default: dict | None = None,
+    debug: bool = False,
+    aggregate: bool = False,
+    max_points: int | None = None,
+    domains: bool = False,
+) -> None:
+    """
+    Parse plot specifications and write them with their data as an HTML report.
+
+    Parameters
+    ----------
+    path : str | Path
+        path of the HTML file to write.
+    specs : list | dict
+        list of plot specifications, or dict of plot specifications indexed by
+        section titles.
+    title : str, optional
+        report title, by default None
+    shared_assets : bool, optional
+        if True, the widget bundle and styles are written as separate files in
+        the directory of path, and shared by the reports saved in this
+        directory. Otherwise they are inlined, by default False
+    theme : {'light', 'dark', 'current'}, optional
+        color theme to use, by default 'light'
+    default : dict, optional
+        dict of default spec values, by default None
+    debug : bool, optional
+        activate debug mode, by default False
+    aggregate : bool, optional
+        if True, compute bin and group transforms in Python when possible, by
+        default False
+    max_points : int, optional
+        if given, line, area and dot marks DataFrames with more rows are
+        downsampled in Python, by default None
+    domains : bool, optional
+        if True, compute scale domains in Python when possible, by default False
+
+    Raises
+    ------
+    ValueError
+        if specs is not a list or dict of plot specifications.
+    """
+    items = (
+        list(specs.items())
+        if isinstance(specs, dict)
+        else [(None, spec) for spec in specs]
+    )
+    if not all(isinstance(spec, dict) for _, spec in items):
+        msg = "Plot specifications should be given as dictionaries."
+        raise ValueError(msg)
+
+    # Serialized data objects, indexed by key, and already serialized objects
+    # with their key, by id. Objects are kept so that their id is not reused.
+    data = {}
+    keys_by_id = {}
+    codes = []
+    for _, spec in items:
+        # jsdom serialization gives base64 strings. The parsed code is the same as
+        # for widgets.
+        parser = SpecParser(
+            renderer="jsdom",
+            default=default,
+            aggregate=aggregate,
+            max_points=max_points,
+            domains=domains,
+        )
+        parser.set_spec(spec)
+        code = parser.parse_spec()
+        if debug:
+            warn_downsampled(parser.downsampled)
+        keys = []
+        for d in parser.data:
+            if id(d) not in keys_by_id:
+                keys_by_id[id(d)] = (d, data_key(d))
+            _, key = keys_by_id[id(d)]
+            if key not in data:
+                data[key] = serialize(d, renderer="jsdom")
+            keys.append(key)
+        codes.append(
+            {
+                "code": code,
+                "data": keys,
+                "debug": debug,
+                "theme": theme,
+            }
+        )
+
+    path = Path(path)
+    styles = (bundler_output_dir / "static-styles.css").read_text(encoding="utf-8")
+    widget = widget_asset()
+    if shared_assets:
+        styles_name = write_asset(path.parent, styles, ".css")
+        widget_name = write_asset(path.parent, widget, ".js")
+        head = (
+            f'<link rel="stylesheet" href="{styles_name}">\n'
+            f'<script src="{widget_name}"></script>'
+        )
+    else:
+        head = f"<style>{styles}</style>\n<script>{widget}</script>"
+
+    lines = [
+        "<!DOCTYPE html>",
+        '<html lang="en">',
+        "<head>",
+        '<meta charset="utf-8">',
+        f"<title>{html.escape(title or 'pyobsplot report')}</title>",
+        head,
+        f"<style>{REPORT_STYLES}</style>",
+        "</head>",
+        "<body>",
+    ]
+    if title:
+        lines.append(f"<h1>{html.escape(title)}</h1>")
+    for i, (section, _) in enumerate(items):
+        lines.append('<section class="pyobsplot-report-item">')
+        if section is not None:
+            lines.append(f"<h2>{html.escape(str(section))}</h2>")
+        lines.append(f'<div class="pyobsplot-report-plot" data-index="{i}"></div>')
+        lines.append("</section>")
+    lines.extend(
+        [
+            (
+                '<script type="application/json" id="pyobsplot-report-data">'
+                f"{script_json(data)}</script>"
+            ),
+            (
+                '<script type="application/json" id="pyobsplot-report-plots">'
+                f"{script_json(codes)}</script>"
+            ),
+            f'<script type="module">{REPORT_SCRIPT}</script>',
+            "</body>",
+            "</html>",
+        ]
+    )
+    path.write_text("\n".join(lines), encoding="utf-8")
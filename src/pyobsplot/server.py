@@ -0,0 +1,491 @@
+"""
+HTTP render service.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from pyobsplot.bundle import is_bundle, read_bundle
+from pyobsplot.obsplot import AVAILABLE_EXTENSIONS, ObsplotJsdomPool
+from pyobsplot.parsing import SpecParser
+from pyobsplot.utils import (
+    ALLOWED_DEFAULTS,
+    ALLOWED_FORMAT_OPTIONS,
+    AVAILABLE_THEMES,
+    DEFAULT_THEME,
+)
+
+logger = logging.getLogger("pyobsplot.server")
+
+HTTP_OK = 200
+HTTP_NOT_MODIFIED = 304
+HTTP_BAD_REQUEST = 400
+HTTP_NOT_FOUND = 404
+HTTP_SERVER_ERROR = 500
+HTTP_SERVICE_UNAVAILABLE = 503
+HTTP_GATEWAY_TIMEOUT = 504
+
+
+def serialize_request(
+    spec: Any,
+    *,
+    format: str,  # noqa: A002
+    theme: str = DEFAULT_THEME,
+    default: dict | None = None,
+    format_options: dict | None = None,
+    aggregate: bool = False,
+    max_points: int | None = None,
+    domains: bool = False,
+    debug: bool = False,
+) -> bytes:
+    """
+    Serialize a plot specification as a render service request body.
+
+    DataFrames are serialized to Arrow IPC and attached to the request as base64
+    strings.
+
+    Parameters
+    ----------
+    spec : Any
+        plot specification.
+    format : {'html', 'svg', 'png', 'pdf'}
+        output format.
+    theme : {'light', 'dark', 'current'}, optional
+        color theme to use, by default 'light'
+    default : dict, optional
+        dict of default spec values, by default None
+    format_options : dict, optional
+        output format options for typst formatter, by default None
+    aggregate : bool, optional
+        if True, compute bin and group transforms in Python when possible, so
+        that only aggregated data is sent, by default False
+    max_points : int, optional
+        if given, line, area and dot marks DataFrames with more rows are
+        downsampled in Python, by default None
+    domains : bool, optional
+        if True, compute scale domains in Python when possible, by default False
+    debug : bool, optional
+        activate debug mode, by default False
+
+    Returns
+    -------
+    bytes
+        JSON request body.
+    """
+    parser = SpecParser(
+        renderer="jsdom",
+        default=default,
+        aggregate=aggregate,
+        max_points=max_points,
+        domains=domains,
+    )
+    parser.set_spec(spec)
+    code = parser.parse_spec()
+    request = {
+        "code": code,
+        "data": parser.serialize_data(),
+        "format": format,
+        "theme": theme,
+        "format_options": format_options or {},
+        "debug": debug,
+    }
+    return json.dumps(request).encode("utf-8")
+
+
+def check_request(request: Any) -> dict:
+    """
+    Check a render service request.
+
+    Parameters
+    ----------
+    request : Any
+        decoded JSON request body.
+
+    Returns
+    -------
+    dict
+        checked request, with default values for missing optional keys.
+
+    Raises
+    ------
+    ValueError
+        if the request is not valid.
+    """
+    if not isinstance(request, dict) or not isinstance(request.get("code"), dict):
+        msg = "Request should be a JSON object with a 'code' object."
+        raise ValueError(msg)
+    request = {
+        "code": request["code"],
+        "data": request.get("data", []),
+        "format": request.get("format") or "svg",
+        "theme": request.get("theme", DEFAULT_THEME),
+        "default": request.get("default") or {},
+        "format_options": request.get("format_options") or {},
+        "debug": request.get("debug", False),
+    }
+    if not isinstance(request["data"], list):
+        msg = "'data' should be a list."
+        raise ValueError(msg)
+    if not isinstance(request["debug"], bool):
+        msg = "'debug' should be a boolean."
+        raise ValueError(msg)
+    if request["format"] not in AVAILABLE_EXTENSIONS:
+        msg = (
+            f"Incorrect format value '{request['format']}'. Available formats are "
+            f"{AVAILABLE_EXTENSIONS}."
+        )
+        raise ValueError(msg)
+    if request["theme"] not in AVAILABLE_THEMES:
+        msg = (
+            f"Incorrect theme '{request['theme']}'. Available themes are "
+            f"{AVAILABLE_THEMES}."
+        )
+        raise ValueError(msg)
+    for k in request["default"]:
+        if k not in ALLOWED_DEFAULTS:
+            msg = f"{k} is not allowed in default. Allowed values: {ALLOWED_DEFAULTS}."
+            raise ValueError(msg)
+    for k in request["format_options"]:
+        if k not in ALLOWED_FORMAT_OPTIONS:
+            msg = (
+                f"{k} is not allowed in format options. Allowed values: "
+                f"{ALLOWED_FORMAT_OPTIONS}."
+            )
+            raise ValueError(msg)
+    return request
+
+
+class RenderJob:
+    def __init__(self) -> None:
+        """
+        Rendering of a request by a worker, which can be cancelled.
+        """
+        self.creator = None
+        self.cancelled = False
+        # Set when a worker begins rendering, or when the job ends without
+        # rendering
+        self.started = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self, creator: Any) -> None:
+        """
+        Register the jsdom server rendering the request.
+
+        Raises
+        ------
+        TimeoutError
+            if the job has already been cancelled.
+        """
+        with self._lock:
+            if self.cancelled:
+                msg = "Rendering has been cancelled."
+                raise TimeoutError(msg)
+            self.creator = creator
+        self.started.set()
+
+    def cancel(self) -> None:
+        """
+        Cancel the job. If rendering has started, its jsdom server is stopped so
+        that its worker is released, and it is restarted by the next rendering.
+        """
+        with self._lock:
+            self.cancelled = True
+            creator = self.creator
+        if creator is not None:
+            creator.close()
+
+
+class RenderServer:
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 0,
+        *,
+        workers: int = 1,
+        queue_size: int = 8,
+        timeout: float = 60,
+        cache_size: int = 128,
+    ) -> None:
+        """
+        HTTP render service. Plots are rendered by a pool of jsdom servers.
+
+        Requests are POSTed to `/render` as JSON objects, as generated by
+        `serialize_request`, or as bundle files (see `pyobsplot.bundle`). At most
+        `workers` requests are rendered at the same time, and `queue_size` requests
+        can wait for a worker. Requests received when the queue is full get a 503
+        response. Renderings taking more than `timeout` seconds, not counting the
+        time spent waiting for a worker, are stopped and get a 504 response.
+
+        Responses have an ETag computed from the request body. Requests with a
+        matching `If-None-Match` header get a 304 response, and the last
+        `cache_size` rendered plots are kept in memory.
+
+        As specifications can contain JavaScript code, the service must only be
+        exposed to trusted clients.
+
+        Parameters
+        ----------
+        host : str, optional
+            host to listen on, by default "localhost"
+        port : int, optional
+            port to listen on, by default 0 (free port selected by the OS)
+        workers : int, optional
+            number of jsdom servers, by default 1
+        queue_size : int, optional
+            maximum number of requests waiting for a worker, by default 8
+        timeout : float, optional
+            maximum rendering time in seconds, by default 60
+        cache_size : int, optional
+            number of rendered plots to keep in cache, by default 128
+        """
+        if queue_size < 0:
+            msg = "queue_size must be positive."
+            raise ValueError(msg)
+        self.pool = ObsplotJsdomPool(size=workers)
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="pyobsplot-render"
+        )
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._serving = False
+        self._thread = None
+        self.httpd = ThreadingHTTPServer((host, port), RenderRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.render_server = self  # type: ignore
+
+    @property
+    def port(self) -> int:
+        return self.httpd.server_address[1]
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.httpd.server_address[0]}:{self.port}"
+
+    def __enter__(self) -> RenderServer:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def serve_forever(self) -> None:
+        """
+        Handle requests until the server is closed.
+        """
+        self._serving = True
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self._serving = False
+
+    def start(self) -> None:
+        """
+        Handle requests in a background thread.
+        """
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """
+        Stop handling requests and stop the jsdom servers.
+        """
+        if self._serving:
+            self.httpd.shutdown()
+        self.httpd.server_close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.pool.close()
+
+    def status(self) -> dict:
+        """
+        Returns the current state of the service, with the resident memory size in
+        bytes of each jsdom server.
+        """
+        with self._lock:
+            status = {
+                "status": "pyobsplot",
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "pending": self._pending,
+                "cached": len(self._cache),
+            }
+        status["rss"] = self.pool.rss()
+        return status
+
+    def render(self, request: dict, job: RenderJob | None = None) -> tuple[bytes, str]:
+        """
+        Render a checked request with the jsdom servers pool.
+
+        Parameters
+        ----------
+        request : dict
+            checked request.
+        job : RenderJob, optional
+            job to register the jsdom server rendering the request to, so that
+            it can be cancelled, by default None
+
+        Returns
+        -------
+        tuple[bytes, str]
+            Rendered plot content and its content type.
+        """
+        with self.pool.acquire() as creator:
+            if job is not None:
+                job.start(creator)
+            return creator.render_bytes(
+                request["code"],
+                data=request["data"],
+                format=request["format"],
+                theme=request["theme"],
+                default=request["default"],
+                format_options=request["format_options"],
+                debug=request["debug"],
+            )
+
+    def handle_render(
+        self, body: bytes, if_none_match: str | None = None
+    ) -> tuple[int, dict, bytes]:
+        """
+        Handle a render request.
+
+        Parameters
+        ----------
+        body : bytes
+            request body.
+        if_none_match : str, optional
+            value of the request `If-None-Match` header.
+
+        Returns
+        -------
+        tuple[int, dict, bytes]
+            response status, headers and body.
+        """
+        etag = '"' + hashlib.sha256(body).hexdigest() + '"'
+        if if_none_match is not None and etag in (
+            v.strip() for v in if_none_match.split(",")
+        ):
+            return HTTP_NOT_MODIFIED, {"ETag": etag}, b""
+        with self._lock:
+            cached = self._cache.get(etag)
+            if cached is not None:
+                self._cache.move_to_end(etag)
+        if cached is not None:
+            data, content_type = cached
+            return HTTP_OK, {"ETag": etag, "Content-Type": content_type}, data
+
+        try:
+            if is_bundle(body):
+                request = check_request(read_bundle(io.BytesIO(body)))
+            else:
+                request = check_request(json.loads(body))
+        except ValueError as e:
+            return HTTP_BAD_REQUEST, {"Content-Type": "text/plain"}, str(e).encode()
+
+        # Reject request if all workers are busy and the queue is full
+        if not self._slots.acquire(blocking=False):
+            headers = {"Content-Type": "text/plain", "Retry-After": "1"}
+            return (
+                HTTP_SERVICE_UNAVAILABLE,
+                headers,
+                b"Server overloaded, please retry later.",
+            )
+        with self._lock:
+            self._pending += 1
+        job = RenderJob()
+        future = self._executor.submit(self.render, request, job)
+        future.add_done_callback(self._release_slot)
+        future.add_done_callback(lambda _future: job.started.set())
+
+        try:
+            # The timeout starts when a worker begins rendering. The time spent in
+            # the queue is bounded by the timeouts of the renderings before it.
+            job.started.wait()
+            data, content_type = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Stop the rendering so that its worker doesn't stay busy
+            future.cancel()
+            job.cancel()
+            msg = f"Rendering took more than {self.timeout}s."
+            return HTTP_GATEWAY_TIMEOUT, {"Content-Type": "text/plain"}, msg.encode()
+        except ValueError as e:
+            return HTTP_BAD_REQUEST, {"Content-Type": "text/plain"}, str(e).encode()
+        except Exception as e:
+            logger.exception("Error during rendering")
+            return HTTP_SERVER_ERROR, {"Content-Type": "text/plain"}, str(e).encode()
+
+        if self.cache_size > 0:
+            with self._lock:
+                self._cache[etag] = (data, content_type)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return HTTP_OK, {"ETag": etag, "Content-Type": content_type}, data
+
+    def _release_slot(self, _future) -> None:
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """
+    Request handler of the render service.
+    """
+
+    server_version = "pyobsplot"
+
+    def do_GET(self) -> None:
+        if self.path == "/status":
+            body = json.dumps(self.server.render_server.status()).encode()  # type: ignore
+            self.send(HTTP_OK, {"Content-Type": "application/json"}, body)
+        else:
+            self.send(
+                HTTP_NOT_FOUND, {"Content-Type": "text/plain"}, b"Resource not found"
+            )
+
+    def do_POST(self) -> None:
+        if self.path != "/render":
+            self.send(
+                HTTP_NOT_FOUND, {"Content-Type": "text/plain"}, b"Resource not found"
+            )
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.send(
+                HTTP_BAD_REQUEST,
+                {"Content-Type": "text/plain"},
+                b"Invalid Content-Length header.",
+            )
+            return
+        body = self.rfile.read(length)
+        status, headers, body = self.server.render_server.handle_render(  # type: ignore
+            body, self.headers.get("If-None-Match")
+        )
+        self.send(status, headers, body)
+
+    def send(self, status: int, headers: dict, body: bytes) -> None:
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002
+        logger.info(format, *args)
@@ -97,7 +97,12 @@
         },
         ..figure.children.filter(e => e.tag == "div").map(swatch),
         ..legends.map(svg => image(bytes(encode-xml(svg)), height: 1in * float(svg.attrs.height) / dpi)),
-        image(bytes(encode-xml(mainfigure)), height: 1in * float(mainfigure.attrs.height) / dpi),
+        if ("typstsrc" in mainfigure.attrs) {
+            // Plot SVG has been written to its own file, no need to re-encode it
+            image(mainfigure.attrs.typstsrc, height: 1in * float(mainfigure.attrs.height) / dpi)
+        } else {
+            image(bytes(encode-xml(mainfigure)), height: 1in * float(mainfigure.attrs.height) / dpi)
+        },
         if (caption != none) {
             set text(size: 1in * 13/dpi, fill: rgb(caption_color), weight: 500)
             text(caption.children.first())
@@ -7,12 +7,12 @@ from typing import Any
 import anywidget
 import traitlets
 
+from pyobsplot.downsample import warn_downsampled
 from pyobsplot.parsing import SpecParser
 from pyobsplot.utils import DEFAULT_THEME, bundler_output_dir
 
 
 class ObsplotWidget(anywidget.AnyWidget):
-
     # Disable _esm and _css watching and live reload to avoid "exception not rethrown"
     # error with pytest.
     _esm = anywidget._file_contents.FileContents(  # type: ignore
@@ -31,6 +31,9 @@ class ObsplotWidget(anywidget.AnyWidget):
         theme: str = DEFAULT_THEME,
         default: dict | None = None,
         debug: bool = False,
+        aggregate: bool = False,
+        max_points: int | None = None,
+        domains: bool = False,
     ) -> None:
         """
         Obsplot widget class, inherits from anywidget.Anywidget.
@@ -45,8 +48,19 @@ class ObsplotWidget(anywidget.AnyWidget):
             dict of default spec values, by default None
         debug : bool, optional
             activate debug mode, by default False
+        aggregate : bool, optional
+            if True, compute bin and group transforms in Python when possible,
+            by default False
+        max_points : int, optional
+            if given, line, area and dot marks DataFrames with more rows are
+            downsampled in Python, by default None
+        domains : bool, optional
+            if True, compute scale domains in Python when possible, by default False
         """
         self._debug = debug
+        self._aggregate = aggregate
+        self._max_points = max_points
+        self._domains = domains
         self._default = default
         self._theme = theme
         # Init widget
@@ -55,9 +69,17 @@ class ObsplotWidget(anywidget.AnyWidget):
     @traitlets.validate("spec")
     def _validate_spec(self, proposal):
         spec = proposal["value"]
-        parser = SpecParser(renderer="widget", default=self._default)
+        parser = SpecParser(
+            renderer="widget",
+            default=self._default,
+            aggregate=self._aggregate,
+            max_points=self._max_points,
+            domains=self._domains,
+        )
         parser.set_spec(spec)
         code = parser.parse_spec()
+        if self._debug:
+            warn_downsampled(parser.downsampled)
         spec = {
             "data": parser.serialize_data(),
             "code": code,
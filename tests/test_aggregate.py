@@ -0,0 +1,327 @@
+"""
+Tests for Python-side aggregation of bin, group, hexbin and density transforms.
+"""
+
+from itertools import pairwise
+
+import numpy as np
+import polars as pl
+import pytest
+
+from pyobsplot import Plot
+from pyobsplot.aggregate import (
+    GRID_SIZE,
+    aggregate_mark,
+    bin_thresholds,
+    nice_thresholds,
+    tick_increment,
+)
+from pyobsplot.parsing import SpecParser
+
+rng = np.random.default_rng(0)
+N = 10_000
+DF = pl.DataFrame(
+    {
+        "value": rng.normal(size=N),
+        "weight": rng.random(N),
+        "group": rng.choice(["a", "b", "c"], size=N),
+        "other": rng.choice(["x", "y"], size=N),
+    }
+)
+
+
+def transform_args(spec):
+    return spec["args"][1]["args"]
+
+
+class TestThresholds:
+    def test_tick_increment(self):
+        assert tick_increment(0, 10, 5) == 2
+        assert tick_increment(0, 1, 10) == -10
+        assert tick_increment(0, 1000, 3) == 500
+
+    def test_nice_thresholds(self):
+        assert nice_thresholds(0, 10, 5) == [0, 2, 4, 6, 8, 10, 12]
+        assert nice_thresholds(0.01, 0.95, 10) == [i / 10 for i in range(11)]
+        assert nice_thresholds(1, 1, 10) is None
+
+    def test_bin_thresholds(self):
+        values = pl.Series(np.linspace(0, 99, 100))
+        assert bin_thresholds(values, [3, 1, 2]) == [1, 2, 3]
+        assert bin_thresholds(values, [1]) is None
+        assert bin_thresholds(values, 10) == nice_thresholds(0, 99, 10)
+        assert bin_thresholds(values, "sturges") == nice_thresholds(0, 99, 8)
+        assert bin_thresholds(values, None) == bin_thresholds(values, "auto")
+        assert bin_thresholds(values, "freedman-diaconis") is None
+        values = pl.Series([1.0, 2.0, float("inf")])
+        assert bin_thresholds(values, 10) is None
+        assert bin_thresholds(values, [0, 1, 2]) is None
+
+
+class TestAggregateMark:
+    def test_bin_count(self):
+        res = aggregate_mark(
+            Plot.rectY(
+                DF, Plot.binX({"y": "count"}, {"x": "value", "fill": "steelblue"})
+            )
+        )
+        assert res is not None
+        assert res["method"] == "rectY"
+        df = res["args"][0]
+        outputs, options = transform_args(res)
+        assert outputs == {"y": "sum"}
+        assert options["fill"] == "steelblue"
+        assert options["y"] == "y"
+        thresholds = options["x"]["thresholds"]
+        assert options["x"]["value"] == "x"
+        assert thresholds[0] <= DF["value"].min() < thresholds[1]
+        assert thresholds[-2] <= DF["value"].max() < thresholds[-1]
+        counts, _ = np.histogram(DF["value"], bins=thresholds)
+        expected = sorted(c for c in counts if c > 0)
+        assert sorted(df["y"].to_list()) == expected
+        # Aggregated values are bin middles
+        assert set(df["x"]).issubset({(a + b) / 2 for a, b in pairwise(thresholds)})
+
+    def test_bin_subgroup(self):
+        res = aggregate_mark(
+            Plot.rectY(
+                DF,
+                Plot.binX(
+                    {"y": "sum"},
+                    {"x": "value", "y": "weight", "fill": "group", "thresholds": 5},
+                ),
+            )
+        )
+        assert res is not None
+        df = res["args"][0]
+        _, options = transform_args(res)
+        assert options["fill"] == "fill"
+        assert "thresholds" not in options
+        assert df.columns == ["x", "fill", "y"]
+        assert df["y"].sum() == pytest.approx(DF["weight"].sum())
+        assert df.group_by("x", "fill").len()["len"].max() == 1
+
+    def test_bin_2d(self):
+        res = aggregate_mark(
+            Plot.rect(DF, Plot.bin({"fill": "count"}, {"x": "value", "y": "weight"}))
+        )
+        assert res is not None
+        _, options = transform_args(res)
+        assert "thresholds" in options["x"]
+        assert "thresholds" in options["y"]
+        assert res["args"][0]["fill"].sum() == N
+
+    def test_group(self):
+        res = aggregate_mark(
+            Plot.barY(
+                DF.to_pandas(),
+                Plot.groupX(
+                    {"y": "mean"}, {"x": "group", "y": "weight", "sort": {"x": "y"}}
+                ),
+            )
+        )
+        assert res is not None
+        df = res["args"][0].sort("x")
+        outputs, options = transform_args(res)
+        assert outputs == {"y": "mean"}
+        assert options == {"sort": {"x": "y"}, "x": "x", "y": "y"}
+        expected = DF.group_by("group").agg(pl.col("weight").mean()).sort("group")
+        assert df["x"].to_list() == expected["group"].to_list()
+        assert df["y"].to_list() == pytest.approx(expected["weight"].to_list())
+
+    def test_group_facets(self):
+        res = aggregate_mark(
+            Plot.dot(
+                DF,
+                Plot.group(
+                    {"r": "count", "fill": "max"},
+                    {"x": "group", "y": "other", "fx": "other", "fill": "weight"},
+                ),
+            )
+        )
+        assert res is not None
+        df = res["args"][0]
+        _, options = transform_args(res)
+        assert options["fx"] == "fx"
+        assert options["fill"] == "fill"
+        assert df.height == 6
+        assert df["r"].sum() == N
+        assert df["fill"].max() == DF["weight"].max()
+
+    @pytest.mark.parametrize(
+        "spec",
+        [
+            # Unsupported reducer
+            Plot.barY(DF, Plot.groupX({"y": "proportion"}, {"x": "group"})),
+            # Unsupported options
+            Plot.rectY(
+                DF, Plot.binX({"y": "count"}, {"x": "value", "cumulative": True})
+            ),
+            Plot.rectY(DF, Plot.binX({"y": "count", "filter": None}, {"x": "value"})),
+            # Other column channels
+            Plot.barY(
+                DF, Plot.groupX({"y": "count"}, {"x": "group", "title": "other"})
+            ),
+            # Several subgroup columns
+            Plot.barY(
+                DF,
+                Plot.groupX(
+                    {"y": "count"}, {"x": "group", "fill": "other", "stroke": "group"}
+                ),
+            ),
+            # Non column channels
+            Plot.rectY(
+                DF,
+                Plot.binX({"y": "count"}, {"x": {"value": "value", "thresholds": 10}}),
+            ),
+            Plot.barY(DF, Plot.groupX({"y": "sum"}, {"x": "group"})),
+            # Non numeric bins
+            Plot.rectY(DF, Plot.binX({"y": "count"}, {"x": "group"})),
+            # No transform
+            Plot.dot(DF, {"x": "value"}),
+            Plot.rectY([1, 2, 3], Plot.binX({"y": "count"})),
+            # Infinite values
+            Plot.rectY(
+                pl.DataFrame({"v": [1.0, 2.0, float("inf")]}),
+                Plot.binX({"y": "count"}, {"x": "v"}),
+            ),
+        ],
+    )
+    def test_unsupported(self, spec):
+        assert aggregate_mark(spec) is None
+
+
+class TestParserAggregate:
+    def parse(self, spec, **kwargs):
+        parser = SpecParser(renderer="jsdom", **kwargs)
+        parser.set_spec(spec)
+        code = parser.parse_spec()
+        return code, parser.data
+
+    def test_parser(self):
+        spec = Plot.rectY(DF, Plot.binX({"y": "count"}, {"x": "value"}))
+        code, data = self.parse(spec)
+        assert data[0] is DF
+        code, data = self.parse(spec, aggregate=True)
+        assert data[0].height < 100
+        mark = code["marks"][0]
+        assert mark["args"][0] == {"pyobsplot-type": "DataFrame-ref", "value": 0}
+        assert mark["args"][1]["args"][0] == {"y": "sum"}
+
+    def test_parser_facet(self):
+        spec = {
+            "marks": [Plot.rectY(DF, Plot.binX({"y": "count"}, {"x": "value"}))],
+            "facet": {"data": DF, "x": "group"},
+        }
+        _, data = self.parse(spec, aggregate=True)
+        assert data == [DF]
+
+
+class TestAggregateGrid:
+    # Points with a few distinct coordinates, so that snapping to the grid is exact
+    GRID_DF = pl.DataFrame(
+        {
+            "x": rng.integers(0, 50, size=N) / 10,
+            "y": rng.integers(0, 20, size=N),
+            "w": rng.random(N),
+            "group": rng.choice(["a", "b"], size=N),
+        }
+    )
+
+    def test_density(self):
+        df = self.GRID_DF
+        res = aggregate_mark(
+            Plot.density(df, {"x": "x", "y": "y", "fill": "density", "bandwidth": 10})
+        )
+        assert res is not None
+        grid = res["args"][0]
+        assert res["args"][1] == {
+            "fill": "density",
+            "bandwidth": 10,
+            "x": "x",
+            "y": "y",
+            "weight": "weight",
+        }
+        assert grid.height == df.select("x", "y").n_unique()
+        assert grid["weight"].sum() == N
+        # Extent is the same as the original one
+        assert grid["x"].min() == df["x"].min()
+        assert grid["x"].max() == pytest.approx(df["x"].max())
+        # Values are moved by at most half a grid step
+        step = (df["y"].max() - df["y"].min()) / (GRID_SIZE - 1)
+        assert ((grid["y"] - grid["y"].round()).abs() <= step / 2).all()
+        # Weights are summed
+        res = aggregate_mark(
+            Plot.density(df, {"x": "x", "y": "y", "weight": "w", "stroke": "group"})
+        )
+        assert res is not None
+        grid = res["args"][0]
+        assert res["args"][1]["stroke"] == "stroke"
+        assert grid["weight"].sum() == pytest.approx(df["w"].sum())
+        assert grid.height == df.select("x", "y", "group").n_unique()
+
+    def test_scales(self):
+        spec = Plot.density(self.GRID_DF, {"x": "x", "y": "y"})
+        assert (
+            aggregate_mark(spec, {"x": {"type": "linear"}, "y": {"grid": True}})
+            is not None
+        )
+        assert aggregate_mark(spec, {"y": {"type": "log"}}) is None
+        hexbin = Plot.dot(
+            self.GRID_DF, Plot.hexbin({"fill": "count"}, {"x": "x", "y": "y"})
+        )
+        assert aggregate_mark(hexbin, {"x": {"type": "sqrt"}}) is None
+        # Scale options are taken from the top-level specification
+        parser = SpecParser(renderer="jsdom", aggregate=True)
+        parser.set_spec({"marks": [spec], "x": {"type": "symlog"}})
+        parser.parse_spec()
+        assert parser.data == [self.GRID_DF]
+
+    def test_hexbin(self):
+        df = self.GRID_DF
+        res = aggregate_mark(
+            Plot.dot(
+                df,
+                Plot.hexbin(
+                    {"r": "count", "fill": "sum"},
+                    {"x": "x", "y": "y", "fill": "w", "binWidth": 10},
+                ),
+            )
+        )
+        assert res is not None
+        outputs, options = transform_args(res)
+        assert outputs == {"r": "sum", "fill": "sum"}
+        assert options == {"binWidth": 10, "x": "x", "y": "y", "r": "r", "fill": "fill"}
+        grid = res["args"][0]
+        assert grid["r"].sum() == N
+        assert grid["fill"].sum() == pytest.approx(df["w"].sum())
+
+    @pytest.mark.parametrize(
+        "spec",
+        [
+            # Less grid points than data points
+            Plot.density(DF.head(100), {"x": "value", "y": "weight"}),
+            Plot.dot(
+                DF.head(100),
+                Plot.hexbin({"fill": "count"}, {"x": "value", "y": "weight"}),
+            ),
+            # Unsupported reducer
+            Plot.dot(
+                GRID_DF,
+                Plot.hexbin({"fill": "mean"}, {"x": "x", "y": "y", "fill": "w"}),
+            ),
+            # Non numeric or missing channels
+            Plot.density(GRID_DF, {"x": "group", "y": "y"}),
+            Plot.density(GRID_DF, {"x": "x"}),
+            Plot.density(GRID_DF, {"x": "x", "y": "y", "weight": "foo"}),
+            # Other column channels
+            Plot.density(GRID_DF, {"x": "x", "y": "y", "title": "group"}),
+            # Infinite values
+            Plot.density(
+                pl.DataFrame({"x": [1.0, float("-inf")], "y": [1.0, 2.0]}),
+                {"x": "x", "y": "y"},
+            ),
+        ],
+    )
+    def test_unsupported(self, spec):
+        assert aggregate_mark(spec) is None
@@ -0,0 +1,160 @@
+"""
+Tests for plot bundles.
+"""
+
+import base64
+import io
+import json
+import zipfile
+from datetime import date
+
+import pandas as pd
+import polars as pl
+import pytest
+
+from pyobsplot import Obsplot, Plot
+from pyobsplot.bundle import (
+    BUNDLE_SPEC_FILE,
+    bundle_files,
+    is_bundle,
+    read_bundle,
+    write_bundle,
+)
+from pyobsplot.data import serialize
+from pyobsplot.server import check_request
+
+GEOJSON = {"type": "FeatureCollection", "features": []}
+
+
+class TestBundle:
+    def test_write_read(self, tmp_path):
+        df = pl.DataFrame(
+            {"x": [1, 2, 3], "d": [date(2024, 1, i) for i in range(1, 4)]}
+        )
+        pdf = pd.DataFrame({"y": [4, 5]})
+        spec = {
+            "marks": [
+                Plot.dot(df, {"x": "x"}),
+                Plot.line(df, {"x": "d"}),
+                Plot.geo(GEOJSON),
+                Plot.dot(pdf),
+            ]
+        }
+        path = tmp_path / "plot.pyobsplot"
+        write_bundle(
+            path,
+            spec,
+            format="png",
+            theme="dark",
+            default={"width": 100},
+            format_options={"scale": 2},
+        )
+        with zipfile.ZipFile(path) as zf:
+            # Same DataFrame is only stored once
+            assert sorted(zf.namelist()) == [
+                BUNDLE_SPEC_FILE,
+                "data/0.arrow",
+                "data/2.arrow",
+            ]
+        bundle = read_bundle(path)
+        assert bundle["code"]["width"] == 100
+        assert bundle["code"]["marks"][1]["args"][0] == {
+            "pyobsplot-type": "DataFrame-ref",
+            "value": 0,
+        }
+        assert bundle["format"] == "png"
+        assert bundle["theme"] == "dark"
+        assert bundle["format_options"] == {"scale": 2}
+        # Data is serialized as for the jsdom renderer
+        assert bundle["data"][0] == serialize(df, renderer="jsdom")
+        assert bundle["data"][1] == GEOJSON
+        assert base64.standard_b64decode(bundle["data"][2]["value"])
+        # Bundles are valid render service requests
+        assert check_request(bundle)["format"] == "png"
+
+    def test_file_object(self):
+        f = io.BytesIO()
+        write_bundle(f, Plot.lineY([1, 2]))
+        assert is_bundle(f.getvalue())
+        assert not is_bundle(b'{"code": {}}')
+        f.seek(0)
+        bundle = read_bundle(f)
+        assert bundle["format"] is None
+        assert bundle["data"] == []
+        assert bundle["code"]["marks"][0]["method"] == "lineY"
+
+    def test_bundle_files(self, tmp_path):
+        paths = [tmp_path / f"{name}.pyobsplot" for name in ("b", "a")]
+        for path in paths:
+            write_bundle(path, Plot.lineY([1, 2]))
+        (tmp_path / "foo.json").write_text("{}")
+        assert bundle_files([tmp_path]) == sorted(paths)
+        assert bundle_files([paths[0]]) == [paths[0]]
+
+    def test_read_errors(self, tmp_path):
+        path = tmp_path / "foo.pyobsplot"
+        path.write_text("not a zip")
+        with pytest.raises(ValueError):
+            read_bundle(path)
+        with zipfile.ZipFile(path, "w") as zf:
+            zf.writestr(BUNDLE_SPEC_FILE, json.dumps({"code": {}}))
+        with pytest.raises(ValueError):
+            read_bundle(path)
+        with zipfile.ZipFile(path, "w") as zf:
+            zf.writestr(
+                BUNDLE_SPEC_FILE, json.dumps({"pyobsplot-bundle": 1000, "code": {}})
+            )
+        with pytest.raises(ValueError, match="version"):
+            read_bundle(path)
+        with zipfile.ZipFile(path, "w") as zf:
+            data = [{"pyobsplot-type": "DataFrame", "file": "data/0.arrow"}]
+            zf.writestr(
+                BUNDLE_SPEC_FILE,
+                json.dumps({"pyobsplot-bundle": 1, "code": {}, "data": data}),
+            )
+        with pytest.raises(ValueError):
+            read_bundle(path)
+
+
+class TestObsplotBundle:
+    def test_save_bundle(self, tmp_path):
+        op = Obsplot(
+            format="svg",
+            theme="dark",
+            default={"height": 50},
+            format_options={"scale": 2},
+        )
+        path = tmp_path / "plot.pyobsplot"
+        op.save_bundle(Plot.lineY([1, 2]), path)
+        bundle = read_bundle(path)
+        assert bundle["format"] == "svg"
+        assert bundle["theme"] == "dark"
+        assert bundle["default"] == {"height": 50}
+        assert bundle["code"]["height"] == 50
+        assert bundle["format_options"] == {"scale": 2}
+        op.save_bundle(Plot.lineY([1, 2]), path, format="pdf", theme="light")
+        bundle = read_bundle(path)
+        assert bundle["format"] == "pdf"
+        assert bundle["theme"] == "light"
+        # Widget format is not kept
+        Obsplot(format="widget").save_bundle(Plot.lineY([1, 2]), path)
+        assert read_bundle(path)["format"] is None
+        with pytest.raises(ValueError):
+            op.save_bundle(Plot.lineY([1, 2]), path, format="widget")  # type: ignore
+        with pytest.raises(ValueError):
+            op.save_bundle(Plot.lineY, path)  # type: ignore
+
+    def test_render_bundle(self, tmp_path):
+        path = tmp_path / "plot.pyobsplot"
+        write_bundle(
+            path, Plot.lineY(pl.DataFrame({"y": [1, 2, 3]}), {"y": "y"}), format="svg"
+        )
+        op = Obsplot()
+        data, content_type = op.render_bundle(path)
+        assert content_type == "image/svg+xml"
+        assert data.startswith(b"<svg")
+        data, content_type = op.render_bundle(path, format="html")
+        assert content_type.startswith("text/html")
+        write_bundle(path, Plot.lineY([1, 2]))
+        with pytest.raises(ValueError):
+            op.render_bundle(path)
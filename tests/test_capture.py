@@ -0,0 +1,111 @@
+"""
+Tests for rendering capture.
+"""
+
+import json
+import time
+
+import polars as pl
+import pytest
+
+from pyobsplot import Plot
+from pyobsplot.capture import capture_files, read_capture, write_capture
+from pyobsplot.jsdom import ObsplotJsdom
+from pyobsplot.obsplot import ObsplotJsdomCreator
+from pyobsplot.server import check_request
+
+
+def capture_args():
+    return {
+        "code": {"marks": []},
+        "data": [],
+        "format": "png",
+        "theme": "dark",
+        "format_options": {"scale": 2},
+        "debug": False,
+        "timings": {"node": 0.1, "total": 0.2},
+        "size": 10,
+    }
+
+
+class TestCapture:
+    def test_write_read(self, tmp_path):
+        path = write_capture(tmp_path / "captures", **capture_args())
+        assert path.parent == tmp_path / "captures"
+        capture = read_capture(path)
+        assert capture["code"] == {"marks": []}
+        assert capture["theme"] == "dark"
+        assert capture["format_options"] == {"scale": 2}
+        assert capture["timings"]["total"] == 0.2
+        # Captures are valid render service requests
+        assert check_request(capture)["format"] == "png"
+
+    def test_capture_files(self, tmp_path):
+        paths = [write_capture(tmp_path, **capture_args()) for _ in range(3)]
+        assert capture_files([tmp_path]) == sorted(paths)
+        assert capture_files([paths[0]]) == [paths[0]]
+
+    def test_read_errors(self, tmp_path):
+        path = tmp_path / "foo.json"
+        path.write_text("not json")
+        with pytest.raises(ValueError):
+            read_capture(path)
+        path.write_text(json.dumps({"code": {}}))
+        with pytest.raises(ValueError):
+            read_capture(path)
+
+
+class TestCreatorCapture:
+    def creator(self, capture_dir, capture_min_time=0.0):
+        # Creator without jsdom server
+        creator = ObsplotJsdomCreator.__new__(ObsplotJsdomCreator)
+        creator.capture_dir = capture_dir
+        creator.capture_min_time = capture_min_time
+        creator.timings = {}
+        return creator
+
+    def record(self, creator):
+        df = pl.DataFrame({"x": [1, 2, 3]})
+        jsdom = ObsplotJsdom(
+            spec=Plot.dot(df, {"x": "x"}), port=0, theme="dark", force_figure=True
+        )
+        start = time.perf_counter()
+        creator._record(
+            jsdom,
+            b"output",
+            start=start,
+            convert_start=start,
+            format="png",
+            format_options=None,
+        )
+        return jsdom
+
+    def test_record(self, tmp_path):
+        creator = self.creator(tmp_path)
+        jsdom = self.record(creator)
+        assert {"parse", "serialize", "convert", "total"} <= creator.timings.keys()
+        (path,) = capture_files([tmp_path])
+        capture = read_capture(path)
+        assert capture["code"] == jsdom.spec["code"]
+        assert capture["code"]["figure"] is True
+        assert capture["data"] == jsdom.spec["data"]
+        assert capture["theme"] == "dark"
+        assert capture["size"] == len(b"output")
+        assert capture["timings"] == creator.timings
+
+    def test_no_capture(self, tmp_path):
+        creator = self.creator(None)
+        self.record(creator)
+        assert "total" in creator.timings
+        creator = self.creator(tmp_path, capture_min_time=60)
+        self.record(creator)
+        assert capture_files([tmp_path]) == []
+
+    def test_env(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("PYOBSPLOT_CAPTURE_DIR", str(tmp_path))
+        monkeypatch.setenv("PYOBSPLOT_CAPTURE_MIN_TIME", "0.5")
+        monkeypatch.setattr(ObsplotJsdomCreator, "start_server", lambda _self: None)
+        creator = ObsplotJsdomCreator()
+        assert creator.capture_dir == str(tmp_path)
+        assert creator.capture_min_time == 0.5
+        assert ObsplotJsdomCreator(capture_dir="foo").capture_dir == "foo"
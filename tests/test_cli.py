@@ -0,0 +1,143 @@
+"""
+Tests for the command line interface.
+"""
+
+import os
+import pickle
+
+import pytest
+
+from pyobsplot import Plot
+from pyobsplot.bundle import write_bundle
+from pyobsplot.cli import get_parser, load_manifest, main
+
+MANIFEST = """
+from pyobsplot import Plot
+
+specs = {
+    "line": Plot.lineY([1, 2, 3]),
+    "dots": {"marks": [Plot.dot([1, 2], {"x": Plot.identity})], "title": "dots"},
+}
+themes = {"dots": "dark"}
+skip = {"dots": ["svg"]}
+"""
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    path = tmp_path / "manifest.py"
+    path.write_text(MANIFEST)
+    return path
+
+
+class TestManifest:
+    def test_load_module(self, manifest):
+        res = load_manifest(manifest)
+        assert list(res["specs"]) == ["line", "dots"]
+        assert res["themes"] == {"dots": "dark"}
+        assert res["defaults"] == {}
+        assert res["skip"] == {"dots": ["svg"]}
+        assert res["mtime"] == manifest.stat().st_mtime
+
+    def test_load_directory(self, tmp_path):
+        specs = {"line": {"marks": []}}
+        with open(tmp_path / "specs.pkl", "wb") as f:
+            pickle.dump(specs, f)
+        with open(tmp_path / "defaults.pkl", "wb") as f:
+            pickle.dump({"line": {"width": 100}}, f)
+        res = load_manifest(tmp_path)
+        assert res["specs"] == specs
+        assert res["defaults"] == {"line": {"width": 100}}
+        assert res["themes"] == {}
+
+    def test_load_errors(self, tmp_path):
+        with pytest.raises(ValueError):
+            load_manifest(tmp_path)
+        path = tmp_path / "manifest.py"
+        path.write_text("foo = 1")
+        with pytest.raises(ValueError):
+            load_manifest(path)
+        with pytest.raises(ValueError):
+            load_manifest(tmp_path / "manifest.txt")
+
+
+class TestRender:
+    def test_parser(self):
+        args = get_parser().parse_args(
+            ["render", "manifest.py", "-f", "png", "-f", "svg", "-j", "2"]
+        )
+        assert args.format == ["png", "svg"]
+        assert args.jobs == 2
+        with pytest.raises(SystemExit):
+            get_parser().parse_args(["render", "manifest.py", "-f", "widget"])
+
+    def test_render(self, manifest, tmp_path):
+        output = tmp_path / "out"
+        assert (
+            main(
+                [
+                    "render",
+                    str(manifest),
+                    "-o",
+                    str(output),
+                    "-f",
+                    "html",
+                    "-f",
+                    "svg",
+                    "-j",
+                    "2",
+                ]
+            )
+            == 0
+        )
+        assert sorted(os.listdir(output)) == ["dots.html", "line.html", "line.svg"]
+        assert (output / "line.svg").read_text().startswith("<svg")
+        # Up to date outputs are skipped
+        mtime = (output / "line.svg").stat().st_mtime
+        assert main(["render", str(manifest), "-o", str(output), "-f", "svg"]) == 0
+        assert (output / "line.svg").stat().st_mtime == mtime
+
+
+class TestRenderBundle:
+    def test_parser(self):
+        args = get_parser().parse_args(
+            ["render-bundle", "bundles", "plot.pyobsplot", "-f", "png"]
+        )
+        assert args.bundles == ["bundles", "plot.pyobsplot"]
+        assert args.format == "png"
+        with pytest.raises(SystemExit):
+            main(["render-bundle", "bundles", "-j", "0"])
+
+    def test_render_bundle(self, tmp_path):
+        write_bundle(tmp_path / "line.pyobsplot", Plot.lineY([1, 2, 3]), format="svg")
+        write_bundle(
+            tmp_path / "dots.pyobsplot", Plot.dot([1, 2], {"x": Plot.identity})
+        )
+        output = tmp_path / "out"
+        assert main(["render-bundle", str(tmp_path), "-o", str(output)]) == 0
+        assert sorted(os.listdir(output)) == ["dots.html", "line.svg"]
+        assert (output / "line.svg").read_text().startswith("<svg")
+
+
+class TestLoadTest:
+    def test_parser(self):
+        args = get_parser().parse_args(
+            ["loadtest", "manifest.py", "-c", "4", "--rate", "10", "-d", "5"]
+        )
+        assert args.concurrency == 4
+        assert args.rate == 10
+        assert args.duration == 5
+        assert args.url is None
+        with pytest.raises(SystemExit):
+            main(["loadtest", "manifest.py", "-c", "0"])
+
+
+class TestReplay:
+    def test_parser(self):
+        args = get_parser().parse_args(
+            ["replay", "captures", "capture.json", "-n", "3"]
+        )
+        assert args.captures == ["captures", "capture.json"]
+        assert args.repeat == 3
+        with pytest.raises(SystemExit):
+            main(["replay", "captures", "-n", "0"])
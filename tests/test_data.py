@@ -3,13 +3,19 @@ Tests for data Arrow serialization.
 """
 
 import io
+import json
+import subprocess
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
 
 import pandas as pd
 import polars as pl
+import pyarrow as pa
 from polars.testing import assert_frame_equal
 from pyarrow import feather
 
-from pyobsplot.data import pd_to_arrow, pl_to_arrow
+from pyobsplot.data import data_key, is_instance, pd_to_arrow, pl_to_arrow, serialize
 
 
 class TestDataFrame:
@@ -20,6 +26,12 @@ class TestDataFrame:
         df_arrow = feather.read_feather(f)
         assert df_arrow.equals(df)
 
+    def test_data_frame_pandas_missing(self):
+        # First values missing, and all values missing
+        df = pd.DataFrame({"f": [None, 2.0], "n": [None, None]})
+        df_arrow = feather.read_feather(io.BytesIO(pd_to_arrow(df)))
+        assert df_arrow["f"].tolist()[1] == 2.0
+
     def test_data_frame_polars(self):
         df = pl.DataFrame(
             {
@@ -42,3 +54,110 @@ class TestDataFrame:
             pl.Float64,
             pl.Utf8,
         ]
+
+
+class TestDataKey:
+    df = pl.DataFrame({"x": [1, 2, 3], "y": [2.5, None, 1.0], "s": ["a", "b", "c"]})
+
+    def test_polars(self):
+        df = self.df
+        assert data_key(df) == data_key(df.clone())
+        assert data_key(df) != data_key(df.with_columns(pl.col("x") + 1))
+        assert data_key(df) != data_key(df.rename({"x": "z"}))
+        assert data_key(df) != data_key(df.with_columns(pl.col("x").cast(pl.Float64)))
+
+    def test_pandas(self):
+        df = self.df.to_pandas()
+        assert data_key(df) == data_key(df.copy())
+        assert data_key(df) != data_key(df.assign(x=df["x"] + 1))
+        assert data_key(df) != data_key(self.df)
+        # Unhashable values
+        df = pd.DataFrame({"x": [[1, 2], [3]]})
+        assert data_key(df) == data_key(df.copy())
+
+    def test_other(self):
+        geojson = {"type": "FeatureCollection", "features": []}
+        assert data_key(geojson) == data_key(dict(geojson))
+        assert data_key([1, 2]) != data_key([2, 1])
+        # Objects without JSON representation get a new key each time
+        assert data_key([object()]) != data_key([object()])
+
+
+class TestLazyImports:
+    def test_is_instance(self):
+        df_pd = pd.DataFrame({"x": [1, 2]})
+        df_pl = pl.DataFrame({"x": [1, 2]})
+        assert is_instance(df_pd, "pandas", "DataFrame")
+        assert not is_instance(df_pd, "polars", "DataFrame")
+        assert is_instance(df_pl, "polars", "DataFrame")
+        assert is_instance(df_pl["x"], "polars", "Series")
+        assert not is_instance(df_pl, "notamodule", "DataFrame")
+
+    def test_import_is_lazy(self):
+        script = (
+            "import sys, pyobsplot; "
+            "print(' '.join(m for m in ('pandas', 'polars', 'typst', 'requests', "
+            "'IPython', 'ipywidgets', 'anywidget') if m in sys.modules))"
+        )
+        out = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True
+        )
+        assert out.stdout.strip() == ""
+
+
+# Maximum peak memory allocated during serialization, as a multiple of raw data size
+MAX_MEMORY_RATIO = 4
+
+
+def serialization_peak(df) -> int:
+    """
+    Peak memory allocated during the serialization of a DataFrame in a jsdom
+    request. tracemalloc only sees Python objects and numpy arrays, so the peak of
+    Arrow buffers allocated by pyarrow is added to it, as an upper bound of their
+    simultaneous peak. Native polars allocations are not counted: they are covered
+    by the RSS measures of benchmarks/bench_memory.py.
+    """
+    default_pool = pa.default_memory_pool()
+    pool = pa.proxy_memory_pool(default_pool)
+    pa.set_memory_pool(pool)
+    tracemalloc.start()
+    try:
+        json.dumps({"spec": {"data": [serialize(df, renderer="jsdom")]}})
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        pa.set_memory_pool(default_pool)
+    return peak + pool.max_memory()
+
+
+class TestMemory:
+    """
+    Serialization makes several copies of the data (see benchmarks/bench_memory.py),
+    check that their number doesn't grow. Both Python and Arrow allocations are
+    measured.
+    """
+
+    n = 200_000
+
+    def frame(self):
+        return pl.DataFrame(
+            {
+                "x": [float(i) for i in range(self.n)],
+                "group": ["alpha", "beta"] * (self.n // 2),
+                "time": pl.datetime_range(
+                    datetime(2020, 1, 1),
+                    datetime(2020, 1, 1) + timedelta(seconds=self.n - 1),
+                    "1s",
+                    eager=True,
+                ),
+            }
+        )
+
+    def test_memory_polars(self):
+        df = self.frame()
+        assert serialization_peak(df) < MAX_MEMORY_RATIO * df.estimated_size()
+
+    def test_memory_pandas(self):
+        df = self.frame().to_pandas()
+        raw = df.memory_usage(deep=True).sum()
+        assert serialization_peak(df) < MAX_MEMORY_RATIO * raw
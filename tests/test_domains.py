@@ -0,0 +1,185 @@
+"""
+Tests for Python-side computation of scale domains.
+"""
+
+import datetime as dt
+
+import polars as pl
+import pytest
+
+from pyobsplot import Plot
+from pyobsplot.domains import add_domains, scale_domains
+from pyobsplot.parsing import SpecParser
+
+DF = pl.DataFrame(
+    {
+        "x": [3, 1, 5, 2],
+        "y": [2.5, None, float("nan"), -1.0],
+        "group": ["b", "a", "c", "a"],
+        "date": [dt.date(2024, 1, 2), dt.date(2024, 1, 1), dt.date(2024, 3, 1), None],
+        "datetime": [dt.datetime(2024, 1, 1, 12, i) for i in range(4)],
+        "color": ["red", "blue", "red", "blue"],
+        "flag": [True, False, True, True],
+    }
+)
+
+
+class TestScaleDomains:
+    def test_quantitative(self):
+        spec = {
+            "marks": [Plot.dot(DF, {"x": "x", "y": "y"}), Plot.ruleY([0]), Plot.frame()]
+        }
+        assert scale_domains(spec) == {"x": [1, 5], "y": [-1.0, 2.5]}
+
+    def test_ordinal(self):
+        spec = {
+            "marks": [
+                Plot.dot(DF, {"x": "x", "y": "group", "stroke": "flag", "fx": "group"}),
+                Plot.text(DF.to_pandas(), {"x": "x", "y": "group", "text": "group"}),
+            ]
+        }
+        domains = scale_domains(spec)
+        assert domains["y"] == ["a", "b", "c"]
+        assert domains["color"] == [False, True]
+        assert domains["fx"] == ["a", "b", "c"]
+
+    def test_band(self):
+        spec = {"marks": [Plot.cell(DF, {"x": "x", "y": "group", "fill": "x"})]}
+        assert scale_domains(spec) == {
+            "x": [1, 2, 3, 5],
+            "y": ["a", "b", "c"],
+            "color": [1, 5],
+        }
+        # Band and quantitative channels on the same scale
+        spec["marks"].append(Plot.dot(DF, {"x": "x", "y": "group"}))
+        assert "x" not in scale_domains(spec)
+
+    def test_temporal(self):
+        domains = scale_domains({"marks": [Plot.lineY(DF, {"x": "date", "y": "x"})]})
+        assert domains["x"] == [dt.date(2024, 1, 1), dt.date(2024, 3, 1)]
+        domains = scale_domains({"marks": [Plot.dotX(DF, {"x": "datetime"})]})
+        # Naive datetimes are considered as UTC, as in Arrow serialization
+        assert domains["x"][0] == dt.datetime(2024, 1, 1, 12, 0, tzinfo=dt.timezone.utc)
+        assert domains["x"][1].minute == 3
+
+    def test_mixed_types(self):
+        spec = {
+            "marks": [
+                Plot.dot(DF, {"x": "x", "y": "y"}),
+                Plot.dot(DF, {"x": "y", "y": "x"}),
+            ]
+        }
+        assert scale_domains(spec) == {"x": [-1.0, 5.0], "y": [-1.0, 5.0]}
+        spec = {"marks": [Plot.dot(DF, {"x": "date"}), Plot.dot(DF, {"x": "datetime"})]}
+        domain = scale_domains(spec)["x"]
+        assert domain[0] == dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc)
+        assert domain[1] == dt.datetime(2024, 3, 1, tzinfo=dt.timezone.utc)
+
+    def test_index(self):
+        assert scale_domains({"marks": [Plot.lineY(DF, {"y": "x"})]}) == {
+            "x": [0, 3],
+            "y": [1, 5],
+        }
+
+    def test_facet(self):
+        spec = {
+            "marks": [Plot.dot(DF, {"x": "x", "y": "y"})],
+            "facet": {"data": DF, "y": "group"},
+        }
+        assert scale_domains(spec)["fy"] == ["a", "b", "c"]
+        spec = {
+            "marks": [Plot.dot(DF, {"x": "x", "y": "y"})],
+            "facet": {"data": [1, 2], "y": "group"},
+        }
+        assert "fy" not in scale_domains(spec)
+
+    @pytest.mark.parametrize(
+        ("spec", "scales"),
+        [
+            # Unsupported marks
+            (
+                {
+                    "marks": [
+                        Plot.dot(DF, {"x": "x"}),
+                        Plot.barY(DF, {"x": "group", "y": "y"}),
+                    ]
+                },
+                set(),
+            ),
+            ({"marks": [Plot.dot(DF, Plot.stackY({"x": "x", "y": "y"}))]}, set()),
+            ({"marks": [Plot.dot(DF, {"x": "x", "y": "y", "filter": "flag"})]}, set()),
+            ({"marks": [Plot.dot(DF)]}, set()),
+            ({"marks": [Plot.ruleY([0], {"x1": "x"})]}, set()),
+            # Non column channels
+            ({"marks": [Plot.dot(DF, {"x": "x", "y": "foo"})]}, {"x"}),
+            ({"marks": [Plot.dot(DF, {"x": "x", "y": 1})]}, {"x"}),
+            # Color channels with only colors use an identity scale
+            ({"marks": [Plot.dot(DF, {"x": "x", "fill": "color"})]}, {"x"}),
+            ({"marks": [Plot.dot(DF, {"x": "x", "fill": "steelblue"})]}, {"x"}),
+            # Mixed types or missing ordinal values
+            (
+                {
+                    "marks": [
+                        Plot.dot(DF, {"x": "x", "y": "y"}),
+                        Plot.dot(DF, {"x": "group", "y": "y"}),
+                    ]
+                },
+                {"y"},
+            ),
+            ({"marks": [Plot.cell(DF, {"x": "date", "y": "group"})]}, {"y"}),
+            # Scale options
+            (
+                {"marks": [Plot.dot(DF, {"x": "x", "y": "y"})], "x": {"type": "log"}},
+                {"y"},
+            ),
+            (
+                {
+                    "marks": [Plot.dot(DF, {"x": "x", "y": "y"})],
+                    "y": {"domain": [0, 1]},
+                },
+                {"x"},
+            ),
+            (
+                {
+                    "marks": [Plot.dot(DF, {"x": "x", "fill": "y"})],
+                    "color": {"scheme": "RdBu"},
+                },
+                {"x"},
+            ),
+            (
+                {
+                    "marks": [Plot.dot(DF, {"x": "x", "y": "y"})],
+                    "projection": "mercator",
+                },
+                set(),
+            ),
+        ],
+    )
+    def test_unsupported(self, spec, scales):
+        assert set(scale_domains(spec)) == scales
+
+    def test_add_domains(self):
+        spec = {"marks": [Plot.dot(DF, {"x": "x", "y": "y"})], "x": {"nice": True}}
+        res = add_domains(spec)
+        assert res["x"] == {"nice": True, "domain": [1, 5]}
+        assert res["y"] == {"domain": [-1.0, 2.5]}
+        # Original specification is not modified
+        assert spec["x"] == {"nice": True}
+        assert "y" not in spec
+
+
+class TestParserDomains:
+    def test_parser(self):
+        spec = Plot.dot(DF, {"x": "date", "y": "group"})
+        parser = SpecParser(renderer="jsdom", domains=True)
+        parser.set_spec(spec)
+        code = parser.parse_spec()
+        assert code["x"]["domain"] == [
+            {"pyobsplot-type": "datetime", "value": "2024-01-01"},
+            {"pyobsplot-type": "datetime", "value": "2024-03-01"},
+        ]
+        assert code["y"]["domain"] == ["a", "b", "c"]
+        assert parser.data == [DF]
+        parser = SpecParser(renderer="jsdom")
+        parser.set_spec(spec)
+        assert "x" not in parser.parse_spec()
@@ -0,0 +1,219 @@
+"""
+Tests for Python-side downsampling of line and dot marks.
+"""
+
+import numpy as np
+import polars as pl
+import pytest
+
+from pyobsplot import Obsplot, Plot
+from pyobsplot.downsample import INDEX_COLUMN, POINTS_PER_BUCKET, downsample_mark
+from pyobsplot.parsing import SpecParser
+from pyobsplot.widget import ObsplotWidget
+
+rng = np.random.default_rng(0)
+N = 100_000
+MAX_POINTS = 1000
+DF = pl.DataFrame(
+    {
+        "x": np.arange(N),
+        "y": rng.normal(size=N).cumsum(),
+        "group": rng.choice(["a", "b"], size=N),
+        "color": rng.random(N),
+    }
+)
+
+
+class TestDownsampleLine:
+    def test_line(self):
+        res = downsample_mark(Plot.line(DF, {"x": "x", "y": "y"}), MAX_POINTS)
+        assert res is not None
+        spec, report = res
+        df = spec["args"][0]
+        assert spec["args"][1] == {"x": "x", "y": "y"}
+        assert report == {"method": "line", "rows": (N, df.height), "reducer": "minmax"}
+        assert df.height <= MAX_POINTS
+        assert df.columns == DF.columns
+        # Row order, first and last points and extremes are kept
+        assert df["x"].is_sorted()
+        assert df["x"][0] == 0
+        assert df["x"][-1] == N - 1
+        assert df["y"].min() == DF["y"].min()
+        assert df["y"].max() == DF["y"].max()
+
+    def test_buckets(self):
+        res = downsample_mark(Plot.lineY(DF, {"x": "x", "y": "y"}), MAX_POINTS)
+        assert res is not None
+        df = res[0]["args"][0]
+        n_buckets = MAX_POINTS // POINTS_PER_BUCKET
+        bucket_size = N // n_buckets
+        buckets = DF.with_columns(bucket=pl.col("x") // bucket_size).group_by("bucket")
+        expected = buckets.agg(
+            pl.col("y").min().alias("min"), pl.col("y").max().alias("max")
+        )
+        kept = df.with_columns(bucket=pl.col("x") // bucket_size).group_by("bucket")
+        kept = kept.agg(pl.col("y").min().alias("min"), pl.col("y").max().alias("max"))
+        assert kept.sort("bucket").equals(expected.sort("bucket"))
+
+    def test_series_and_index(self):
+        res = downsample_mark(
+            Plot.lineY(DF.to_pandas(), {"y": "y", "stroke": "group"}), MAX_POINTS
+        )
+        assert res is not None
+        spec, _ = res
+        df = spec["args"][0]
+        # Row index is kept as x channel
+        assert spec["args"][1]["x"] == {"value": INDEX_COLUMN, "label": None}
+        assert df[INDEX_COLUMN].is_sorted()
+        assert df.height <= MAX_POINTS
+        for group, series in DF.with_row_index(INDEX_COLUMN).group_by("group"):
+            kept = df.filter(pl.col("group") == group[0])
+            assert kept[INDEX_COLUMN][0] == series[INDEX_COLUMN][0]
+            assert kept[INDEX_COLUMN][-1] == series[INDEX_COLUMN][-1]
+            assert kept["y"].max() == series["y"].max()
+
+    def test_missing(self):
+        df = DF.with_columns(
+            y=pl.when(pl.col("x") % 1000 == 0).then(None).otherwise(pl.col("y"))
+        )
+        res = downsample_mark(Plot.lineY(df, {"x": "x", "y": "y"}), MAX_POINTS)
+        assert res is not None
+        # Missing values are kept as they define gaps
+        assert res[0]["args"][0]["y"].null_count() == N // 1000
+
+    def test_scales(self):
+        spec = Plot.line(DF, {"x": "x", "y": "y"})
+        assert (
+            downsample_mark(
+                spec, MAX_POINTS, {"x": {"type": "linear"}, "y": {"type": "log"}}
+            )
+            is not None
+        )
+        assert downsample_mark(spec, MAX_POINTS, {"x": {"type": "log"}}) is None
+        assert (
+            downsample_mark(
+                Plot.lineX(DF, {"x": "y", "y": "x"}), MAX_POINTS, {"y": {"type": "pow"}}
+            )
+            is None
+        )
+        # Scale options are taken from the top-level specification
+        parser = SpecParser(renderer="jsdom", max_points=MAX_POINTS)
+        parser.set_spec({"marks": [spec], "x": {"type": "symlog"}})
+        parser.parse_spec()
+        assert parser.data == [DF]
+
+
+class TestDownsampleDot:
+    def test_dot(self):
+        res = downsample_mark(
+            Plot.dot(DF, {"x": "x", "y": "y", "fill": "group"}), MAX_POINTS
+        )
+        assert res is not None
+        spec, report = res
+        df = spec["args"][0]
+        assert report["reducer"] == "stratified"
+        assert df.columns == DF.columns
+        assert df.height == pytest.approx(MAX_POINTS, rel=0.1)
+        assert df["x"].is_sorted()
+        assert set(df["group"]) == {"a", "b"}
+        # Sample is reproducible
+        res2 = downsample_mark(
+            Plot.dot(DF, {"x": "x", "y": "y", "fill": "group"}), MAX_POINTS
+        )
+        assert res2 is not None
+        assert res2[0]["args"][0].equals(df)
+
+    def test_categorical_positions(self):
+        # Rare categories of a categorical x channel are kept
+        categories = rng.choice(
+            ["a", "b", "c", "d"], size=N, p=[0.997, 0.001, 0.001, 0.001]
+        )
+        df = DF.with_columns(category=pl.Series(categories))
+        res = downsample_mark(Plot.dot(df, {"x": "category", "y": "y"}), MAX_POINTS)
+        assert res is not None
+        kept = res[0]["args"][0]
+        assert set(kept["category"]) == {"a", "b", "c", "d"}
+        assert kept.height == pytest.approx(MAX_POINTS, rel=0.1)
+
+    def test_outliers(self):
+        df = pl.concat(
+            [DF, pl.DataFrame({"x": [N], "y": [1e6], "group": ["c"], "color": [0.5]})]
+        )
+        res = downsample_mark(
+            Plot.dot(df, {"x": "x", "y": "y", "fill": "color"}), MAX_POINTS
+        )
+        assert res is not None
+        kept = res[0]["args"][0]
+        assert kept["y"].max() == 1e6
+
+    @pytest.mark.parametrize(
+        "spec",
+        [
+            # Small data
+            Plot.dot(DF.head(MAX_POINTS), {"x": "x", "y": "y"}),
+            # Unsupported marks
+            Plot.barY(DF, {"x": "group", "y": "y"}),
+            # Transforms
+            Plot.lineY(DF, Plot.windowY({"k": 10}, {"x": "x", "y": "y"})),
+            Plot.dot(DF, Plot.stackY({"x": "x", "y": "y"})),
+            # No value column
+            Plot.lineY(DF, {"x": "x"}),
+            Plot.lineY(DF, {"x": "x", "y": "group"}),
+            # Too many series or strata
+            Plot.line(DF, {"x": "x", "y": "y", "z": "x"}),
+            Plot.dot(DF, {"x": "x", "y": "y", "fill": "x"}),
+            # No DataFrame
+            Plot.lineY(list(range(N))),
+        ],
+    )
+    def test_unsupported(self, spec):
+        assert downsample_mark(spec, MAX_POINTS) is None
+
+
+class TestParserDownsample:
+    def test_parser(self):
+        spec = {
+            "marks": [
+                Plot.lineY(DF, {"x": "x", "y": "y"}),
+                Plot.dot(DF, {"x": "x", "y": "y"}),
+            ]
+        }
+        parser = SpecParser(renderer="jsdom")
+        parser.set_spec(spec)
+        parser.parse_spec()
+        assert parser.data == [DF]
+        assert parser.downsampled == []
+        parser = SpecParser(renderer="jsdom", max_points=MAX_POINTS)
+        parser.set_spec(spec)
+        code = parser.parse_spec()
+        assert len(parser.data) == 2
+        assert all(d.height <= MAX_POINTS * 1.1 for d in parser.data)
+        assert [r["method"] for r in parser.downsampled] == ["lineY", "dot"]
+        assert code["marks"][1]["args"][0] == {
+            "pyobsplot-type": "DataFrame-ref",
+            "value": 1,
+        }
+
+    def test_parser_facet(self):
+        spec = {
+            "marks": [Plot.lineY(DF, {"x": "x", "y": "y"})],
+            "facet": {"data": DF, "x": "group"},
+        }
+        parser = SpecParser(renderer="jsdom", max_points=MAX_POINTS)
+        parser.set_spec(spec)
+        parser.parse_spec()
+        assert parser.data == [DF]
+
+    @pytest.mark.filterwarnings("ignore::DeprecationWarning:ipywidgets")
+    @pytest.mark.filterwarnings("ignore::DeprecationWarning:traitlets")
+    def test_debug(self):
+        spec = Plot.lineY(DF, {"x": "x", "y": "y"})
+        with pytest.warns(UserWarning, match="lineY mark data downsampled from 100000"):
+            ObsplotWidget(spec=spec, debug=True, max_points=MAX_POINTS)
+
+    def test_obsplot(self):
+        assert Obsplot(max_points=10).max_points == 10
+        with pytest.raises(ValueError):
+            Obsplot(max_points=0)
+        with pytest.raises(ValueError):
+            Obsplot(max_points=1.5)  # type: ignore
@@ -60,3 +60,33 @@ class TestSpecs:
                 results[key] = out.getvalue() == f.read()
             out.close()
         assert all(results)
+
+
+class TestRenderBytes:
+    def test_render_bytes(self, op, specs):
+        spec = specs["titles_caption"]
+        op.theme = DEFAULT_THEME
+        op.default = {}
+        data, content_type = op.render_bytes(spec, format="html")
+        assert content_type == "text/html; charset=utf-8"
+        with open(REFERENCE_PATH / "html" / "titles_caption.html", "rb") as f:
+            assert data == f.read()
+        data, content_type = op.render_bytes(spec, format="png")
+        assert content_type == "image/png"
+        assert data[:4] == b"\x89PNG"
+        data, content_type = op.render_bytes(spec, format="pdf")
+        assert content_type == "application/pdf"
+        assert data[:4] == b"%PDF"
+
+    def test_render_to(self, op, specs):
+        spec = specs["simple_svg1"]
+        op.theme = DEFAULT_THEME
+        op.default = {}
+        with open(REFERENCE_PATH / "html" / "simple_svg1.html") as f:
+            reference = f.read()
+        out = io.BytesIO()
+        assert op.render_to(out, spec, format="html") == "text/html; charset=utf-8"
+        assert out.getvalue().decode() == reference
+        out = io.StringIO()
+        op.render_to(out, spec, format="html")
+        assert out.getvalue() == reference
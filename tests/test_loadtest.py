@@ -0,0 +1,123 @@
+"""
+Tests for the render service load tester.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from pyobsplot.loadtest import LoadTest, percentile, summarize
+from pyobsplot.obsplot import process_group_rss
+from pyobsplot.server import RenderServer
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """
+    Render service with jsdom rendering replaced by a function returning the
+    request format after a short time.
+    """
+    server = RenderServer(workers=2, queue_size=0, timeout=1, cache_size=0)
+
+    def render(request, job=None):  # noqa: ARG001
+        time.sleep(0.01)
+        return request["format"].encode(), "text/plain"
+
+    monkeypatch.setattr(server, "render", render)
+    server.start()
+    yield server
+    server.close()
+
+
+BODIES = {
+    "svg": json.dumps({"code": {}, "format": "svg"}).encode(),
+    "png": json.dumps({"code": {}, "format": "png"}).encode(),
+}
+
+
+def test_percentile():
+    assert percentile([3, 1, 2], 50) == 2
+    assert percentile([1, 2], 50) == 1.5
+    assert percentile([1, 2, 3, 4, 5], 100) == 5
+    assert summarize([]) is None
+    assert summarize([1.0])["p99"] == 1.0
+    assert summarize([1.0, 2.0])["runs"] == 2
+
+
+@pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="RSS is only available on Linux"
+)
+def test_process_group_rss():
+    assert process_group_rss(os.getpgid(0)) > 0
+    assert process_group_rss(-1) == 0
+
+
+class TestLoadTest:
+    def test_closed_loop(self, server):
+        samples = []
+        test = LoadTest(server.url, BODIES, concurrency=2, duration=1, interval=0.25)
+        res = test.run(on_sample=samples.append)
+        assert res["requests"] > 10
+        assert res["errors"] == 0
+        assert res["error_rate"] == 0
+        assert res["throughput"] > 10
+        assert set(res["specs"]) == {"svg", "png"}
+        assert res["latency"]["p50"] >= 0.01
+        assert len(samples) >= 3
+        assert samples == res["samples"]
+        assert samples[0]["pending"] is not None
+
+    def test_overload(self, server):
+        # More concurrent clients than workers with an empty queue give 503 errors
+        res = LoadTest(server.url, BODIES, concurrency=8, duration=0.5).run()
+        assert res["errors"] > 0
+        assert res["status"][503] == res["errors"]
+
+    def test_rate(self, server):
+        res = LoadTest(server.url, BODIES, rate=20, concurrency=2, duration=1).run()
+        assert 18 <= res["requests"] <= 20
+        assert res["errors"] == 0
+
+    def test_rate_concurrency(self, monkeypatch):
+        # Requests slower than the rate are never more than `concurrency` in flight
+        test = LoadTest(
+            "http://localhost", BODIES, rate=100, concurrency=2, duration=0.5
+        )
+        in_flight = []
+        lock = threading.Lock()
+
+        def send(name, _scheduled):
+            with lock:
+                in_flight.append(name)
+                assert len(in_flight) <= 2
+            time.sleep(0.1)
+            with lock:
+                in_flight.remove(name)
+                test.records.append(
+                    {"name": name, "time": 0, "latency": 0, "status": 200}
+                )
+
+        monkeypatch.setattr(test, "send", send)
+        monkeypatch.setattr(test, "sample", dict)
+        res = test.run()
+        assert 8 <= res["requests"] <= 12
+        assert res["errors"] == 0
+
+    def test_results_before_run(self):
+        res = LoadTest("http://localhost", BODIES).results()
+        assert res["requests"] == 0
+        assert res["throughput"] == 0
+        assert res["latency"] is None
+
+    def test_errors(self):
+        with pytest.raises(ValueError):
+            LoadTest("http://localhost", {})
+        with pytest.raises(ValueError):
+            LoadTest("http://localhost", BODIES, rate=0)
+        res = LoadTest("http://localhost:1", BODIES, duration=0.2, interval=0.1).run()
+        assert res["error_rate"] == 1
+        assert res["latency"] is None
@@ -3,6 +3,7 @@ Tests for Obsplot main class.
 """
 
 import json
+import sys
 import tempfile
 
 import pytest
@@ -10,6 +11,7 @@ import requests
 
 import pyobsplot
 from pyobsplot import Obsplot, Plot, obsplot
+from pyobsplot.obsplot import ObsplotJsdomCreator, ObsplotJsdomPool
 from pyobsplot.utils import DEFAULT_THEME
 
 default = {"width": 100, "style": {"color": "red"}}
@@ -188,6 +190,14 @@ class TestInit:
         with pytest.warns():
             Plot.plot({}, format="png", path=file_path.name)
 
+    def test_render_bytes_invalid_format(self, op):
+        with pytest.raises(ValueError):
+            op.render_bytes({}, format="widget")
+        with pytest.raises(ValueError):
+            op.render_bytes({})
+        with pytest.raises(ValueError):
+            op.render_bytes("foo", format="svg")
+
     def test_path_invalid_extension(self, op):
         with pytest.raises(ValueError):
             op({}, path="foo.foo")
@@ -211,3 +221,78 @@ class TestInit:
             op({}, path=file_path.name)
         with pytest.warns(match=html_warning):
             Plot.plot({}, path=file_path.name)
+
+
+class TestTypst:
+    def test_extract_figure_svgs(self):
+        with open("tests/jsdom_reference/html/geo_vapor.html") as f:
+            html = f.read()
+        out, svgs = ObsplotJsdomCreator.extract_figure_svgs(html)
+        assert len(svgs) == 1
+        assert svgs[0].startswith('<svg class="plot-')
+        assert svgs[0].endswith("</svg>")
+        assert svgs[0] in html
+        assert "ramp" not in svgs[0][: svgs[0].find(">")]
+        # Ramp legend is kept in place
+        assert out.count("<svg") == html.count("<svg") - svgs[0].count("<svg") + 1
+        placeholder = svgs[0][: svgs[0].find(">")] + ' typstsrc="plot-0.svg"></svg>'
+        assert out == html.replace(svgs[0], placeholder)
+
+    def test_extract_figure_svgs_swatches(self):
+        with open("tests/jsdom_reference/html/themes_dark.html") as f:
+            html = f.read()
+        out, svgs = ObsplotJsdomCreator.extract_figure_svgs(html)
+        # Swatches SVGs are not extracted
+        assert len(svgs) == 1
+        assert 'width="15"' not in svgs[0][: svgs[0].find(">")]
+        assert out.count('<svg width="15"') == html.count('<svg width="15"')
+
+    def test_extract_figure_svgs_no_figure(self):
+        html = '<svg class="plot" width="10" height="10"><circle r="1"></circle></svg>'
+        out, svgs = ObsplotJsdomCreator.extract_figure_svgs(html)
+        assert out == html
+        assert svgs == []
+
+
+class TestPool:
+    def test_pool_size(self):
+        with pytest.raises(ValueError):
+            ObsplotJsdomPool(size=0)
+
+    def test_pool_acquire(self):
+        with ObsplotJsdomPool(size=1) as pool:
+            with pool.acquire() as creator:
+                assert isinstance(creator, ObsplotJsdomCreator)
+                # Pool is full and its only server is busy
+                with pytest.raises(TimeoutError), pool.acquire(timeout=0.1):
+                    pass
+            with pool.acquire() as creator2:
+                assert creator2 is creator
+            data, content_type = pool.render_bytes(Plot.lineY([1, 2]), format="svg")
+            assert content_type == "image/svg+xml"
+            assert data.startswith(b"<svg")
+
+    def test_pool_restart_error(self):
+        class DeadCreator:
+            def start_server(self):
+                msg = "Server not started"
+                raise RuntimeError(msg)
+
+        pool = ObsplotJsdomPool(size=1)
+        creator = DeadCreator()
+        pool._creators.append(creator)
+        pool._idle.put(creator)
+        # Server slot is not lost when restarting fails
+        for _ in range(2):
+            with pytest.raises(RuntimeError), pool.acquire(timeout=0.1):
+                pass
+        assert pool._idle.get_nowait() is creator
+
+    def test_pool_start(self):
+        with ObsplotJsdomPool(size=2) as pool:
+            assert pool.rss() == []
+            pool.start()
+            rss = pool.rss()
+            assert len(rss) == 2
+            if sys.platform.startswith("linux"):
+                assert all(v > 0 for v in rss)
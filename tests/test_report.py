@@ -0,0 +1,77 @@
+"""
+Tests for HTML reports.
+"""
+
+import json
+import re
+
+import polars as pl
+import pytest
+
+from pyobsplot import Obsplot, Plot
+from pyobsplot.data import data_key
+
+pytestmark = [
+    pytest.mark.filterwarnings("ignore::DeprecationWarning:ipywidgets"),
+    pytest.mark.filterwarnings("ignore::DeprecationWarning:traitlets"),
+]
+
+DF = pl.DataFrame({"x": [1, 2, 3], "y": [2.5, 1.0, 3.0]})
+
+
+def report_content(path) -> tuple[str, dict, list]:
+    """
+    Content of a report, with its embedded data and plot codes.
+    """
+    content = path.read_text()
+    data = re.search(r'id="pyobsplot-report-data">(.*?)</script>', content).group(1)
+    plots = re.search(r'id="pyobsplot-report-plots">(.*?)</script>', content).group(1)
+    return content, json.loads(data), json.loads(plots)
+
+
+class TestReport:
+    def test_report(self, tmp_path):
+        path = tmp_path / "report.html"
+        specs = [
+            Plot.dot(DF, {"x": "x", "y": "y"}),
+            {"marks": [Plot.lineY(DF, {"x": "x", "y": "y"})]},
+        ]
+        Obsplot(theme="dark").save_report(specs, path, title="Report <1>")
+        content, data, plots = report_content(path)
+        assert "<h1>Report &lt;1&gt;</h1>" in content
+        assert content.count('class="pyobsplot-report-plot"') == 2
+        # Bundle is inlined once, and data is embedded once
+        assert content.count("globalThis.pyobsplot_widget_source =") == 1
+        assert list(data) == [data_key(DF)]
+        assert data[data_key(DF)]["pyobsplot-type"] == "DataFrame"
+        assert [plot["data"] for plot in plots] == [[data_key(DF)], [data_key(DF)]]
+        assert plots[0]["theme"] == "dark"
+
+    def test_sections(self, tmp_path):
+        path = tmp_path / "report.html"
+        geo = {"type": "FeatureCollection", "features": [], "name": "</script>"}
+        Obsplot().save_report({"First": Plot.geo(geo), "Second": Plot.geo(geo)}, path)
+        content, data, _ = report_content(path)
+        assert "<h2>First</h2>" in content
+        assert "<h2>Second</h2>" in content
+        # Data is escaped in script elements
+        assert list(data.values()) == [geo]
+
+    def test_shared_assets(self, tmp_path):
+        op = Obsplot()
+        op.save_report(
+            [Plot.dot(DF, {"x": "x"})], tmp_path / "first.html", shared_assets=True
+        )
+        op.save_report(
+            [Plot.dot(DF, {"x": "y"})], tmp_path / "second.html", shared_assets=True
+        )
+        assets = [p.name for p in tmp_path.glob("pyobsplot-*")]
+        assert sorted(p.split(".")[-1] for p in assets) == ["css", "js"]
+        for name in ("first.html", "second.html"):
+            content = (tmp_path / name).read_text()
+            assert "globalThis.pyobsplot_widget_source =" not in content
+            assert all(asset in content for asset in assets)
+
+    def test_invalid(self, tmp_path):
+        with pytest.raises(ValueError, match="dictionaries"):
+            Obsplot().save_report(["foo"], tmp_path / "report.html")
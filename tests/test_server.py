@@ -0,0 +1,180 @@
+"""
+Tests for the HTTP render service.
+"""
+
+import http.client
+import io
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import polars as pl
+import pytest
+import requests
+
+from pyobsplot import Plot
+from pyobsplot.bundle import write_bundle
+from pyobsplot.server import RenderServer, check_request, serialize_request
+
+
+@pytest.fixture
+def server():
+    server = RenderServer(workers=1, queue_size=0, timeout=1, cache_size=2)
+    server.start()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def fake_render(server, monkeypatch):
+    """
+    Replace jsdom rendering by a slow function returning the request format. It
+    ends early when its fake jsdom server is closed.
+    """
+    calls = []
+
+    def render(request, job=None):
+        calls.append(request)
+        closed = threading.Event()
+        if job is not None:
+            job.start(SimpleNamespace(close=closed.set))
+        closed.wait(request["code"].get("sleep", 0))
+        return request["format"].encode(), "text/plain"
+
+    monkeypatch.setattr(server, "render", render)
+    return calls
+
+
+def post(server, body, headers=None):
+    return requests.post(server.url + "/render", data=body, headers=headers, timeout=10)
+
+
+class TestRequest:
+    def test_serialize_request(self):
+        body = json.loads(
+            serialize_request(Plot.lineY([1, 2]), format="png", default={"width": 100})
+        )
+        assert body["format"] == "png"
+        assert body["theme"] == "light"
+        assert body["data"] == []
+        assert body["code"]["width"] == 100
+        assert body["code"]["marks"][0]["method"] == "lineY"
+
+    def test_check_request(self):
+        req = check_request({"code": {}})
+        assert req["format"] == "svg"
+        assert req["data"] == []
+        assert req["debug"] is False
+        assert check_request({"code": {}, "debug": True})["debug"] is True
+        with pytest.raises(ValueError):
+            check_request({"code": {}, "debug": "yes"})
+        with pytest.raises(ValueError):
+            check_request([])
+        with pytest.raises(ValueError):
+            check_request({"code": {}, "format": "widget"})
+        with pytest.raises(ValueError):
+            check_request({"code": {}, "theme": "foo"})
+        with pytest.raises(ValueError):
+            check_request({"code": {}, "default": {"x": 1}})
+        with pytest.raises(ValueError):
+            check_request({"code": {}, "format_options": {"foo": 1}})
+
+
+class TestServer:
+    def test_status(self, server):
+        r = requests.get(server.url + "/status", timeout=10)
+        assert r.json()["status"] == "pyobsplot"
+        assert requests.get(server.url + "/foo", timeout=10).status_code == 404
+
+    def test_bad_request(self, server):
+        assert post(server, b"not json").status_code == 400
+        assert (
+            post(server, json.dumps({"code": {}, "format": "foo"})).status_code == 400
+        )
+
+    def test_etag(self, server, fake_render):
+        body = json.dumps({"code": {}, "format": "png"})
+        r = post(server, body)
+        assert r.status_code == 200
+        assert r.content == b"png"
+        etag = r.headers["ETag"]
+        r = post(server, body, headers={"If-None-Match": etag})
+        assert r.status_code == 304
+        r = post(server, body)
+        assert r.status_code == 200
+        assert r.headers["ETag"] == etag
+        # Second response comes from the cache
+        assert len(fake_render) == 1
+        # Cache size is bounded
+        post(server, json.dumps({"code": {}, "format": "svg"}))
+        post(server, json.dumps({"code": {}, "format": "pdf"}))
+        assert server.status()["cached"] == 2
+
+    def test_bundle(self, server, fake_render):
+        f = io.BytesIO()
+        write_bundle(
+            f, Plot.dot(pl.DataFrame({"x": [1, 2]})), format="png", theme="dark"
+        )
+        r = post(server, f.getvalue())
+        assert r.status_code == 200
+        assert r.content == b"png"
+        assert fake_render[0]["theme"] == "dark"
+        assert fake_render[0]["data"][0]["pyobsplot-type"] == "DataFrame"
+        assert post(server, b"PK\x03\x04 not a bundle").status_code == 400
+
+    @pytest.mark.usefixtures("fake_render")
+    def test_overload(self, server):
+        slow = json.dumps({"code": {"sleep": 0.5}})
+        responses = []
+        thread = threading.Thread(target=lambda: responses.append(post(server, slow)))
+        thread.start()
+        time.sleep(0.1)
+        r = post(server, json.dumps({"code": {}}))
+        assert r.status_code == 503
+        assert "Retry-After" in r.headers
+        thread.join()
+        assert responses[0].status_code == 200
+
+    @pytest.mark.usefixtures("fake_render")
+    def test_timeout(self, server):
+        r = post(server, json.dumps({"code": {"sleep": 10}}))
+        assert r.status_code == 504
+        # Rendering is stopped and its worker slot is released
+        time.sleep(0.1)
+        assert post(server, json.dumps({"code": {}})).status_code == 200
+
+    @pytest.mark.usefixtures("fake_render")
+    def test_timeout_queue(self, server):
+        # Time spent waiting for a worker is not counted in the timeout
+        server._slots = threading.BoundedSemaphore(2)
+        responses = []
+        thread = threading.Thread(
+            target=lambda: responses.append(
+                post(server, json.dumps({"code": {"sleep": 0.8}}))
+            )
+        )
+        thread.start()
+        time.sleep(0.1)
+        r = post(server, json.dumps({"code": {"sleep": 0.5}}))
+        thread.join()
+        assert responses[0].status_code == 200
+        assert r.status_code == 200
+
+    def test_content_length(self, server):
+        host, port = server.url.removeprefix("http://").split(":")
+        for length in ("foo", "-1"):
+            conn = http.client.HTTPConnection(host, int(port), timeout=10)
+            conn.putrequest("POST", "/render")
+            conn.putheader("Content-Length", length)
+            conn.endheaders()
+            assert conn.getresponse().status == 400
+            conn.close()
+
+
+class TestRender:
+    def test_render(self, server):
+        r = post(server, serialize_request(Plot.lineY([1, 2]), format="svg"))
+        assert r.status_code == 200
+        assert r.headers["Content-Type"] == "image/svg+xml"
+        assert r.content.startswith(b"<svg")